@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/18
+Desc: 批量抓取的检查点日志
+每完成一项(一页、一只股票)向日志文件追加一行 JSON 并立即写盘, 进程中断后重新运行时读取日志, 跳过已完成的项.
+全部完成后删除日志. 日志超过有效期不再使用, 避免拿到数据源已经更新过的旧数据.
+日志保存在 instock/cache/checkpoint 下.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+import instock.core.crawling.replay as rp
+
+cpath_current = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+checkpoint_path = os.path.join(rp.cache_root(os.path.join(cpath_current, 'cache')), 'checkpoint')
+
+ttl = 3600  # 日志有效期秒数
+
+# 使用环境变量配置,docker -e 传递
+_ttl = os.environ.get('crawl_checkpoint_ttl')
+if _ttl is not None:
+    ttl = int(_ttl)
+
+
+def journal_key(*parts) -> str:
+    """
+    由请求地址、参数等生成日志名
+    """
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Journal:
+    def __init__(self, name: str, ttl: float = ttl):
+        self.file_path = os.path.join(checkpoint_path, f"{name}.jsonl")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """
+        读取已完成的项, 日志不存在或已过期时返回空字典, 最后一行没有写完整时忽略
+        :return: {项: 值}
+        :rtype: dict
+        """
+        done = {}
+        with self._lock:
+            try:
+                if not os.path.isfile(self.file_path):
+                    return done
+                if os.path.getmtime(self.file_path) + self.ttl < time.time():
+                    os.remove(self.file_path)
+                    return done
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break
+                        done[entry["key"]] = entry.get("value")
+            except Exception as e:
+                logging.error(f"checkpoint.Journal.load处理异常：{e}")
+        return done
+
+    def add(self, key, value=None):
+        """
+        记录一项已完成
+        :param key: 项, 例如页码、股票代码
+        :param value: 需要在重新运行时恢复的结果, 可以 JSON 序列化
+        """
+        line = json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(checkpoint_path, exist_ok=True)
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                logging.error(f"checkpoint.Journal.add处理异常：{e}")
+
+    def clear(self):
+        """
+        全部完成, 删除日志
+        """
+        with self._lock:
+            if os.path.isfile(self.file_path):
+                os.remove(self.file_path)
@@ -5,19 +5,44 @@ Date: 2023/1/4 12:18
 Desc: 东方财富-ETF 行情
 https://quote.eastmoney.com/sh513500.html
 """
-from functools import lru_cache
 
 import pandas as pd
-import requests
+import instock.core.crawling.http_client as hc
+import instock.core.crawling.response_cache as rc
+import instock.core.crawling.kline_parser as kp
+import instock.core.crawling.spot_parser as sp
 
 
-def fund_etf_spot_em() -> pd.DataFrame:
+# ETF 实时行情的接口字段: (列名, 类型), 按输出列的顺序
+SPOT_FIELDS = {
+    "f12": ("代码", "string"),
+    "f14": ("名称", "string"),
+    "f2": ("最新价", "numeric"),
+    "f3": ("涨跌幅", "numeric"),
+    "f4": ("涨跌额", "numeric"),
+    "f5": ("成交量", "numeric"),
+    "f6": ("成交额", "numeric"),
+    "f17": ("开盘价", "numeric"),
+    "f15": ("最高价", "numeric"),
+    "f16": ("最低价", "numeric"),
+    "f18": ("昨收", "numeric"),
+    "f8": ("换手率", "numeric"),
+    "f21": ("流通市值", "numeric"),
+    "f20": ("总市值", "numeric"),
+}
+
+
+def fund_etf_spot_em(fields: dict = None) -> pd.DataFrame:
     """
     东方财富-ETF 实时行情
     https://quote.eastmoney.com/center/gridlist.html#fund_etf
+    :param fields: {接口字段: (列名, 类型)}, 只请求这些字段, 默认 SPOT_FIELDS
+    :type fields: dict
     :return: ETF 实时行情
     :rtype: pandas.DataFrame
     """
+    if fields is None:
+        fields = SPOT_FIELDS
     url = "http://88.push2.eastmoney.com/api/qt/clist/get"
     params = {
         "pn": "1",
@@ -30,65 +55,17 @@ def fund_etf_spot_em() -> pd.DataFrame:
         "wbp2u": "|0|0|0|web",
         "fid": "f3",
         "fs": "b:MK0021,b:MK0022,b:MK0023,b:MK0024",
-        "fields": "f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f12,f13,f14,f15,f16,f17,f18,f20,f21,f23,f24,f25,f22,f11,f62,f128,f136,f115,f152",
+        "fields": ",".join(fields),
         "_": "1672806290972",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
-    temp_df = pd.DataFrame(data_json["data"]["diff"])
-    temp_df.rename(
-        columns={
-            "f12": "代码",
-            "f14": "名称",
-            "f2": "最新价",
-            "f3": "涨跌幅",
-            "f4": "涨跌额",
-            "f5": "成交量",
-            "f6": "成交额",
-            "f17": "开盘价",
-            "f15": "最高价",
-            "f16": "最低价",
-            "f18": "昨收",
-            "f8": "换手率",
-            "f21": "流通市值",
-            "f20": "总市值",
-        },
-        inplace=True,
-    )
-    temp_df = temp_df[
-        [
-            "代码",
-            "名称",
-            "最新价",
-            "涨跌幅",
-            "涨跌额",
-            "成交量",
-            "成交额",
-            "开盘价",
-            "最高价",
-            "最低价",
-            "昨收",
-            "换手率",
-            "流通市值",
-            "总市值",
-        ]
-    ]
-    temp_df["最新价"] = pd.to_numeric(temp_df["最新价"], errors="coerce")
-    temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"], errors="coerce")
-    temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"], errors="coerce")
-    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"], errors="coerce")
-    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"], errors="coerce")
-    temp_df["开盘价"] = pd.to_numeric(temp_df["开盘价"], errors="coerce")
-    temp_df["最高价"] = pd.to_numeric(temp_df["最高价"], errors="coerce")
-    temp_df["最低价"] = pd.to_numeric(temp_df["最低价"], errors="coerce")
-    temp_df["昨收"] = pd.to_numeric(temp_df["昨收"], errors="coerce")
-    temp_df["换手率"] = pd.to_numeric(temp_df["换手率"], errors="coerce")
-    temp_df["流通市值"] = pd.to_numeric(temp_df["流通市值"], errors="coerce")
-    temp_df["总市值"] = pd.to_numeric(temp_df["总市值"], errors="coerce")
-    return temp_df
+    if not (data_json["data"] and data_json["data"]["diff"]):
+        return pd.DataFrame()
+    return sp.spot_frame(data_json["data"]["diff"], fields)
 
 
-@lru_cache()
+@rc.ttl_cache(rc.DAY)
 def _fund_etf_code_id_map_em() -> dict:
     """
     东方财富-ETF 代码和市场标识映射
@@ -111,7 +88,7 @@ def _fund_etf_code_id_map_em() -> dict:
         "fields": "f12,f13",
         "_": "1672806290972",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
     temp_df = pd.DataFrame(data_json["data"]["diff"])
     temp_dict = dict(zip(temp_df["f12"], temp_df["f13"]))
@@ -140,7 +117,27 @@ def fund_etf_hist_em(
     :return: 每日行情
     :rtype: pandas.DataFrame
     """
-    code_id_dict = _fund_etf_code_id_map_em()
+    url, params = fund_etf_hist_request(symbol, period, start_date, end_date, adjust)
+    r = hc.get(url, params=params)
+    temp_df = fund_etf_hist_parse(r.json())
+    if temp_df.empty:
+        hc.empty_response(url)
+    return temp_df
+
+
+def fund_etf_hist_request(
+    symbol: str = "159707",
+    period: str = "daily",
+    start_date: str = "19700101",
+    end_date: str = "20500101",
+    adjust: str = "",
+) -> tuple:
+    """
+    东方财富-ETF 行情的请求地址和参数, 用于批量抓取, 参数同 fund_etf_hist_em
+    :return: (url, params)
+    :rtype: tuple
+    """
+    market_id = rc.lookup(_fund_etf_code_id_map_em, symbol)
     adjust_dict = {"qfq": "1", "hfq": "2", "": "0"}
     period_dict = {"daily": "101", "weekly": "102", "monthly": "103"}
     url = "http://push2his.eastmoney.com/api/qt/stock/kline/get"
@@ -150,43 +147,25 @@ def fund_etf_hist_em(
         "ut": "7eea3edcaed734bea9cbfc24409ed989",
         "klt": period_dict[period],
         "fqt": adjust_dict[adjust],
-        "secid": f"{code_id_dict[symbol]}.{symbol}",
+        "secid": f"{market_id}.{symbol}",
         "beg": start_date,
         "end": end_date,
         "_": "1623766962675",
     }
-    r = requests.get(url, params=params)
-    data_json = r.json()
+    return url, params
+
+
+def fund_etf_hist_parse(data_json: dict) -> pd.DataFrame:
+    """
+    东方财富-ETF 行情的返回数据解析
+    :param data_json: 接口返回的 json
+    :type data_json: dict
+    :return: 每日行情
+    :rtype: pandas.DataFrame
+    """
     if not (data_json["data"] and data_json["data"]["klines"]):
         return pd.DataFrame()
-    temp_df = pd.DataFrame([item.split(",") for item in data_json["data"]["klines"]])
-    temp_df.columns = [
-        "日期",
-        "开盘",
-        "收盘",
-        "最高",
-        "最低",
-        "成交量",
-        "成交额",
-        "振幅",
-        "涨跌幅",
-        "涨跌额",
-        "换手率",
-    ]
-    temp_df.index = pd.to_datetime(temp_df["日期"])
-    temp_df.reset_index(inplace=True, drop=True)
-
-    temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-    temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-    temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-    temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-    temp_df["振幅"] = pd.to_numeric(temp_df["振幅"])
-    temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"])
-    temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"])
-    temp_df["换手率"] = pd.to_numeric(temp_df["换手率"])
-    return temp_df
+    return kp.kline_frame(data_json["data"]["klines"])
 
 
 def fund_etf_hist_min_em(
@@ -212,7 +191,7 @@ def fund_etf_hist_min_em(
     :return: 每日分时行情
     :rtype: pandas.DataFrame
     """
-    code_id_dict = _fund_etf_code_id_map_em()
+    market_id = rc.lookup(_fund_etf_code_id_map_em, symbol)
     adjust_map = {
         "": "0",
         "qfq": "1",
@@ -226,36 +205,12 @@ def fund_etf_hist_min_em(
             "ut": "7eea3edcaed734bea9cbfc24409ed989",
             "ndays": "5",
             "iscr": "0",
-            "secid": f"{code_id_dict[symbol]}.{symbol}",
+            "secid": f"{market_id}.{symbol}",
             "_": "1623766962675",
         }
-        r = requests.get(url, params=params)
+        r = hc.get(url, params=params)
         data_json = r.json()
-        temp_df = pd.DataFrame(
-            [item.split(",") for item in data_json["data"]["trends"]]
-        )
-        temp_df.columns = [
-            "时间",
-            "开盘",
-            "收盘",
-            "最高",
-            "最低",
-            "成交量",
-            "成交额",
-            "最新价",
-        ]
-        temp_df.index = pd.to_datetime(temp_df["时间"])
-        temp_df = temp_df[start_date:end_date]
-        temp_df.reset_index(drop=True, inplace=True)
-        temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-        temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-        temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-        temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-        temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-        temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-        temp_df["最新价"] = pd.to_numeric(temp_df["最新价"])
-        temp_df["时间"] = pd.to_datetime(temp_df["时间"]).astype(str)
-        return temp_df
+        return kp.minute_frame(data_json["data"]["trends"], kp.TREND_COLUMNS, start_date, end_date)
     else:
         url = "http://push2his.eastmoney.com/api/qt/stock/kline/get"
         params = {
@@ -264,43 +219,14 @@ def fund_etf_hist_min_em(
             "ut": "7eea3edcaed734bea9cbfc24409ed989",
             "klt": period,
             "fqt": adjust_map[adjust],
-            "secid": f"{code_id_dict[symbol]}.{symbol}",
+            "secid": f"{market_id}.{symbol}",
             "beg": "0",
             "end": "20500000",
             "_": "1630930917857",
         }
-        r = requests.get(url, params=params)
+        r = hc.get(url, params=params)
         data_json = r.json()
-        temp_df = pd.DataFrame(
-            [item.split(",") for item in data_json["data"]["klines"]]
-        )
-        temp_df.columns = [
-            "时间",
-            "开盘",
-            "收盘",
-            "最高",
-            "最低",
-            "成交量",
-            "成交额",
-            "振幅",
-            "涨跌幅",
-            "涨跌额",
-            "换手率",
-        ]
-        temp_df.index = pd.to_datetime(temp_df["时间"])
-        temp_df = temp_df[start_date:end_date]
-        temp_df.reset_index(drop=True, inplace=True)
-        temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-        temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-        temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-        temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-        temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-        temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-        temp_df["振幅"] = pd.to_numeric(temp_df["振幅"])
-        temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"])
-        temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"])
-        temp_df["换手率"] = pd.to_numeric(temp_df["换手率"])
-        temp_df["时间"] = pd.to_datetime(temp_df["时间"]).astype(str)
+        temp_df = kp.minute_frame(data_json["data"]["klines"], ["时间"] + kp.KLINE_COLUMNS[1:], start_date, end_date)
         temp_df = temp_df[
             [
                 "时间",
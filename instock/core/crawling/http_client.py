@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/18
+Desc: 抓取模块共用的 HTTP 客户端
+所有抓取模块共用一个连接池化的 requests.Session, 同一个主机的连接复用(keep-alive),
+请求有默认超时, 连接错误、超时、429 和 5xx 响应按带随机抖动的指数退避重试.
+每个主机一个令牌桶限速: 响应正常时逐步提高速度, 错误或空数据的比例升高时减半,
+以数据源允许的最快速度抓取.
+分页接口并发抓取, 已完成的页记录在检查点日志中(见 checkpoint), 中断后重新运行时跳过.
+设置了录制或回放目录时(见 replay), 响应保存到目录或从目录返回, 回放时不限速.
+"""
+import os
+import time
+import random
+import logging
+import threading
+import concurrent.futures
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instock.core.crawling.replay as rp
+import instock.core.crawling.checkpoint as cp
+
+timeout = (5, 20)  # (连接超时, 读取超时) 秒
+retries = 3  # 最多重试次数
+backoff = 0.5  # 第一次重试前最多等待的秒数, 之后每次翻倍
+backoff_max = 10  # 最多等待的秒数
+pool_size = 32  # 每个主机最多保持的连接数
+page_workers = 8  # 分页接口同时抓取的页数
+
+# 每个主机的初始速度(每秒请求数), 没有配置的主机使用 default_rate
+host_rates = {
+    'push2his.eastmoney.com': 20.0,
+    'datacenter-web.eastmoney.com': 5.0,
+    'finance.sina.com.cn': 2.0,
+}
+default_rate = 10.0
+min_rate = 0.5
+max_rate = 100.0
+
+# 使用环境变量配置,docker -e 传递
+_retries = os.environ.get('crawl_retries')
+if _retries is not None:
+    retries = int(_retries)
+_pool_size = os.environ.get('crawl_pool_size')
+if _pool_size is not None:
+    pool_size = int(_pool_size)
+record_path = rp.record_path  # 录制响应的目录
+replay_path = rp.replay_path  # 回放响应的目录
+replay_latency = float(os.environ.get('crawl_replay_latency', 0))  # 回放时每次请求的延时秒数
+
+
+def pooled_session(pool_size: int = pool_size) -> requests.Session:
+    """
+    连接池化的 requests.Session
+    :param pool_size: 每个主机最多保持的连接数
+    :type pool_size: int
+    :return: requests.Session
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    if record_path or replay_path:
+        return rp.install(session, record=record_path, replay=replay_path, latency=replay_latency,
+                          pool_connections=16, pool_maxsize=pool_size)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+session = pooled_session()
+
+
+class TokenBucket:
+    window = 20  # 每多少个请求调整一次速度
+    bad_ratio = 0.2  # 错误和空数据超过这个比例时速度减半
+    good_ratio = 0.05  # 错误和空数据不超过这个比例时提高速度
+
+    def __init__(self, rate: float, min_rate: float = min_rate, max_rate: float = max_rate):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = 1.0
+        self._stamp = time.monotonic()
+        self._ok = 0
+        self._bad = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        取一个令牌, 没有时等待. 令牌可以预支, 等待的线程按先后顺序错开.
+        """
+        with self._lock:
+            now = time.monotonic()
+            burst = max(1.0, self.rate)
+            self.tokens = min(burst, self.tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, ok: bool):
+        """
+        记录一次请求的结果, 每 window 次按错误比例调整速度
+        :param ok: 响应正常为 True, 错误、限流或空数据为 False
+        :type ok: bool
+        """
+        with self._lock:
+            if ok:
+                self._ok += 1
+            else:
+                self._bad += 1
+            total = self._ok + self._bad
+            if total < self.window:
+                return
+            ratio = self._bad / total
+            self._ok = self._bad = 0
+            if ratio > self.bad_ratio:
+                self.rate = max(self.min_rate, self.rate / 2)
+            elif ratio <= self.good_ratio:
+                self.rate = min(self.max_rate, self.rate + max(1.0, self.rate * 0.1))
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(url: str) -> TokenBucket:
+    """
+    url 所在主机的令牌桶
+    """
+    host = urlsplit(url).hostname or ''
+    with _buckets_lock:
+        _bucket = _buckets.get(host)
+        if _bucket is None:
+            _bucket = TokenBucket(host_rates.get(host, default_rate))
+            _buckets[host] = _bucket
+        return _bucket
+
+
+def rates() -> dict:
+    """
+    各主机当前的速度
+    :return: {主机: 每秒请求数}
+    :rtype: dict
+    """
+    with _buckets_lock:
+        return {host: _bucket.rate for host, _bucket in _buckets.items()}
+
+
+def empty_response(url: str):
+    """
+    接口返回了空数据(数据源限流时常见), 计入 url 所在主机的错误比例
+    """
+    bucket(url).feedback(False)
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    第 attempt 次重试前等待的秒数, 在 [0, backoff * 2^attempt] 之间随机, 避免多个线程同时重试
+    :param attempt: 第几次重试, 从0开始
+    :type attempt: int
+    :return: 秒数
+    :rtype: float
+    """
+    return random.uniform(0, min(backoff_max, backoff * (2 ** attempt)))
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    按主机限速发送请求, 连接错误、超时、429 和 5xx 响应按指数退避重试, 最后一次的错误响应原样返回
+    :param method: 请求方法
+    :type method: str
+    :param url: 请求地址
+    :type url: str
+    :return: 响应
+    :rtype: requests.Response
+    """
+    kwargs.setdefault("timeout", timeout)
+    _bucket = bucket(url)
+    attempt = 0
+    while True:
+        if not replay_path:
+            _bucket.acquire()
+        try:
+            r = session.request(method, url, **kwargs)
+            throttled = r.status_code == 429 or r.status_code >= 500
+            _bucket.feedback(not throttled)
+            if not throttled or attempt >= retries:
+                return r
+            reason = f"HTTP {r.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _bucket.feedback(False)
+            if attempt >= retries:
+                raise
+            reason = e
+        delay = backoff_delay(attempt)
+        logging.info(f"http_client.request：{url}第{attempt + 1}次重试，{delay:.2f}秒后，{reason}")
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url: str, params: dict = None, **kwargs) -> requests.Response:
+    """
+    GET 请求, 参数同 requests.get
+    """
+    return request("GET", url, params=params, **kwargs)
+
+
+def get_pages(url: str, params: dict, pages=lambda data_json: data_json["result"]["pages"],
+              records=lambda data_json: data_json["result"]["data"], page_key: str = "pageNumber",
+              workers: int = page_workers, resume: bool = True) -> list:
+    """
+    分页接口: 先取第一页得到总页数, 剩下的页并发抓取, 所有记录按页顺序放在一个列表中返回,
+    调用方最后一次性生成 DataFrame, 不再逐页 pd.concat.
+    已完成的页记录在检查点日志中, 中途失败或进程中断后重新调用时只抓取没有完成的页;
+    失败的页在其他页完成后再重试一次, 仍然失败时抛出异常.
+    :param url: 请求地址
+    :type url: str
+    :param params: 请求参数, 不会被修改
+    :type params: dict
+    :param pages: 从第一页的 json 取总页数的函数, 默认 data_json["result"]["pages"]
+    :type pages: function
+    :param records: 从每页的 json 取记录列表的函数, 默认 data_json["result"]["data"]
+    :type records: function
+    :param page_key: 页码参数名
+    :type page_key: str
+    :param workers: 同时抓取的页数
+    :type workers: int
+    :param resume: 是否使用检查点日志
+    :type resume: bool
+    :return: 所有页的记录
+    :rtype: list
+    """
+    journal = cp.Journal(cp.journal_key(url, params, page_key)) if resume else None
+    done = journal.load() if journal is not None else {}
+
+    def _page(page):
+        _params = dict(params)
+        _params[page_key] = page
+        data_json = get(url, params=_params).json()
+        page_records = records(data_json) or []
+        if journal is not None:
+            journal.add(page, page_records)
+        done[page] = page_records
+        return data_json
+
+    def _try_page(page):
+        try:
+            _page(page)
+            return None
+        except Exception as e:
+            return page, e
+
+    if "pages" in done:
+        total_page = done["pages"]
+    else:
+        total_page = int(pages(_page(1)) or 0)
+        if journal is not None:
+            journal.add("pages", total_page)
+    todo = [page for page in range(2, total_page + 1) if page not in done]
+    if todo:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(todo))) as executor:
+            failed = [item for item in executor.map(_try_page, todo) if item is not None]
+        # 失败的页放到最后逐页重试一次。
+        for attempt, (page, e) in enumerate(failed):
+            logging.info(f"http_client.get_pages：{url}第{page}页重试，{e}")
+            time.sleep(backoff_delay(min(attempt, retries)))
+            _page(page)
+    result = [item for page in range(1, max(total_page, 1) + 1) for item in done.get(page, [])]
+    if journal is not None:
+        journal.clear()
+    return result
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/18
+Desc: 东方财富网 K 线和分时接口返回数据的解析
+klines / trends 是逗号分隔的字符串列表, 拼成一个文本缓冲区后用 pandas 的 C 语言 CSV 解析器
+一次转换成有类型的列, 不再逐行 split 生成 object 类型的 DataFrame 后逐列 pd.to_numeric.
+股票、ETF 的日线和分钟线接口共用.
+"""
+import io
+
+import pandas as pd
+
+# 日线和分钟K线 klines 的字段
+KLINE_COLUMNS = [
+    "日期",
+    "开盘",
+    "收盘",
+    "最高",
+    "最低",
+    "成交量",
+    "成交额",
+    "振幅",
+    "涨跌幅",
+    "涨跌额",
+    "换手率",
+]
+
+# 分时 trends 的字段
+TREND_COLUMNS = [
+    "时间",
+    "开盘",
+    "收盘",
+    "最高",
+    "最低",
+    "成交量",
+    "成交额",
+    "最新价",
+]
+
+
+def kline_frame(lines: list, columns: list = KLINE_COLUMNS) -> pd.DataFrame:
+    """
+    解析 klines / trends, 第一列(日期或时间)保持字符串, 其他列为数值, 整数列为 int64,
+    其他为 float64, 和逐列 pd.to_numeric 的结果相同, "-" 解析为 NaN
+    :param lines: 逗号分隔的字符串列表
+    :type lines: list
+    :param columns: 列名
+    :type columns: list
+    :return: 解析后的数据
+    :rtype: pandas.DataFrame
+    """
+    if not lines:
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(
+        io.StringIO("\n".join(lines)),
+        header=None,
+        names=columns,
+        dtype={columns[0]: str},
+        na_values=["-"],
+        keep_default_na=False,
+        engine="c",
+    )
+
+
+def minute_frame(lines: list, columns: list, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    解析分钟线, 按 [start_date, end_date] 截取, 时间列统一为 "YYYY-MM-DD HH:MM:SS" 格式
+    :param lines: 逗号分隔的字符串列表
+    :type lines: list
+    :param columns: 列名, 第一列为时间
+    :type columns: list
+    :param start_date: 开始时间
+    :type start_date: str
+    :param end_date: 结束时间
+    :type end_date: str
+    :return: 解析后的数据
+    :rtype: pandas.DataFrame
+    """
+    temp_df = kline_frame(lines, columns)
+    temp_df.index = pd.to_datetime(temp_df[columns[0]])
+    temp_df = temp_df[start_date:end_date].copy()
+    temp_df[columns[0]] = temp_df.index.astype(str)
+    temp_df.reset_index(drop=True, inplace=True)
+    return temp_df
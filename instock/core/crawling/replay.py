@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/18
+Desc: 抓取请求的录制和回放
+录制: 真实请求的响应按 (请求方法, 地址, 排序后的参数) 保存到归档目录, 每个响应一个文件, 多个进程可以同时录制.
+回放: 不访问网络, 从归档目录返回录制的响应, 每次请求按设置的延时等待, 没有录制的请求返回 404.
+不用连接东方财富、新浪, 就可以在离线的机器上重复运行每日任务, 比较性能.
+使用环境变量 crawl_record 或 crawl_replay 指定归档目录, crawl_replay_latency 指定回放延时(秒).
+录制和回放时本地缓存(接口结果缓存、断点日志、历史行情存储)都使用临时目录, 录制时不会因为命中缓存漏掉请求,
+回放时不会读到本机的缓存. 回放时时钟固定为开始录制的时间, 每次回放的运行日期都相同.
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import types
+import datetime
+import tempfile
+import importlib.machinery
+import hashlib
+import http.client
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# 不参与匹配的参数, 例如防缓存的时间戳
+ignore_params = ("_",)
+# 保存的响应头, 响应内容保存的是解压后的, 不保存 Content-Encoding
+keep_headers = ("Content-Type",)
+# 录制开始时间保存在归档目录的这个文件中
+clock_file = "clock.json"
+
+# 使用环境变量配置,docker -e 传递
+record_path = os.environ.get('crawl_record')  # 录制响应的目录
+replay_path = os.environ.get('crawl_replay')  # 回放响应的目录
+
+
+def cache_root(default: str) -> str:
+    """
+    本地缓存的根目录, 录制或回放时使用临时目录, 主进程创建后通过环境变量 crawl_replay_cache 传给子进程
+    :param default: 正常运行时的目录
+    :type default: str
+    :return: 目录
+    :rtype: str
+    """
+    if not (record_path or replay_path):
+        return default
+    path = os.environ.get('crawl_replay_cache')
+    if not path:
+        path = tempfile.mkdtemp(prefix="instock_replay_")
+        os.environ['crawl_replay_cache'] = path
+        logging.info(f"replay：本地缓存使用临时目录{path}")
+    return path
+
+
+_real_datetime = datetime.datetime
+_real_date = datetime.date
+_frozen_now = None
+
+
+class _FrozenMeta(type):
+    # 真实的 datetime、date 对象也是替换后的类的实例
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, cls.__bases__[0])
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, cls.__bases__[0])
+
+
+class _FrozenDatetime(_real_datetime, metaclass=_FrozenMeta):
+    __slots__ = ()
+
+    @classmethod
+    def now(cls, tz=None):
+        return _frozen_now if tz is None else _frozen_now.astimezone(tz)
+
+    @classmethod
+    def today(cls):
+        return _frozen_now
+
+
+class _FrozenDate(_real_date, metaclass=_FrozenMeta):
+    __slots__ = ()
+
+    @classmethod
+    def today(cls):
+        return _frozen_now.date()
+
+
+# instock 模块看到的 datetime 模块, 只替换 datetime、date 两个类.
+# 不修改标准库的 datetime 模块, pandas 等扩展模块导入时要求是原来的类.
+_frozen_module = types.ModuleType("datetime")
+_frozen_module.__dict__.update(datetime.__dict__)
+_frozen_module.datetime = _FrozenDatetime
+_frozen_module.date = _FrozenDate
+
+
+def _freeze_module(module):
+    if getattr(module, "datetime", None) is datetime:
+        module.datetime = _frozen_module
+    elif getattr(module, "datetime", None) is _real_datetime:
+        module.datetime = _FrozenDatetime
+    if getattr(module, "date", None) is _real_date:
+        module.date = _FrozenDate
+
+
+# instock 包的目录, 作业脚本也在这个目录下, 按模块名导入
+_instock_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _is_instock(file_path) -> bool:
+    return bool(file_path) and os.path.abspath(file_path).startswith(_instock_path + os.sep) \
+        and os.path.abspath(file_path) != os.path.abspath(__file__)
+
+
+class _FrozenClockFinder:
+    """
+    之后导入的 instock 模块执行完后同样替换模块中的 datetime
+    """
+
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is None or not _is_instock(spec.origin) or not hasattr(spec.loader, "exec_module"):
+            return None
+        exec_module = spec.loader.exec_module
+
+        def _exec_module(module):
+            exec_module(module)
+            _freeze_module(module)
+
+        spec.loader.exec_module = _exec_module
+        return spec
+
+
+def freeze_clock(now: datetime.datetime):
+    """
+    固定 instock 模块中 datetime.datetime.now()、datetime.date.today() 返回的时间, time.time() 不变
+    :param now: 固定的时间
+    :type now: datetime.datetime
+    """
+    global _frozen_now
+    first = _frozen_now is None
+    _frozen_now = _real_datetime(now.year, now.month, now.day, now.hour, now.minute, now.second, now.microsecond)
+    if not first:
+        return
+    for module in list(sys.modules.values()):
+        if module is not None and _is_instock(getattr(module, "__file__", None)):
+            _freeze_module(module)
+    sys.meta_path.insert(0, _FrozenClockFinder)
+
+
+class Archive:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pkl")
+
+    def save(self, method: str, url: str, status: int, headers: dict, body: bytes):
+        file_path = self._file(request_key(method, url))
+        tmp_file = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump({"method": method, "url": url, "status": status, "headers": headers, "body": body},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, file_path)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def load(self, method: str, url: str):
+        file_path = self._file(request_key(method, url))
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, "rb") as f:
+            return pickle.load(f)
+
+    def mark_recorded(self):
+        """
+        第一次录制时保存开始录制的时间, 继续录制到同一个目录时不修改
+        """
+        file_path = os.path.join(self.path, clock_file)
+        if os.path.isfile(file_path):
+            return
+        with open(file_path, "w") as f:
+            json.dump({"now": _real_datetime.now().isoformat()}, f)
+
+    def recorded_at(self) -> datetime.datetime:
+        """
+        开始录制的时间, 没有记录时使用最早的响应文件的修改时间
+        """
+        file_path = os.path.join(self.path, clock_file)
+        if os.path.isfile(file_path):
+            with open(file_path) as f:
+                return _real_datetime.fromisoformat(json.load(f)["now"])
+        mtimes = [os.path.getmtime(os.path.join(self.path, file_name))
+                  for file_name in os.listdir(self.path) if file_name.endswith(".pkl")]
+        return _real_datetime.fromtimestamp(min(mtimes)) if mtimes else None
+
+    def __len__(self):
+        return sum(1 for file_name in os.listdir(self.path) if file_name.endswith(".pkl"))
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"recorded": 0, "hits": 0, "misses": 0}
+
+    def add(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+
+stats = _Stats()
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    正常发送请求, 同时把响应保存到归档
+    """
+
+    def __init__(self, archive: Archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+        try:
+            archive.mark_recorded()
+        except Exception as e:
+            logging.error(f"replay.RecordingAdapter处理异常：{e}")
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        try:
+            headers = {k: response.headers[k] for k in keep_headers if k in response.headers}
+            self.archive.save(request.method, request.url, response.status_code, headers, response.content)
+            stats.add("recorded")
+        except Exception as e:
+            logging.error(f"replay.RecordingAdapter.send处理异常：{e}")
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    从归档返回响应, 不访问网络
+    """
+
+    def __init__(self, archive: Archive, latency: float = 0.0):
+        super().__init__()
+        self.archive = archive
+        self.latency = latency
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        entry = self.archive.load(request.method, request.url)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.connection = self
+        if entry is None:
+            stats.add("misses")
+            logging.info(f"replay.ReplayAdapter：没有录制的请求{request.method} {request.url}")
+            response.status_code = 404
+            response.reason = "Not Recorded"
+            response.headers = CaseInsensitiveDict()
+            response._content = b""
+            return response
+        stats.add("hits")
+        response.status_code = entry["status"]
+        response.reason = http.client.responses.get(entry["status"], "")
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = entry["body"]
+        return response
+
+    def close(self):
+        pass
+
+
+def install(session: requests.Session, record: str = None, replay: str = None, latency: float = 0.0,
+            **adapter_kwargs) -> requests.Session:
+    """
+    在 session 上挂载录制或回放的适配器, 两个都没有指定时不做修改. 回放时同时固定时钟
+    :param session: requests.Session
+    :type session: requests.Session
+    :param record: 录制的归档目录
+    :type record: str
+    :param replay: 回放的归档目录
+    :type replay: str
+    :param latency: 回放时每次请求的延时秒数
+    :type latency: float
+    :return: session
+    :rtype: requests.Session
+    """
+    if replay:
+        archive = Archive(replay)
+        recorded_at = archive.recorded_at()
+        if recorded_at is not None:
+            freeze_clock(recorded_at)
+        adapter = ReplayAdapter(archive, latency)
+    elif record:
+        adapter = RecordingAdapter(Archive(record), **adapter_kwargs)
+    else:
+        return session
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
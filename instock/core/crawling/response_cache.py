@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/18
+Desc: 变化很慢的基础数据接口(代码和市场标识映射、交易日历)的结果缓存
+结果保存在 instock/cache/crawl 下, 按接口设置有效期, 多个进程共用,
+任务启动时不用每次都重新请求和解密. 过期后重新请求, 请求失败时使用过期的缓存.
+"""
+import os
+import time
+import pickle
+import logging
+import threading
+import functools
+
+import instock.core.crawling.replay as rp
+
+cpath_current = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+cache_path = os.path.join(rp.cache_root(os.path.join(cpath_current, 'cache')), 'crawl')
+
+DAY = 24 * 3600
+WEEK = 7 * DAY
+# 映射中查不到时强制刷新的最小间隔秒数, 避免无效代码反复请求
+REFRESH_INTERVAL = 300
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return empty
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+def _write(file_path: str, value):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_file = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, file_path)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def _read(file_path: str):
+    with open(file_path, "rb") as f:
+        return pickle.load(f)
+
+
+def ttl_cache(ttl: float, name: str = None):
+    """
+    接口结果缓存装饰器, 参数不同的调用分别缓存, 空结果不缓存
+    :param ttl: 有效期秒数
+    :type ttl: float
+    :param name: 缓存文件名, 默认函数名
+    :type name: str
+    """
+    def decorator(func):
+        _name = name if name is not None else func.__name__.lstrip("_")
+        memory = {}
+        lock = threading.Lock()
+
+        def call(args, kwargs, refresh_interval=None):
+            key = "_".join([_name] + [str(arg) for arg in args] + [f"{k}-{v}" for k, v in sorted(kwargs.items())])
+            file_path = os.path.join(cache_path, f"{key}.pkl")
+            with lock:
+                now = time.time()
+                cached = memory.get(key)
+                if refresh_interval is None:
+                    if cached is not None and cached[1] > now:
+                        return cached[0]
+                elif cached is not None and cached[1] - ttl + refresh_interval > now:
+                    # 刚刚请求过, 不重复请求
+                    return cached[0]
+                stale = None
+                try:
+                    if refresh_interval is not None:
+                        # 强制刷新, 其他进程刚刷新过时直接用文件, 否则本地缓存只作为请求失败时的备用
+                        stale = None if cached is None else cached[0]
+                        if os.path.isfile(file_path):
+                            fetched = os.path.getmtime(file_path)
+                            if fetched + refresh_interval > now:
+                                value = _read(file_path)
+                                memory[key] = (value, fetched + ttl)
+                                return value
+                            if stale is None:
+                                stale = _read(file_path)
+                    elif os.path.isfile(file_path):
+                        expires = os.path.getmtime(file_path) + ttl
+                        value = _read(file_path)
+                        if expires > now:
+                            memory[key] = (value, expires)
+                            return value
+                        stale = value
+                except Exception as e:
+                    logging.error(f"response_cache.{_name}读取缓存异常：{e}")
+
+                try:
+                    value = func(*args, **kwargs)
+                except Exception as e:
+                    if stale is None:
+                        raise
+                    logging.error(f"response_cache.{_name}请求异常，使用过期缓存：{e}")
+                    return stale
+                if _is_empty(value):
+                    return value if stale is None else stale
+                try:
+                    _write(file_path, value)
+                except Exception as e:
+                    logging.error(f"response_cache.{_name}保存缓存异常：{e}")
+                memory[key] = (value, now + ttl)
+                return value
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return call(args, kwargs)
+
+        def refresh(*args, **kwargs):
+            """
+            忽略有效期重新请求并更新缓存, 距上次请求不足 REFRESH_INTERVAL 秒时直接返回缓存
+            """
+            return call(args, kwargs, REFRESH_INTERVAL)
+
+        def cache_clear():
+            with lock:
+                memory.clear()
+                for file_name in os.listdir(cache_path) if os.path.isdir(cache_path) else []:
+                    if file_name.startswith(_name) and file_name.endswith(".pkl"):
+                        os.remove(os.path.join(cache_path, file_name))
+
+        wrapper.refresh = refresh
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+def lookup(cached_func, key):
+    """
+    在缓存的映射中取 key 对应的值, 查不到时(例如当天新上市的股票、ETF)重新请求一次映射
+    :param cached_func: ttl_cache 装饰的无参映射接口
+    :param key: 键
+    :return: 值, 刷新后仍然没有时抛出 KeyError
+    """
+    mapping = cached_func()
+    if key not in mapping:
+        mapping = cached_func.refresh()
+    return mapping[key]
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/18
+Desc: 东方财富网实时行情列表(clist)返回数据的解析
+按字段表把 diff 中的接口字段(f2、f3...)直接转换成有类型的列: 数值列作为一个二维块一次转换成 float64,
+日期列按 YYYYMMDD 解析, 不再先改列名、调整顺序后逐列 pd.to_numeric.
+"""
+import numpy as np
+import pandas as pd
+
+
+def spot_frame(records: list, fields: dict) -> pd.DataFrame:
+    """
+    解析实时行情
+    :param records: 接口返回的 data.diff
+    :type records: list
+    :param fields: {接口字段: (列名, 类型)}, 类型为 numeric、datetime 或 string, 按输出列的顺序
+    :type fields: dict
+    :return: 实时行情, "-" 等非数值转换为 NaN, 日期不合法的为 NaT
+    :rtype: pandas.DataFrame
+    """
+    temp_df = pd.DataFrame.from_records(records, columns=list(fields))
+    numeric = [k for k, (_, kind) in fields.items() if kind == "numeric"]
+    block = temp_df[numeric].to_numpy(dtype=object)
+    try:
+        values = np.where(block == "-", np.nan, block).astype(np.float64)
+    except (TypeError, ValueError):
+        values = temp_df[numeric].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    numeric_index = {k: i for i, k in enumerate(numeric)}
+
+    data = {}
+    for k, (column, kind) in fields.items():
+        if kind == "numeric":
+            data[column] = values[:, numeric_index[k]]
+        elif kind == "datetime":
+            data[column] = pd.to_datetime(temp_df[k], format="%Y%m%d", errors="coerce")
+        else:
+            data[column] = temp_df[k]
+    return pd.DataFrame(data, index=temp_df.index)
@@ -4,19 +4,69 @@
 Date: 2022/6/19 15:26
 Desc: 东方财富网-行情首页-沪深京 A 股
 """
-import requests
+import instock.core.crawling.http_client as hc
+import instock.core.crawling.response_cache as rc
+import instock.core.crawling.kline_parser as kp
+import instock.core.crawling.spot_parser as sp
 import pandas as pd
 
-from functools import lru_cache
 
+# 实时行情的接口字段: (列名, 类型), 按输出列的顺序
+SPOT_FIELDS = {
+    "f12": ("代码", "string"),
+    "f14": ("名称", "string"),
+    "f2": ("最新价", "numeric"),
+    "f3": ("涨跌幅", "numeric"),
+    "f4": ("涨跌额", "numeric"),
+    "f5": ("成交量", "numeric"),
+    "f6": ("成交额", "numeric"),
+    "f7": ("振幅", "numeric"),
+    "f8": ("换手率", "numeric"),
+    "f10": ("量比", "numeric"),
+    "f17": ("今开", "numeric"),
+    "f15": ("最高", "numeric"),
+    "f16": ("最低", "numeric"),
+    "f18": ("昨收", "numeric"),
+    "f22": ("涨速", "numeric"),
+    "f11": ("5分钟涨跌", "numeric"),
+    "f24": ("60日涨跌幅", "numeric"),
+    "f25": ("年初至今涨跌幅", "numeric"),
+    "f9": ("市盈率动", "numeric"),
+    "f115": ("市盈率TTM", "numeric"),
+    "f114": ("市盈率静", "numeric"),
+    "f23": ("市净率", "numeric"),
+    "f112": ("每股收益", "numeric"),
+    "f113": ("每股净资产", "numeric"),
+    "f61": ("每股公积金", "numeric"),
+    "f48": ("每股未分配利润", "numeric"),
+    "f37": ("加权净资产收益率", "numeric"),
+    "f49": ("毛利率", "numeric"),
+    "f57": ("资产负债率", "numeric"),
+    "f40": ("营业收入", "numeric"),
+    "f41": ("营业收入同比增长", "numeric"),
+    "f45": ("归属净利润", "numeric"),
+    "f46": ("归属净利润同比增长", "numeric"),
+    "f221": ("报告期", "datetime"),
+    "f38": ("总股本", "numeric"),
+    "f39": ("已流通股份", "numeric"),
+    "f20": ("总市值", "numeric"),
+    "f21": ("流通市值", "numeric"),
+    "f100": ("所处行业", "string"),
+    "f26": ("上市时间", "datetime"),
+}
 
-def stock_zh_a_spot_em() -> pd.DataFrame:
+
+def stock_zh_a_spot_em(fields: dict = None) -> pd.DataFrame:
     """
     东方财富网-沪深京 A 股-实时行情
     https://quote.eastmoney.com/center/gridlist.html#hs_a_board
+    :param fields: {接口字段: (列名, 类型)}, 只请求这些字段, 默认 SPOT_FIELDS
+    :type fields: dict
     :return: 实时行情
     :rtype: pandas.DataFrame
     """
+    if fields is None:
+        fields = SPOT_FIELDS
     url = "http://82.push2.eastmoney.com/api/qt/clist/get"
     params = {
         "pn": "1",
@@ -28,142 +78,17 @@ def stock_zh_a_spot_em() -> pd.DataFrame:
         "invt": "2",
         "fid": "f3",
         "fs": "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048",
-        "fields": "f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f14,f15,f16,f17,f18,f20,f21,f22,f23,f24,f25,f26,f37,f38,f39,f40,f41,f45,f46,f48,f49,f57,f61,f100,f112,f113,f114,f115,f221",
+        "fields": ",".join(fields),
         "_": "1623833739532",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
     if not data_json["data"]["diff"]:
         return pd.DataFrame()
-    temp_df = pd.DataFrame(data_json["data"]["diff"])
-    temp_df.columns = [
-        "最新价",
-        "涨跌幅",
-        "涨跌额",
-        "成交量",
-        "成交额",
-        "振幅",
-        "换手率",
-        "市盈率动",
-        "量比",
-        "5分钟涨跌",
-        "代码",
-        "名称",
-        "最高",
-        "最低",
-        "今开",
-        "昨收",
-        "总市值",
-        "流通市值",
-        "涨速",
-        "市净率",
-        "60日涨跌幅",
-        "年初至今涨跌幅",
-        "上市时间",
-        "加权净资产收益率",
-        "总股本",
-        "已流通股份",
-        "营业收入",
-        "营业收入同比增长",
-        "归属净利润",
-        "归属净利润同比增长",
-        "每股未分配利润",
-        "毛利率",
-        "资产负债率",
-        "每股公积金",
-        "所处行业",
-        "每股收益",
-        "每股净资产",
-        "市盈率静",
-        "市盈率TTM",
-        "报告期"
-    ]
-    temp_df = temp_df[
-        [
-            "代码",
-            "名称",
-            "最新价",
-            "涨跌幅",
-            "涨跌额",
-            "成交量",
-            "成交额",
-            "振幅",
-            "换手率",
-            "量比",
-            "今开",
-            "最高",
-            "最低",
-            "昨收",
-            "涨速",
-            "5分钟涨跌",
-            "60日涨跌幅",
-            "年初至今涨跌幅",
-            "市盈率动",
-            "市盈率TTM",
-            "市盈率静",
-            "市净率",
-            "每股收益",
-            "每股净资产",
-            "每股公积金",
-            "每股未分配利润",
-            "加权净资产收益率",
-            "毛利率",
-            "资产负债率",
-            "营业收入",
-            "营业收入同比增长",
-            "归属净利润",
-            "归属净利润同比增长",
-            "报告期",
-            "总股本",
-            "已流通股份",
-            "总市值",
-            "流通市值",
-            "所处行业",
-            "上市时间"
-        ]
-    ]
-    temp_df["最新价"] = pd.to_numeric(temp_df["最新价"], errors="coerce")
-    temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"], errors="coerce")
-    temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"], errors="coerce")
-    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"], errors="coerce")
-    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"], errors="coerce")
-    temp_df["振幅"] = pd.to_numeric(temp_df["振幅"], errors="coerce")
-    temp_df["量比"] = pd.to_numeric(temp_df["量比"], errors="coerce")
-    temp_df["换手率"] = pd.to_numeric(temp_df["换手率"], errors="coerce")
-    temp_df["最高"] = pd.to_numeric(temp_df["最高"], errors="coerce")
-    temp_df["最低"] = pd.to_numeric(temp_df["最低"], errors="coerce")
-    temp_df["今开"] = pd.to_numeric(temp_df["今开"], errors="coerce")
-    temp_df["昨收"] = pd.to_numeric(temp_df["昨收"], errors="coerce")
-    temp_df["涨速"] = pd.to_numeric(temp_df["涨速"], errors="coerce")
-    temp_df["5分钟涨跌"] = pd.to_numeric(temp_df["5分钟涨跌"], errors="coerce")
-    temp_df["60日涨跌幅"] = pd.to_numeric(temp_df["60日涨跌幅"], errors="coerce")
-    temp_df["年初至今涨跌幅"] = pd.to_numeric(temp_df["年初至今涨跌幅"], errors="coerce")
-    temp_df["市盈率动"] = pd.to_numeric(temp_df["市盈率动"], errors="coerce")
-    temp_df["市盈率TTM"] = pd.to_numeric(temp_df["市盈率TTM"], errors="coerce")
-    temp_df["市盈率静"] = pd.to_numeric(temp_df["市盈率静"], errors="coerce")
-    temp_df["市净率"] = pd.to_numeric(temp_df["市净率"], errors="coerce")
-    temp_df["每股收益"] = pd.to_numeric(temp_df["每股收益"], errors="coerce")
-    temp_df["每股净资产"] = pd.to_numeric(temp_df["每股净资产"], errors="coerce")
-    temp_df["每股公积金"] = pd.to_numeric(temp_df["每股公积金"], errors="coerce")
-    temp_df["每股未分配利润"] = pd.to_numeric(temp_df["每股未分配利润"], errors="coerce")
-    temp_df["加权净资产收益率"] = pd.to_numeric(temp_df["加权净资产收益率"], errors="coerce")
-    temp_df["毛利率"] = pd.to_numeric(temp_df["毛利率"], errors="coerce")
-    temp_df["资产负债率"] = pd.to_numeric(temp_df["资产负债率"], errors="coerce")
-    temp_df["营业收入"] = pd.to_numeric(temp_df["营业收入"], errors="coerce")
-    temp_df["营业收入同比增长"] = pd.to_numeric(temp_df["营业收入同比增长"], errors="coerce")
-    temp_df["归属净利润"] = pd.to_numeric(temp_df["归属净利润"], errors="coerce")
-    temp_df["归属净利润同比增长"] = pd.to_numeric(temp_df["归属净利润同比增长"], errors="coerce")
-    temp_df["报告期"] = pd.to_datetime(temp_df["报告期"], format='%Y%m%d', errors="coerce")
-    temp_df["总股本"] = pd.to_numeric(temp_df["总股本"], errors="coerce")
-    temp_df["已流通股份"] = pd.to_numeric(temp_df["已流通股份"], errors="coerce")
-    temp_df["总市值"] = pd.to_numeric(temp_df["总市值"], errors="coerce")
-    temp_df["流通市值"] = pd.to_numeric(temp_df["流通市值"], errors="coerce")
-    temp_df["上市时间"] = pd.to_datetime(temp_df["上市时间"], format='%Y%m%d', errors="coerce")
-
-    return temp_df
+    return sp.spot_frame(data_json["data"]["diff"], fields)
 
 
-@lru_cache()
+@rc.ttl_cache(rc.DAY)
 def code_id_map_em() -> dict:
     """
     东方财富-股票和市场代码
@@ -185,7 +110,7 @@ def code_id_map_em() -> dict:
         "fields": "f12",
         "_": "1623833739532",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
     if not data_json["data"]["diff"]:
         return dict()
@@ -206,7 +131,7 @@ def code_id_map_em() -> dict:
         "fields": "f12",
         "_": "1623833739532",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
     if not data_json["data"]["diff"]:
         return dict()
@@ -226,7 +151,7 @@ def code_id_map_em() -> dict:
         "fields": "f12",
         "_": "1623833739532",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
     if not data_json["data"]["diff"]:
         return dict()
@@ -259,7 +184,27 @@ def stock_zh_a_hist(
     :return: 每日行情
     :rtype: pandas.DataFrame
     """
-    code_id_dict = code_id_map_em()
+    url, params = stock_zh_a_hist_request(symbol, period, start_date, end_date, adjust)
+    r = hc.get(url, params=params)
+    temp_df = stock_zh_a_hist_parse(r.json())
+    if temp_df.empty:
+        hc.empty_response(url)
+    return temp_df
+
+
+def stock_zh_a_hist_request(
+    symbol: str = "000001",
+    period: str = "daily",
+    start_date: str = "19700101",
+    end_date: str = "20500101",
+    adjust: str = "",
+) -> tuple:
+    """
+    东方财富网-行情首页-沪深京 A 股-每日行情的请求地址和参数, 参数同 stock_zh_a_hist
+    :return: (url, params)
+    :rtype: tuple
+    """
+    market_id = rc.lookup(code_id_map_em, symbol)
     adjust_dict = {"qfq": "1", "hfq": "2", "": "0"}
     period_dict = {"daily": "101", "weekly": "102", "monthly": "103"}
     url = "http://push2his.eastmoney.com/api/qt/stock/kline/get"
@@ -269,46 +214,25 @@ def stock_zh_a_hist(
         "ut": "7eea3edcaed734bea9cbfc24409ed989",
         "klt": period_dict[period],
         "fqt": adjust_dict[adjust],
-        "secid": f"{code_id_dict[symbol]}.{symbol}",
+        "secid": f"{market_id}.{symbol}",
         "beg": start_date,
         "end": end_date,
         "_": "1623766962675",
     }
-    r = requests.get(url, params=params)
-    data_json = r.json()
-    if not (data_json["data"] and data_json["data"]["klines"]):
-        return pd.DataFrame()
-    temp_df = pd.DataFrame(
-        [item.split(",") for item in data_json["data"]["klines"]]
-    )
-    temp_df.columns = [
-        "日期",
-        "开盘",
-        "收盘",
-        "最高",
-        "最低",
-        "成交量",
-        "成交额",
-        "振幅",
-        "涨跌幅",
-        "涨跌额",
-        "换手率",
-    ]
-    temp_df.index = pd.to_datetime(temp_df["日期"])
-    temp_df.reset_index(inplace=True, drop=True)
+    return url, params
 
-    temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-    temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-    temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-    temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-    temp_df["振幅"] = pd.to_numeric(temp_df["振幅"])
-    temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"])
-    temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"])
-    temp_df["换手率"] = pd.to_numeric(temp_df["换手率"])
 
-    return temp_df
+def stock_zh_a_hist_parse(data_json: dict) -> pd.DataFrame:
+    """
+    东方财富网-行情首页-沪深京 A 股-每日行情的返回数据解析
+    :param data_json: 接口返回的 json
+    :type data_json: dict
+    :return: 每日行情
+    :rtype: pandas.DataFrame
+    """
+    if not (data_json["data"] and data_json["data"]["klines"]):
+        return pd.DataFrame()
+    return kp.kline_frame(data_json["data"]["klines"])
 
 
 def stock_zh_a_hist_min_em(
@@ -334,7 +258,51 @@ def stock_zh_a_hist_min_em(
     :return: 每日分时行情
     :rtype: pandas.DataFrame
     """
-    code_id_dict = code_id_map_em()
+    url, params = stock_zh_a_hist_min_request(symbol=symbol, period=period, adjust=adjust)
+    r = hc.get(url, params=params)
+    data_json = r.json()
+    if period == "1":
+        return kp.minute_frame(data_json["data"]["trends"], kp.TREND_COLUMNS, start_date, end_date)
+    else:
+        temp_df = kp.minute_frame(data_json["data"]["klines"], ["时间"] + kp.KLINE_COLUMNS[1:], start_date, end_date)
+        temp_df = temp_df[
+            [
+                "时间",
+                "开盘",
+                "收盘",
+                "最高",
+                "最低",
+                "涨跌幅",
+                "涨跌额",
+                "成交量",
+                "成交额",
+                "振幅",
+                "换手率",
+            ]
+        ]
+        return temp_df
+
+
+def stock_zh_a_hist_min_request(
+    symbol: str = "000001",
+    period: str = "1",
+    adjust: str = "",
+    ndays: int = 5,
+) -> tuple:
+    """
+    东方财富网-行情首页-沪深京 A 股-每日分时行情的请求地址和参数, 用于批量抓取
+    :param symbol: 股票代码
+    :type symbol: str
+    :param period: choice of {'1', '5', '15', '30', '60'}
+    :type period: str
+    :param adjust: choice of {'', 'qfq', 'hfq'}
+    :type adjust: str
+    :param ndays: 1分钟K线返回最近几个交易日, 最多5
+    :type ndays: int
+    :return: (url, params)
+    :rtype: tuple
+    """
+    market_id = rc.lookup(code_id_map_em, symbol)
     adjust_map = {
         "": "0",
         "qfq": "1",
@@ -346,38 +314,11 @@ def stock_zh_a_hist_min_em(
             "fields1": "f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f13",
             "fields2": "f51,f52,f53,f54,f55,f56,f57,f58",
             "ut": "7eea3edcaed734bea9cbfc24409ed989",
-            "ndays": "5",
+            "ndays": str(ndays),
             "iscr": "0",
-            "secid": f"{code_id_dict[symbol]}.{symbol}",
+            "secid": f"{market_id}.{symbol}",
             "_": "1623766962675",
         }
-        r = requests.get(url, params=params)
-        data_json = r.json()
-        temp_df = pd.DataFrame(
-            [item.split(",") for item in data_json["data"]["trends"]]
-        )
-        temp_df.columns = [
-            "时间",
-            "开盘",
-            "收盘",
-            "最高",
-            "最低",
-            "成交量",
-            "成交额",
-            "最新价",
-        ]
-        temp_df.index = pd.to_datetime(temp_df["时间"])
-        temp_df = temp_df[start_date:end_date]
-        temp_df.reset_index(drop=True, inplace=True)
-        temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-        temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-        temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-        temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-        temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-        temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-        temp_df["最新价"] = pd.to_numeric(temp_df["最新价"])
-        temp_df["时间"] = pd.to_datetime(temp_df["时间"]).astype(str)
-        return temp_df
     else:
         url = "http://push2his.eastmoney.com/api/qt/stock/kline/get"
         params = {
@@ -386,59 +327,28 @@ def stock_zh_a_hist_min_em(
             "ut": "7eea3edcaed734bea9cbfc24409ed989",
             "klt": period,
             "fqt": adjust_map[adjust],
-            "secid": f"{code_id_dict[symbol]}.{symbol}",
+            "secid": f"{market_id}.{symbol}",
             "beg": "0",
             "end": "20500000",
             "_": "1630930917857",
         }
-        r = requests.get(url, params=params)
-        data_json = r.json()
-        temp_df = pd.DataFrame(
-            [item.split(",") for item in data_json["data"]["klines"]]
-        )
-        temp_df.columns = [
-            "时间",
-            "开盘",
-            "收盘",
-            "最高",
-            "最低",
-            "成交量",
-            "成交额",
-            "振幅",
-            "涨跌幅",
-            "涨跌额",
-            "换手率",
-        ]
-        temp_df.index = pd.to_datetime(temp_df["时间"])
-        temp_df = temp_df[start_date:end_date]
-        temp_df.reset_index(drop=True, inplace=True)
-        temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-        temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-        temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-        temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-        temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-        temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-        temp_df["振幅"] = pd.to_numeric(temp_df["振幅"])
-        temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"])
-        temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"])
-        temp_df["换手率"] = pd.to_numeric(temp_df["换手率"])
-        temp_df["时间"] = pd.to_datetime(temp_df["时间"]).astype(str)
-        temp_df = temp_df[
-            [
-                "时间",
-                "开盘",
-                "收盘",
-                "最高",
-                "最低",
-                "涨跌幅",
-                "涨跌额",
-                "成交量",
-                "成交额",
-                "振幅",
-                "换手率",
-            ]
-        ]
-        return temp_df
+    return url, params
+
+
+def stock_zh_a_hist_min_parse(data_json: dict) -> pd.DataFrame:
+    """
+    东方财富网-行情首页-沪深京 A 股-每日分时行情的返回数据解析, 不截取时间
+    :param data_json: 接口返回的 json
+    :type data_json: dict
+    :return: 分时行情, 1分钟为分时(trends)的列, 其他周期为K线(klines)的列
+    :rtype: pandas.DataFrame
+    """
+    data = data_json["data"]
+    if not data:
+        return pd.DataFrame()
+    if "trends" in data:
+        return kp.kline_frame(data["trends"], kp.TREND_COLUMNS)
+    return kp.kline_frame(data.get("klines"), ["时间"] + kp.KLINE_COLUMNS[1:])
 
 
 def stock_zh_a_hist_pre_min_em(
@@ -458,7 +368,7 @@ def stock_zh_a_hist_pre_min_em(
     :return: 每日分时行情包含盘前数据
     :rtype: pandas.DataFrame
     """
-    code_id_dict = code_id_map_em()
+    market_id = rc.lookup(code_id_map_em, symbol)
     url = "https://push2.eastmoney.com/api/qt/stock/trends2/get"
     params = {
         "fields1": "f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f13",
@@ -467,38 +377,20 @@ def stock_zh_a_hist_pre_min_em(
         "ndays": "1",
         "iscr": "1",
         "iscca": "0",
-        "secid": f"{code_id_dict[symbol]}.{symbol}",
+        "secid": f"{market_id}.{symbol}",
         "_": "1623766962675",
     }
-    r = requests.get(url, params=params)
+    r = hc.get(url, params=params)
     data_json = r.json()
-    temp_df = pd.DataFrame(
-        [item.split(",") for item in data_json["data"]["trends"]]
-    )
-    temp_df.columns = [
-        "时间",
-        "开盘",
-        "收盘",
-        "最高",
-        "最低",
-        "成交量",
-        "成交额",
-        "最新价",
-    ]
+    temp_df = kp.kline_frame(data_json["data"]["trends"], kp.TREND_COLUMNS)
     temp_df.index = pd.to_datetime(temp_df["时间"])
     date_format = temp_df.index[0].date().isoformat()
     temp_df = temp_df[
         date_format + " " + start_time : date_format + " " + end_time
     ]
+    temp_df = temp_df.copy()
+    temp_df["时间"] = temp_df.index.astype(str)
     temp_df.reset_index(drop=True, inplace=True)
-    temp_df["开盘"] = pd.to_numeric(temp_df["开盘"])
-    temp_df["收盘"] = pd.to_numeric(temp_df["收盘"])
-    temp_df["最高"] = pd.to_numeric(temp_df["最高"])
-    temp_df["最低"] = pd.to_numeric(temp_df["最低"])
-    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"])
-    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"])
-    temp_df["最新价"] = pd.to_numeric(temp_df["最新价"])
-    temp_df["时间"] = pd.to_datetime(temp_df["时间"]).astype(str)
     return temp_df
 
 
@@ -8,7 +8,8 @@ https://finance.sina.com.cn/realstock/company/klc_td_sh.txt
 """
 import datetime
 import pandas as pd
-import requests
+import instock.core.crawling.http_client as hc
+import instock.core.crawling.response_cache as rc
 from py_mini_racer import MiniRacer
 
 hk_js_decode = """
@@ -302,6 +303,7 @@ function d(t) {
 """
 
 
+@rc.ttl_cache(rc.WEEK)
 def tool_trade_date_hist_sina() -> pd.DataFrame:
     """
     交易日历-历史数据
@@ -310,7 +312,7 @@ def tool_trade_date_hist_sina() -> pd.DataFrame:
     :rtype: pandas.DataFrame
     """
     url = "https://finance.sina.com.cn/realstock/company/klc_td_sh.txt"
-    r = requests.get(url)
+    r = hc.get(url)
     js_code = MiniRacer()
     js_code.eval(hk_js_decode)
     dict_list = js_code.call(
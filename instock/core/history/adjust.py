@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import logging
+import threading
+import numpy as np
+import pandas as pd
+import instock.core.history.store as hst
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 本地复权：历史行情存储只保存不复权K线，前复权/后复权在读取时计算。
+# 除权除息日从不复权K线本身识别：当天 收盘价-涨跌额 即交易所公布的除权参考价，和前一天收盘价不同就是除权除息日。
+# 分红配送数据（stock_fhps_em）里有每股派现和送转比例的，按
+#   前复权价 = (价格 - 每股派现) / (1 + 每股送转)
+# 计算，没有的按参考价和前收盘价的比例等比复权。后复权以第一根K线为基准。
+# 复权后的价格按品种的报价精度（decimals 位小数，股票 2 位）四舍五入。
+# 按参考价估算的除权除息日逐个记录日志并计数（fallback_stats），分红配送数据缺失时可以看到。
+# 分红配送数据按报告期抓取，历史报告期回补 report_periods 个，覆盖历史行情存储保存的3年。
+
+PRICE_FIELDS = ('open', 'close', 'high', 'low')
+factors_file = os.path.join(hst.store_path, 'factors.json')
+report_periods = 8  # 回补分红配送数据的报告期数
+
+# 使用环境变量配置,docker -e 传递
+_report_periods = os.environ.get('hist_bonus_periods')
+if _report_periods is not None:
+    report_periods = int(_report_periods)
+
+_stats_lock = threading.Lock()
+_stats = {'ex_dates': 0, 'estimated': 0}
+
+
+class BonusFactors:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.periods_path = os.path.splitext(file_path)[0] + '_periods.json'
+        self._lock = threading.RLock()
+        self._factors = None
+        self._periods = None
+
+    def _load(self):
+        with self._lock:
+            if self._factors is None:
+                factors = {}
+                try:
+                    if os.path.isfile(self.file_path):
+                        with open(self.file_path, 'r') as f:
+                            factors = json.load(f)
+                except Exception as e:
+                    logging.error(f"adjust.BonusFactors._load处理异常：{e}")
+                self._factors = factors
+            return self._factors
+
+    # 已经回补过的报告期。
+    def periods(self):
+        with self._lock:
+            if self._periods is None:
+                periods = []
+                try:
+                    if os.path.isfile(self.periods_path):
+                        with open(self.periods_path, 'r') as f:
+                            periods = json.load(f)
+                except Exception as e:
+                    logging.error(f"adjust.BonusFactors.periods处理异常：{e}")
+                self._periods = set(periods)
+            return set(self._periods)
+
+    # 股票的除权除息事件 {yyyymmdd: (每股派现, 每股送转)}。
+    def get(self, code):
+        events = self._load().get(code)
+        if not events:
+            return {}
+        return {int(day): tuple(event) for day, event in events.items()}
+
+    # 用分红配送数据（stockfetch.fetch_stocks_bonus 的结果）更新，返回有变化的股票代码。
+    # 传入 period 时记录这个报告期已经回补。
+    def update(self, data, period=None):
+        changed = set()
+        if data is None or len(data.index) == 0:
+            return changed
+        if period is not None:
+            self._add_period(period)
+        data = data.loc[pd.notna(data['ex_dividend_date'])]
+        if len(data.index) == 0:
+            return changed
+        cash = pd.to_numeric(data['bonusaward_rate'], errors='coerce').fillna(0.0).values / 10
+        ratio = pd.to_numeric(data['convertible_total_rate'], errors='coerce').fillna(0.0).values / 10
+        days = pd.to_datetime(data['ex_dividend_date']).dt.strftime('%Y%m%d').values
+        with self._lock:
+            factors = self._load()
+            for code, day, c, r in zip(data['code'].values, days, cash, ratio):
+                if c == 0 and r == 0:
+                    continue
+                events = factors.setdefault(code, {})
+                event = [round(float(c), 6), round(float(r), 6)]
+                if events.get(day) != event:
+                    events[day] = event
+                    changed.add(code)
+            if changed:
+                hst.atomic_write(self.file_path, lambda f: json.dump(factors, f), 'w')
+        return changed
+
+    def _add_period(self, period):
+        with self._lock:
+            periods = self.periods()
+            if period not in periods:
+                periods.add(period)
+                hst.atomic_write(self.periods_path, lambda f: json.dump(sorted(periods), f), 'w')
+                self._periods = periods
+
+
+_factors = BonusFactors(factors_file)
+
+
+def get_factors():
+    return _factors
+
+
+# 除权除息日总数和其中按参考价估算的个数。
+def fallback_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+# 场内基金的除息事件 {yyyymmdd: (每份派现, 0)}。分红配送数据（stock_fhps_em）只有A股，
+# 基金的现金分红从K线本身得到：前收盘价减去除息参考价（收盘价-涨跌额）即每份派现。
+# 参考价比前收盘价高或者低 30% 以上的是份额折算，不在这里返回，仍按参考价等比复权。
+def cash_events(data, decimals=3):
+    if data is None or len(data.index) < 2:
+        return {}
+    close = data['close'].to_numpy(dtype=np.float64)
+    ref_close = close[1:] - data['ups_downs'].to_numpy(dtype=np.float64)[1:]
+    cash = np.round(close[:-1] - ref_close, decimals)
+    hit = (cash > 0) & (cash < 0.3 * close[:-1]) & (ref_close > 0)
+    days = hst.frame_days(data)[1:][hit]
+    return {int(day): (float(c), 0.0) for day, c in zip(days, cash[hit])}
+
+
+# 不复权K线转成前复权(qfq)或后复权(hfq)，返回新的 DataFrame。
+# decimals 为价格的小数位数，和数据源的报价精度一致。code 用于记录按参考价估算的日志。
+def adjust_frame(data, adjust, events=None, decimals=2, code=None):
+    if data is None or adjust == '' or len(data.index) < 2:
+        return data
+    close = data['close'].to_numpy(dtype=np.float64)
+    ups_downs = data['ups_downs'].to_numpy(dtype=np.float64)
+    ref_close = close[1:] - ups_downs[1:]
+    # 参考价和前收盘价相差不到半个最小报价单位的是浮点误差。
+    ex_idx = np.nonzero((np.abs(close[:-1] - ref_close) >= 0.5 / 10 ** decimals) & (ref_close > 0))[0] + 1
+    if len(ex_idx) == 0:
+        return data
+
+    # 每个除权除息日的 (每股派现, 每股送转)，分红配送数据优先，没有的按参考价估算。
+    cash = np.zeros(len(ex_idx))
+    ratio = close[ex_idx - 1] / ref_close[ex_idx - 1] - 1
+    days = hst.frame_days(data)
+    estimated = []
+    for k, i in enumerate(ex_idx):
+        event = events.get(int(days[i])) if events else None
+        if event is None:
+            estimated.append(int(days[i]))
+        else:
+            cash[k], ratio[k] = event
+    with _stats_lock:
+        _stats['ex_dates'] += len(ex_idx)
+        _stats['estimated'] += len(estimated)
+    if estimated:
+        logging.info(f"adjust.adjust_frame：{code}代码除权除息日{estimated}没有分红配送数据，按参考价估算")
+
+    prices = data[list(PRICE_FIELDS)].to_numpy(dtype=np.float64, copy=True)
+    slope = 1.0
+    if adjust == 'qfq':
+        for k, i in enumerate(ex_idx):
+            prices[:i] = (prices[:i] - cash[k]) / (1 + ratio[k])
+            slope /= 1 + ratio[k]
+    elif adjust == 'hfq':
+        for k in range(len(ex_idx) - 1, -1, -1):
+            i = ex_idx[k]
+            prices[i:] = prices[i:] * (1 + ratio[k]) + cash[k]
+    else:
+        return data
+
+    data = data.copy()
+    prices = np.round(prices, decimals)
+    for j, field in enumerate(PRICE_FIELDS):
+        data[field] = prices[:, j]
+    adj_close = prices[:, 1]
+    pre_close = adj_close[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ups_downs = np.empty(len(adj_close))
+        ups_downs[0] = data['ups_downs'].values[0] * slope
+        ups_downs[1:] = adj_close[1:] - pre_close
+        quote_change = data['quote_change'].to_numpy(dtype=np.float64).copy()
+        quote_change[1:] = ups_downs[1:] / pre_close * 100
+        amplitude = data['amplitude'].to_numpy(dtype=np.float64).copy()
+        amplitude[1:] = (prices[1:, 2] - prices[1:, 3]) / pre_close * 100
+    data['ups_downs'] = np.round(ups_downs, decimals)
+    data['quote_change'] = np.round(quote_change, 2)
+    data['amplitude'] = np.round(amplitude, 2)
+    return data
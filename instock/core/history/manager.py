@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import shutil
+import logging
+import datetime
+import threading
+import instock.core.history.store as hst
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 历史行情缓存管理，替代每月 rm -rf cache/hist 的做法。
+# manifest.json 记录每个交易日分区的大小和最后访问时间，以及累计的命中统计。
+# 超过保存天数的分区先删除，总大小仍超过预算时按最近最少访问删除，
+# 最近 keep_days 天的分区始终保留，保证缓存不会整体变冷。
+
+max_bytes = 2 * 1024 ** 3  # 缓存大小预算
+max_days = 3 * 365  # 分区最多保存的自然日天数
+keep_days = 400  # 最近多少个自然日的分区不删除，需要大于历史数据的区间（365天）
+
+# 使用环境变量配置,docker -e 传递
+_max_bytes = os.environ.get('hist_cache_max_bytes')
+if _max_bytes is not None:
+    max_bytes = int(_max_bytes)
+_max_days = os.environ.get('hist_cache_max_days')
+if _max_days is not None:
+    max_days = int(_max_days)
+_keep_days = os.environ.get('hist_cache_keep_days')
+if _keep_days is not None:
+    keep_days = int(_keep_days)
+
+
+def _dir_bytes(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except Exception:
+                pass
+    return total
+
+
+class CacheManager:
+    def __init__(self, store, max_bytes=max_bytes, max_days=max_days, keep_days=keep_days):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_days = max_days
+        self.keep_days = keep_days
+        self.manifest_file = os.path.join(store.root, 'manifest.json')
+        self._lock = threading.Lock()
+
+    def load_manifest(self):
+        manifest = {'partitions': {}, 'stats': {}}
+        try:
+            if os.path.isfile(self.manifest_file):
+                with open(self.manifest_file, 'r') as f:
+                    manifest.update(json.load(f))
+        except Exception as e:
+            logging.error(f"manager.CacheManager.load_manifest处理异常：{e}")
+        return manifest
+
+    def _save_manifest(self, manifest):
+        hst.atomic_write(self.manifest_file, lambda f: json.dump(manifest, f), 'w')
+
+    # 把本进程的访问时间、命中统计和分区大小写入 manifest，多个进程都会写，加存储锁。
+    def flush(self):
+        with self.store.locked(), self._lock:
+            access, stats = self.store.drain_usage()
+            manifest = self.load_manifest()
+            old_parts = manifest['partitions']
+            parts = {}
+            now = time.time()
+            for day in self.store.partitions():
+                entry = old_parts.get(day, {'access': now})
+                entry['bytes'] = _dir_bytes(self.store.partition_dir(day))
+                if day in access:
+                    entry['access'] = max(entry.get('access', 0), access[day])
+                parts[day] = entry
+            manifest['partitions'] = parts
+            total = manifest['stats']
+            for key, n in stats.items():
+                total[key] = total.get(key, 0) + n
+            total.setdefault('since', datetime.datetime.now().strftime("%Y-%m-%d"))
+            self._save_manifest(manifest)
+            return manifest
+
+    # 按保存天数和大小预算删除交易日分区，返回删除的分区。
+    def evict(self):
+        with self.store.locked():
+            manifest = self.flush()
+            with self._lock:
+                parts = manifest['partitions']
+                today = datetime.date.today()
+                expire = (today - datetime.timedelta(days=self.max_days)).strftime("%Y%m%d")
+                protect = (today - datetime.timedelta(days=self.keep_days)).strftime("%Y%m%d")
+
+                evicted = [day for day in parts if day < expire]
+                total = sum(entry['bytes'] for day, entry in parts.items() if day not in evicted)
+                if total > self.max_bytes:
+                    # 最近最少访问的先删除，访问时间相同时先删日期早的。
+                    candidates = sorted((entry['access'], day) for day, entry in parts.items()
+                                        if day not in evicted and day < protect)
+                    for access, day in candidates:
+                        if total <= self.max_bytes:
+                            break
+                        evicted.append(day)
+                        total -= parts[day]['bytes']
+                    if total > self.max_bytes:
+                        logging.info(f"manager.CacheManager.evict：最近{self.keep_days}天的缓存超过预算{self.max_bytes}字节")
+
+                if evicted:
+                    self.store.remove_partitions(evicted)
+                    for day in evicted:
+                        parts.pop(day, None)
+                    manifest['stats']['evicted'] = manifest['stats'].get('evicted', 0) + len(evicted)
+                    self._save_manifest(manifest)
+                return sorted(evicted)
+
+    # 缓存统计：分区数、总大小、命中率。
+    def report(self):
+        manifest = self.load_manifest()
+        stats = manifest['stats']
+        hit, miss, append = stats.get('hit', 0), stats.get('miss', 0), stats.get('append', 0)
+        requests = hit + miss + append
+        return {'partitions': len(manifest['partitions']),
+                'bytes': sum(entry['bytes'] for entry in manifest['partitions'].values()),
+                'hit': hit, 'miss': miss, 'append': append,
+                'hit_rate': hit / requests if requests else 0.0,
+                'evicted': stats.get('evicted', 0), 'since': stats.get('since')}
+
+
+# 清理旧版本的缓存：按月的 gzip pickle 目录和不再使用的复权数据存储。
+def purge_legacy():
+    removed = []
+    if not os.path.isdir(hst.store_path):
+        return removed
+    for name in os.listdir(hst.store_path):
+        path = os.path.join(hst.store_path, name)
+        if not os.path.isdir(path):
+            continue
+        if (len(name) == 6 and name.isdigit()) or name in ('qfq', 'hfq'):
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(name)
+    return removed
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(adjust=''):
+    with _managers_lock:
+        manager = _managers.get(adjust)
+        if manager is None:
+            manager = CacheManager(hst.get_store(adjust))
+            _managers[adjust] = manager
+        return manager
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import bisect
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from instock.core.history.store import atomic_write, CODE_DTYPE, store_path
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 分钟K线存储，按周期、交易日分区，每个分区一个列式 npz 文件：
+#   <root>/<period>/<yyyymm>/<yyyymmdd>.npz
+#     codes    当天有数据的股票代码，升序
+#     offsets  每只股票的数据在各列中的起止位置，长度为股票数+1
+#     time     分钟 hhmm，每只股票内升序
+#     open close high low  价格 float32
+#     volume   成交量（手） int64
+#     amount   成交额 float64
+# 一天一个周期全市场 5000 只股票 × 241 根1分钟K线约 30MB，一次读写整个分区，不逐行写数据库。
+# 同一天重复写入时按 (代码, 时间) 合并，新数据覆盖旧数据，盘中可以多次增量写入。
+# 只抓取1分钟K线，5/15/30/60 分钟K线在本地按交易时段聚合生成（resample），不再单独请求。
+
+PERIODS = (1, 5, 15, 30, 60)
+PRICE_FIELDS = ('open', 'close', 'high', 'low')
+FIELDS = PRICE_FIELDS + ('volume', 'amount')
+FIELD_DTYPES = {'open': np.float32, 'close': np.float32, 'high': np.float32, 'low': np.float32,
+                'volume': np.int64, 'amount': np.float64}
+
+minute_path = os.path.join(os.path.dirname(store_path), 'minute')
+
+_MORNING_OPEN = 9 * 60 + 30  # 09:30 集合竞价，并入第一根K线
+_MORNING_CLOSE = 11 * 60 + 30
+_AFTERNOON_OPEN = 13 * 60
+
+
+# hhmm 转交易时段内的第几分钟：09:30 为 0，09:31-11:30 为 1-120，13:01-15:00 为 121-240。
+def session_minutes(times):
+    m = (np.asarray(times, dtype=np.int32) // 100) * 60 + np.asarray(times, dtype=np.int32) % 100
+    return np.where(m <= _MORNING_OPEN, 0,
+                    np.where(m <= _MORNING_CLOSE, m - _MORNING_OPEN,
+                             120 + np.maximum(m - _AFTERNOON_OPEN, 0)))
+
+
+# 交易时段内的第几分钟转 hhmm。
+def session_times(minutes):
+    minutes = np.asarray(minutes, dtype=np.int32)
+    m = np.where(minutes <= 120, _MORNING_OPEN + minutes, _AFTERNOON_OPEN + minutes - 120)
+    return ((m // 60) * 100 + m % 60).astype(np.int16)
+
+
+# 1分钟K线聚合成 period 分钟K线，K线时间为区间最后一分钟（和数据源一致，例如 60 分钟为 1030/1130/1400/1500）。
+# codes/times 按 (代码, 时间) 升序，values 为 {字段: 数组}。
+def resample(codes, times, values, period):
+    if period == 1 or len(codes) == 0:
+        return codes, times, values
+    bucket = np.maximum(-(-session_minutes(times) // period), 1)
+    start = np.ones(len(codes), dtype=bool)
+    start[1:] = (codes[1:] != codes[:-1]) | (bucket[1:] != bucket[:-1])
+    first = np.flatnonzero(start)
+    last = np.append(first[1:], len(codes)) - 1
+    result = {
+        'open': values['open'][first],
+        'close': values['close'][last],
+        'high': np.maximum.reduceat(values['high'], first),
+        'low': np.minimum.reduceat(values['low'], first),
+        'volume': np.add.reduceat(values['volume'], first),
+        'amount': np.add.reduceat(values['amount'], first),
+    }
+    return codes[first], session_times(bucket[first] * period), result
+
+
+# 'YYYY-MM-DD HH:MM' 时间列转成 (yyyymmdd, hhmm) 两个整数数组，按固定位置的字符直接计算，不逐行切分字符串。
+def _parse_stamps(stamps):
+    chars = np.asarray(stamps.to_numpy(dtype=str), dtype='U16').view(np.int32).reshape(-1, 16) - ord('0')
+    days = ((chars[:, 0] * 10 + chars[:, 1]) * 100 + chars[:, 2] * 10 + chars[:, 3]) * 10000 + \
+        (chars[:, 5] * 10 + chars[:, 6]) * 100 + chars[:, 8] * 10 + chars[:, 9]
+    times = (chars[:, 11] * 10 + chars[:, 12]) * 100 + chars[:, 14] * 10 + chars[:, 15]
+    return days, times.astype(np.int16)
+
+
+# 代码数组（按代码升序）转成 (唯一代码, offsets)。
+def _offsets(codes):
+    uniq, first = np.unique(codes, return_index=True)
+    return uniq, np.append(first, len(codes)).astype(np.int64)
+
+
+class MinuteStore:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def partition_file(self, period, day):
+        return os.path.join(self.root, str(period), day[0:6], f"{day}.npz")
+
+    # 某个周期的交易日分区，yyyymmdd 字符串升序，可按 [start, end] 截取。
+    def partitions(self, period, start=None, end=None):
+        period_dir = os.path.join(self.root, str(period))
+        parts = []
+        if os.path.isdir(period_dir):
+            for month in os.listdir(period_dir):
+                month_dir = os.path.join(period_dir, month)
+                if len(month) == 6 and month.isdigit() and os.path.isdir(month_dir):
+                    parts.extend(f[:-4] for f in os.listdir(month_dir)
+                                 if f.endswith('.npz') and len(f) == 12 and f[:8].isdigit())
+        parts.sort()
+        lo = 0 if start is None else bisect.bisect_left(parts, str(start))
+        hi = len(parts) if end is None else bisect.bisect_right(parts, str(end))
+        return parts[lo:hi]
+
+    # 读取一个分区，返回 {codes, offsets, time, 字段...}，分区不存在或损坏时返回None。
+    def read_partition(self, period, day):
+        file_path = self.partition_file(period, day)
+        if not os.path.isfile(file_path):
+            return None
+        try:
+            with np.load(file_path) as npz:
+                return {k: npz[k] for k in npz.files}
+        except Exception as e:
+            logging.error(f"minute.MinuteStore.read_partition处理异常：{period}分钟{day}{e}")
+        return None
+
+    def write_partition(self, period, day, codes, times, values):
+        uniq, offsets = _offsets(codes)
+        file_path = self.partition_file(period, day)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        arrays = {'codes': uniq.astype(CODE_DTYPE), 'offsets': offsets, 'time': times.astype(np.int16)}
+        for field in FIELDS:
+            arrays[field] = np.asarray(values[field], dtype=FIELD_DTYPES[field])
+        atomic_write(file_path, lambda f: np.savez(f, **arrays))
+
+    # 写入一天一个周期的数据，和已有分区按 (代码, 时间) 合并，新数据覆盖旧数据。返回分区行数。
+    def append(self, period, day, codes, times, values):
+        with self._lock:
+            codes = np.asarray(codes, dtype=CODE_DTYPE)
+            times = np.asarray(times, dtype=np.int16)
+            values = {field: np.asarray(values[field], dtype=FIELD_DTYPES[field]) for field in FIELDS}
+            new = np.ones(len(codes), dtype=np.int8)
+            old = self.read_partition(period, day)
+            if old is not None and len(old['codes']) > 0:
+                old_codes = np.repeat(old['codes'], np.diff(old['offsets']))
+                codes = np.concatenate([old_codes, codes])
+                times = np.concatenate([old['time'], times])
+                values = {field: np.concatenate([old[field], values[field]]) for field in FIELDS}
+                new = np.concatenate([np.zeros(len(old_codes), dtype=np.int8), new])
+            # 按 (代码, 时间, 新旧) 排序，相同 (代码, 时间) 只保留最后一条即新数据。
+            order = np.lexsort((new, times, codes))
+            codes, times = codes[order], times[order]
+            keep = np.ones(len(codes), dtype=bool)
+            keep[:-1] = (codes[:-1] != codes[1:]) | (times[:-1] != times[1:])
+            codes, times = codes[keep], times[keep]
+            values = {field: values[field][order][keep] for field in FIELDS}
+            self.write_partition(period, day, codes, times, values)
+            return len(codes)
+
+    # 写入1分钟K线，按交易日分区，同时生成并写入 periods 中其他周期的K线。
+    # frames 为 {code: DataFrame}，列为 time('YYYY-MM-DD HH:MM')、open、close、high、low、volume、amount。
+    def ingest(self, frames, periods=PERIODS):
+        frames = {code: data for code, data in frames.items() if data is not None and len(data.index) > 0}
+        if not frames:
+            return 0
+        data = pd.concat(frames.values(), ignore_index=True)
+        codes = np.repeat(np.asarray(list(frames.keys()), dtype=CODE_DTYPE),
+                          [len(frame.index) for frame in frames.values()])
+        days, times = _parse_stamps(data['time'])
+        count = 0
+        for day in np.unique(days):
+            mask = days == day
+            order = np.lexsort((times[mask], codes[mask]))
+            _codes, _times = codes[mask][order], times[mask][order]
+            _values = {field: data[field].to_numpy()[mask][order] for field in FIELDS}
+            _values['volume'] = np.nan_to_num(_values['volume'].astype(np.float64)).astype(np.int64)
+            for period in periods:
+                p_codes, p_times, p_values = resample(_codes, _times, _values, period)
+                rows = self.append(period, str(int(day)), p_codes, p_times, p_values)
+                if period == 1:
+                    count += rows
+        return count
+
+    # 读取一个交易日全市场（或 codes 中的股票）的K线，列为 code、time、字段。
+    def load_day(self, day, period=1, codes=None):
+        part = self.read_partition(period, day)
+        if part is None:
+            return None
+        lengths = np.diff(part['offsets'])
+        code_col = np.repeat(part['codes'], lengths)
+        mask = slice(None) if codes is None else np.isin(code_col, np.asarray(list(codes), dtype=CODE_DTYPE))
+        date_str = f"{day[0:4]}-{day[4:6]}-{day[6:8]}"
+        times = part['time'][mask].astype(np.int32)
+        data = pd.DataFrame({'code': code_col[mask],
+                             'time': [f"{date_str} {t // 100:02d}:{t % 100:02d}" for t in times]})
+        for field in FIELDS:
+            data[field] = part[field][mask]
+        return data
+
+    # 读取一只股票 [start, end] 交易日的K线。
+    def load_code(self, code, period=1, start=None, end=None):
+        frames = []
+        for day in self.partitions(period, start, end):
+            part = self.read_partition(period, day)
+            if part is None:
+                continue
+            i = np.searchsorted(part['codes'], code)
+            if i >= len(part['codes']) or part['codes'][i] != code:
+                continue
+            lo, hi = part['offsets'][i], part['offsets'][i + 1]
+            date_str = f"{day[0:4]}-{day[4:6]}-{day[6:8]}"
+            data = pd.DataFrame({'time': [f"{date_str} {t // 100:02d}:{t % 100:02d}"
+                                          for t in part['time'][lo:hi].astype(np.int32)]})
+            for field in FIELDS:
+                data[field] = part[field][lo:hi]
+            frames.append(data)
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# 分钟K线存储，进程内共享。
+def get_minute_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MinuteStore(minute_path)
+        return _store
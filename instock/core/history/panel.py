@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 全市场的 股票×交易日 面板数据。
+# 每个字段一个 (股票数, 交易日数) 的 numpy 数组，交易日历是所有股票交易日的并集，
+# mask 标记哪些位置有数据（停牌、上市前为 False，数值为 NaN）。
+# 可以和 stock_hist_data 的 {(date, code, name): DataFrame} 互相转换，
+# 指标、策略、回测可以直接对整个市场做横截面向量化计算。
+# 也可以用 frames() 按 {(date, code, name): DataFrame} 的方式只读访问，取出一只股票时才生成它的 DataFrame。
+
+
+class StockPanel:
+    def __init__(self, keys, calendar, fields, mask):
+        self.keys = list(keys)  # [(date, code, name), ...]，行顺序
+        self.calendar = np.asarray(calendar, dtype='datetime64[D]')  # 交易日历，升序
+        self.fields = fields  # {字段名: (股票数, 交易日数) 的数组}
+        self.mask = mask  # (股票数, 交易日数)，有数据为True
+        self._rows = None
+        self._date_str = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def shape(self):
+        return self.mask.shape
+
+    @property
+    def codes(self):
+        return [key[1] for key in self.keys]
+
+    def field(self, name):
+        return self.fields[name]
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    # 股票代码对应的行号。
+    def row(self, code):
+        if self._rows is None:
+            self._rows = {key[1]: i for i, key in enumerate(self.keys)}
+        return self._rows.get(code)
+
+    # 日期对应的列号，日期不是交易日时返回之前最近一个交易日，没有返回-1。
+    def column(self, date):
+        return int(np.searchsorted(self.calendar, np.datetime64(date, 'D'), side='right')) - 1
+
+    # 某个交易日全市场的横截面，返回 {字段名: (股票数,) 的数组}。
+    def cross_section(self, date):
+        j = self.column(date)
+        if j < 0:
+            return None
+        return {name: values[:, j] for name, values in self.fields.items()}
+
+    # 每只股票最后一个有数据的交易日列号，没有数据为-1。
+    def last_valid(self):
+        n_days = self.mask.shape[1]
+        last = n_days - 1 - np.argmax(self.mask[:, ::-1], axis=1)
+        last[~self.mask.any(axis=1)] = -1
+        return last
+
+    # 从 stock_hist_data 的数据转换，fields 为None时使用第一个 DataFrame 中除 date 外的全部数值字段。
+    @classmethod
+    def from_dict(cls, data, fields=None):
+        keys = list(data.keys())
+        frames = [data[key] for key in keys]
+        if fields is None:
+            fields = [c for c in frames[0].columns if c != 'date'] if frames else []
+        if not frames:
+            return cls(keys, np.empty(0, dtype='datetime64[D]'), {name: np.empty((0, 0)) for name in fields},
+                       np.zeros((0, 0), dtype=bool))
+
+        lengths = np.array([len(frame.index) for frame in frames])
+        dates = np.concatenate([np.asarray(frame['date'].values).astype('datetime64[D]') for frame in frames])
+        calendar, cols = np.unique(dates, return_inverse=True)
+        rows = np.repeat(np.arange(len(keys)), lengths)
+        shape = (len(keys), len(calendar))
+
+        mask = np.zeros(shape, dtype=bool)
+        mask[rows, cols] = True
+        arrays = {}
+        for name in fields:
+            values = np.full(shape, np.nan)
+            values[rows, cols] = np.concatenate([frame[name].to_numpy(dtype=np.float64) for frame in frames])
+            arrays[name] = values
+        return cls(keys, calendar, arrays, mask)
+
+    # 第 i 只股票有数据的交易日组成的 DataFrame，列和 stock_hist_data 的格式一致。
+    def frame(self, i):
+        if self._date_str is None:
+            self._date_str = np.datetime_as_string(self.calendar, unit='D').astype(object)
+        m = self.mask[i]
+        data = pd.DataFrame({name: values[i, m] for name, values in self.fields.items()})
+        data.insert(0, 'date', self._date_str[m])
+        return data
+
+    # 转换回 {(date, code, name): DataFrame}，和 stock_hist_data 的格式一致。
+    def to_dict(self):
+        return {key: self.frame(i) for i, key in enumerate(self.keys) if self.mask[i].any()}
+
+    # 只读的 {(date, code, name): DataFrame} 视图，不复制整个面板。
+    def frames(self):
+        return PanelFrames(self)
+
+
+# StockPanel 的 {(date, code, name): DataFrame} 视图，取出时才生成这只股票的 DataFrame，不缓存，
+# 挂载共享内存面板的子进程按这种方式使用，内存中只有共享的数组。没有数据的股票不包含在内。
+class PanelFrames(Mapping):
+    def __init__(self, panel):
+        self.panel = panel
+        valid = panel.mask.any(axis=1)
+        self._index = {key: i for i, key in enumerate(panel.keys) if valid[i]}
+
+    def __getitem__(self, key):
+        return self.panel.frame(self._index[key])
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import zlib
+import logging
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+from instock.core.history.store import FIELDS, CODE_DTYPE, atomic_write, day_to_date_str, frame_to_arrays, get_store
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 周K线、月K线，在本地由日K线聚合生成，不再按 period="weekly"/"monthly" 重新下载。
+# 按交易周（周一到周五）、交易月分组，只聚合实际有交易的日子：
+#   开盘为第一个交易日的开盘，收盘为最后一个交易日的收盘，最高、最低取极值，成交量、成交额、换手率累加，
+#   涨跌额、涨跌幅、振幅以上一周期收盘价（第一个交易日的 收盘-涨跌额）为基准计算。
+#   K线日期为该股票在这个周期内最后一个交易日，和数据源一致，停牌整个周期的股票没有这根K线。
+# 不复权数据的聚合结果缓存在历史行情存储目录下，一个周期一个文件：
+#   <root>/weekly/<周一 yyyymmdd>.npz、<root>/monthly/<yyyymm>.npz
+#     codes   股票代码，升序
+#     values  字段×股票 的二维数组，字段顺序和日K线存储一致
+#     days    每只股票这根K线的日期 yyyymmdd
+#     source  组成这个周期的日K线分区的指纹，日K线分区变化（合并新数据、隔离、删除）后重新聚合
+# 盘中只有当前周期会重新聚合，之前的周期直接读取缓存。
+
+PERIODS = ('weekly', 'monthly')
+
+_RATE_FIELDS = ('amplitude', 'quote_change')
+
+
+# yyyymmdd 转 周期键：周K线为所在周周一的 yyyymmdd，月K线为 yyyymm。
+def period_keys(days, period):
+    days = np.asarray(days, dtype=np.int64)
+    if period == 'monthly':
+        return days // 100
+    if period != 'weekly':
+        raise ValueError(f"不支持的周期{period}")
+    stamps = pd.to_datetime(days.astype(str), format='%Y%m%d').values.astype('datetime64[D]')
+    # 1970-01-01 是周四，加3后按7整除即以周一为一周的开始。
+    monday = stamps - ((stamps.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    return pd.DatetimeIndex(monday).strftime('%Y%m%d').astype(np.int64).values
+
+
+# 日期所在周期的第一天 yyyymmdd，用于把任意起始日期对齐到完整的周期。
+def period_start(day, period):
+    key = int(period_keys([int(day)], period)[0])
+    return str(key * 100 + 1) if period == 'monthly' else str(key)
+
+
+# 日期所在周期的最后一天 yyyymmdd。
+def period_end(day, period):
+    start = datetime.datetime.strptime(period_start(day, period), "%Y%m%d")
+    if period == 'monthly':
+        end = (start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    else:
+        end = start + datetime.timedelta(days=6)
+    return end.strftime("%Y%m%d")
+
+
+# 日K线聚合成周期K线。
+# days 为交易日（升序），values 为 字段×股票×交易日 的数组，mask 为 股票×交易日 的有效数据掩码（见 HistStore.load_block）。
+# 返回 (周期键, 字段×股票×周期 的数组, 股票×周期 的掩码, 股票×周期 的K线日期)。
+def resample_block(days, values, mask, period):
+    days = np.asarray(days, dtype=np.int64)
+    n_fields, n_codes, n_days = values.shape
+    if n_days == 0:
+        return (np.empty(0, dtype=np.int64), np.empty((n_fields, n_codes, 0)),
+                np.zeros((n_codes, 0), dtype=bool), np.zeros((n_codes, 0), dtype=np.int32))
+    keys = period_keys(days, period)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    idx = np.arange(n_days)
+    first = np.minimum.reduceat(np.where(mask, idx, n_days), starts, axis=1)
+    last = np.maximum.reduceat(np.where(mask, idx, -1), starts, axis=1)
+    valid = last >= 0
+    first = np.minimum(first, n_days - 1)
+    last = np.maximum(last, 0)
+
+    f = {field: values[i] for i, field in enumerate(FIELDS)}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        high = np.fmax.reduceat(np.where(mask, f['high'], np.nan), starts, axis=1)
+        low = np.fmin.reduceat(np.where(mask, f['low'], np.nan), starts, axis=1)
+        close = np.take_along_axis(f['close'], last, axis=1)
+        pre_close = np.take_along_axis(f['close'] - f['ups_downs'], first, axis=1)
+        result = {
+            'open': np.take_along_axis(f['open'], first, axis=1),
+            'close': close,
+            'high': high,
+            'low': low,
+            'ups_downs': np.round(close - pre_close, 3),
+            'quote_change': (close - pre_close) / pre_close * 100,
+            'amplitude': (high - low) / pre_close * 100,
+        }
+    for field in ('volume', 'amount', 'turnover'):
+        result[field] = np.add.reduceat(np.where(mask, np.nan_to_num(f[field]), 0.0), starts, axis=1)
+    for field in _RATE_FIELDS:
+        result[field] = np.round(result[field], 2)
+    out = np.stack([np.where(valid, result[field], np.nan) for field in FIELDS])
+    out_days = np.where(valid, days[last], 0).astype(np.int32)
+    return keys[starts], out, valid, out_days
+
+
+# 单只股票的日K线 DataFrame（可以是复权后的）聚合成周期K线 DataFrame，列不变。
+def resample_frame(data, period):
+    if data is None or len(data.index) == 0:
+        return data
+    days, values = frame_to_arrays(data)
+    keys, out, valid, out_days = resample_block(days, values[:, np.newaxis, :],
+                                                np.ones((1, len(days)), dtype=bool), period)
+    frame = pd.DataFrame(out[:, 0, :].T, columns=FIELDS)
+    frame.insert(0, 'date', [day_to_date_str(d) for d in out_days[0]])
+    return frame
+
+
+class PeriodCache:
+    def __init__(self, store, period):
+        if period not in PERIODS:
+            raise ValueError(f"不支持的周期{period}")
+        self.store = store
+        self.period = period
+        self.root = os.path.join(store.root, period)
+        self._lock = threading.Lock()
+
+    def _file(self, key):
+        return os.path.join(self.root, f"{key}.npz")
+
+    # 组成一个周期的日K线分区的指纹，分区的行数、校验和变化后指纹随之变化。
+    def _source(self, days):
+        integrity = self.store._load_integrity()
+        entries = [(day, integrity.get(day)) for day in days]
+        return zlib.crc32(json.dumps(entries, sort_keys=True).encode('utf-8'))
+
+    def _read(self, key, source):
+        file_path = self._file(key)
+        if not os.path.isfile(file_path):
+            return None
+        try:
+            with np.load(file_path) as npz:
+                if int(npz['source']) != source:
+                    return None
+                return npz['codes'], npz['values'], npz['days']
+        except Exception as e:
+            logging.error(f"period.PeriodCache._read处理异常：{self.period}{key}{e}")
+        return None
+
+    def _write(self, key, source, codes, values, days):
+        os.makedirs(self.root, exist_ok=True)
+        atomic_write(self._file(key), lambda f: np.savez(
+            f, codes=codes, values=np.ascontiguousarray(values), days=days, source=np.array(source)))
+
+    # 聚合没有缓存（或缓存已过期）的周期，全市场一起计算，groups 为 {周期键: 交易日列表}。
+    def _build(self, groups, sources):
+        days = [day for key in sorted(groups) for day in groups[key]]
+        codes = np.unique(np.concatenate([np.asarray(self.store.read_partition(day)[0]) for day in days]))
+        codes = codes.astype(CODE_DTYPE)
+        block_days, values, mask = self.store.load_block(codes, days[0], days[-1])
+        keys, out, valid, out_days = resample_block(block_days, values, mask, self.period)
+        built = {}
+        for j, key in enumerate(keys):
+            key = str(key)
+            if key not in groups:
+                continue
+            hit = valid[:, j]
+            entry = (codes[hit], out[:, hit, j], out_days[hit, j])
+            built[key] = entry
+            # 读取时有分区被隔离（升级为排它锁期间分区可能变化）：指纹变了的周期只用于这次返回，不写缓存。
+            if self._source(groups[key]) != sources[key]:
+                continue
+            try:
+                self._write(key, sources[key], *entry)
+            except Exception as e:
+                logging.error(f"period.PeriodCache._build处理异常：{self.period}{key}{e}")
+        return built
+
+    # 删除对应的日K线分区已经全部删除的周期。
+    def prune(self):
+        parts = self.store.partitions()
+        keys = {str(key) for key in period_keys(parts, self.period)} if parts else set()
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for file_name in os.listdir(self.root):
+            if file_name.endswith('.npz') and file_name[:-4] not in keys:
+                try:
+                    os.remove(os.path.join(self.root, file_name))
+                    removed += 1
+                except Exception:
+                    pass
+        return removed
+
+    # 批量读取多只股票 [start, end] 所在周期的K线，起止日期对齐到完整的周期。
+    # 返回 周期K线日期（股票×周期）、字段×股票×周期 的数组、有效数据掩码。
+    def load_block(self, codes, start=None, end=None):
+        codes = np.asarray(codes, dtype=CODE_DTYPE)
+        start = None if start is None else period_start(start, self.period)
+        end = None if end is None else period_end(end, self.period)
+        parts = self.store.partitions(start, end)
+        groups = {}
+        for key, day in zip(period_keys(parts, self.period), parts):
+            groups.setdefault(str(key), []).append(day)
+        keys = sorted(groups)
+        # 加存储的共享锁，聚合时日K线分区不会被其他进程改写。
+        # 先拿 self._lock 再加存储锁，和存储内部的加锁顺序一致（读分区时可能升级为排它锁）。
+        with self._lock, self.store.locked(False):
+            sources = {key: self._source(groups[key]) for key in keys}
+            cached = {key: self._read(key, sources[key]) for key in keys}
+            missing = {key: groups[key] for key in keys if cached[key] is None}
+            if missing:
+                cached.update(self._build(missing, sources))
+                self.prune()
+        values = np.full((len(FIELDS), len(codes), len(keys)), np.nan)
+        mask = np.zeros((len(codes), len(keys)), dtype=bool)
+        days = np.zeros((len(codes), len(keys)), dtype=np.int32)
+        for j, key in enumerate(keys):
+            entry = cached.get(key)
+            if entry is None or len(entry[0]) == 0 or len(codes) == 0:
+                continue
+            p_codes, p_values, p_days = entry
+            idx = np.searchsorted(p_codes, codes)
+            idx[idx >= len(p_codes)] = 0
+            hit = p_codes[idx] == codes
+            values[:, hit, j] = p_values[:, idx[hit]]
+            days[hit, j] = p_days[idx[hit]]
+            mask[hit, j] = True
+        return days, values, mask
+
+    # 批量读取多只股票，返回 {code: DataFrame}，列和日K线一致，只包含有数据的股票。
+    def load_codes(self, codes, start=None, end=None):
+        result = {}
+        codes = list(codes)
+        if not codes:
+            return result
+        days, values, mask = self.load_block(codes, start, end)
+        for i, code in enumerate(codes):
+            m = mask[i]
+            if not m.any():
+                continue
+            data = pd.DataFrame(values[:, i, m].T, columns=FIELDS)
+            data.insert(0, 'date', [day_to_date_str(d) for d in days[i, m]])
+            result[code] = data
+        return result
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+# 不复权日K线存储的周期K线缓存，每个周期一个实例，进程内共享。
+def get_period_cache(period):
+    with _caches_lock:
+        cache = _caches.get(period)
+        if cache is None:
+            cache = PeriodCache(get_store(''), period)
+            _caches[period] = cache
+        return cache
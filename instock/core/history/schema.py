@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 历史行情 DataFrame 的紧凑格式（可选）。
+# 标准格式：date 为 'YYYY-MM-DD' 字符串，数值列都是 float64。
+# 紧凑格式：date 为 datetime64，价格类字段 float32（两位小数、7位有效数字足够），成交量 int64（股），
+# 成交额数值太大 float32 精度不够，保持 float64。
+# datetime64 的 date 列和 'YYYY-MM-DD' 字符串比较（data['date'] <= end_date）结果不变，速度更快。
+# talib 只接受 float64，stock_hist_data 在内存中保存紧凑格式，get_data() 返回 StandardFrames 视图，
+# 每只股票第一次取出时转回标准格式并保留，之后的作业直接使用，指标、策略、形态、回测拿到的都是标准格式。
+
+COMPACT_DTYPES = {'open': np.float32, 'close': np.float32, 'high': np.float32, 'low': np.float32,
+                  'volume': np.int64, 'amount': np.float64, 'amplitude': np.float32,
+                  'quote_change': np.float32, 'ups_downs': np.float32, 'turnover': np.float32,
+                  'p_change': np.float32}
+PRICE_FIELDS = ('open', 'close', 'high', 'low', 'ups_downs')  # 按报价精度取整的字段
+
+compact = False  # 是否使用紧凑格式
+
+# 使用环境变量配置,docker -e 传递
+_compact = os.environ.get('hist_compact_schema')
+if _compact is not None:
+    compact = _compact.lower() in ('1', 'true', 'yes')
+
+
+def is_compact(data):
+    return data is not None and pd.api.types.is_datetime64_any_dtype(data['date'])
+
+
+# 标准格式转紧凑格式，返回新的 DataFrame。
+def to_compact(data):
+    if data is None or is_compact(data):
+        return data
+    columns = {'date': pd.to_datetime(data['date'], format='%Y-%m-%d').values}
+    for name in data.columns:
+        if name == 'date':
+            continue
+        dtype = COMPACT_DTYPES.get(name)
+        values = data[name].to_numpy()
+        if dtype is None:
+            columns[name] = values
+        elif np.issubdtype(dtype, np.integer):
+            columns[name] = np.round(np.nan_to_num(values.astype(np.float64))).astype(dtype)
+        else:
+            columns[name] = values.astype(dtype)
+    return pd.DataFrame(columns, index=data.index)
+
+
+# 紧凑格式转回标准格式，已经是标准格式的原样返回。
+# decimals 为价格的小数位数：股票2位，ETF 3位（见 stockfetch.price_decimals）。
+def to_standard(data, decimals=2):
+    if data is None or not is_compact(data):
+        return data
+    columns = {'date': np.datetime_as_string(data['date'].values.astype('datetime64[D]')).astype(object)}
+    for name in data.columns:
+        if name == 'date':
+            continue
+        values = data[name].to_numpy()
+        if name in COMPACT_DTYPES:
+            # float32 转 float64 后按报价精度取整（涨跌幅等百分比两位小数），和标准格式的数值一致。
+            values = values.astype(np.float64)
+            if COMPACT_DTYPES[name] == np.float32 and name != 'p_change':
+                values = np.round(values, decimals if name in PRICE_FIELDS else 2)
+        columns[name] = values
+    return pd.DataFrame(columns, index=data.index)
+
+
+# 紧凑格式数据 {key: DataFrame} 的标准格式只读视图，每只股票第一次取出时转换，之后使用转换好的 DataFrame。
+class StandardFrames(Mapping):
+    def __init__(self, data, decimals=2):
+        self.data = data
+        self.decimals = decimals
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        frame = self._frames.get(key)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(key)
+                if frame is None:
+                    frame = to_standard(self.data[key], self.decimals)
+                    self._frames[key] = frame
+        return frame
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+
+def compact_dict(data):
+    if data is None:
+        return None
+    return {key: to_compact(frame) for key, frame in data.items()}
+
+
+def memory_bytes(data):
+    if data is None:
+        return 0
+    return int(sum(frame.memory_usage(index=True, deep=True).sum() for frame in data.values()))
+
+
+# 对全部股票比较标准格式和紧凑格式：内存、转换耗时、按日期截取的耗时、价格误差。
+# data 为 stock_hist_data 的标准格式数据，end_date 为 'YYYY-MM-DD'，默认每只股票倒数第20根K线的日期。
+def report(data, end_date=None):
+    if not data:
+        return None
+    result = {'stocks': len(data), 'rows': int(sum(len(frame.index) for frame in data.values()))}
+    result['standard_bytes'] = memory_bytes(data)
+
+    start = time.perf_counter()
+    compact_data = compact_dict(data)
+    result['to_compact_seconds'] = time.perf_counter() - start
+    result['compact_bytes'] = memory_bytes(compact_data)
+    result['memory_ratio'] = result['compact_bytes'] / result['standard_bytes'] if result['standard_bytes'] else 0.0
+
+    def _mask_seconds(frames):
+        start = time.perf_counter()
+        for frame in frames.values():
+            _end_date = end_date if end_date is not None else frame['date'].iloc[max(len(frame.index) - 20, 0)]
+            if not isinstance(_end_date, str):
+                _end_date = str(_end_date)[0:10]
+            frame.loc[frame['date'] <= _end_date]
+        return time.perf_counter() - start
+
+    result['standard_mask_seconds'] = _mask_seconds(data)
+    result['compact_mask_seconds'] = _mask_seconds(compact_data)
+
+    start = time.perf_counter()
+    max_error = 0.0
+    for key, frame in compact_data.items():
+        standard = to_standard(frame)
+        for name in ('open', 'close', 'high', 'low'):
+            if name in frame.columns:
+                error = np.nanmax(np.abs(standard[name].values - data[key][name].to_numpy(dtype=np.float64)),
+                                  initial=0.0)
+                max_error = max(max_error, float(error))
+    result['to_standard_seconds'] = time.perf_counter() - start
+    result['max_price_error'] = max_error
+    return result
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import struct
+import numpy as np
+from multiprocessing import shared_memory
+from instock.core.history.panel import StockPanel
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 把加载好的面板数据发布到共享内存，子进程只读挂载，不复制也不反序列化。
+# 每个数组一个共享内存段，另外一个目录段（名字就是发布名）保存 JSON 格式的目录：
+#   {'keys': [...], 'fields': [...], 'arrays': {名字: {'segment', 'dtype', 'shape'}}}
+# 目录段的前 8 个字节是 JSON 的长度。
+
+_HEADER = struct.Struct('<Q')
+
+
+def _attach_segment(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # 3.13 之前挂载也会登记到 resource_tracker，进程池的子进程和发布方共用一个 resource_tracker，
+    # 重复登记没有影响，不能在这里注销，否则发布方 unlink 时会报错。
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedPanel:
+    def __init__(self, panel, name=None):
+        self.name = name if name is not None else f"isk{os.getpid()}_{id(self) % 100000}"
+        self._segments = []
+        try:
+            arrays = {'calendar': panel.calendar.astype(np.int64), 'mask': panel.mask}
+            for field, values in panel.fields.items():
+                arrays[f"f_{field}"] = values
+            catalog = {'keys': [list(key) for key in panel.keys], 'fields': list(panel.fields.keys()), 'arrays': {}}
+            for i, (array_name, array) in enumerate(arrays.items()):
+                array = np.ascontiguousarray(array)
+                segment = f"{self.name}_{i}"
+                shm = shared_memory.SharedMemory(name=segment, create=True, size=max(array.nbytes, 1))
+                self._segments.append(shm)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+                catalog['arrays'][array_name] = {'segment': segment, 'dtype': array.dtype.str,
+                                                 'shape': list(array.shape)}
+            payload = json.dumps(catalog, default=str).encode('utf-8')
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=_HEADER.size + len(payload))
+            self._segments.append(shm)
+            shm.buf[:_HEADER.size] = _HEADER.pack(len(payload))
+            shm.buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        except Exception:
+            self.close()
+            raise
+
+    # 释放并删除全部共享内存段，子进程都结束后调用。
+    def close(self):
+        segments, self._segments = self._segments, []
+        for shm in segments:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+# 子进程只读挂载发布的面板数据。返回的 StockPanel 的数组直接指向共享内存。
+def attach_panel(name):
+    segments = []
+    shm = _attach_segment(name)
+    segments.append(shm)
+    length = _HEADER.unpack(bytes(shm.buf[:_HEADER.size]))[0]
+    catalog = json.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + length]).decode('utf-8'))
+
+    arrays = {}
+    for array_name, entry in catalog['arrays'].items():
+        shm = _attach_segment(entry['segment'])
+        segments.append(shm)
+        array = np.ndarray(tuple(entry['shape']), dtype=np.dtype(entry['dtype']), buffer=shm.buf)
+        array.flags.writeable = False
+        arrays[array_name] = array
+
+    fields = {field: arrays[f"f_{field}"] for field in catalog['fields']}
+    panel = StockPanel([tuple(key) for key in catalog['keys']], arrays['calendar'].astype('datetime64[D]'),
+                       fields, arrays['mask'])
+    panel._segments = segments  # 保持共享内存段打开，和面板数据的生命周期一致
+    return panel
@@ -0,0 +1,767 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import zlib
+import bisect
+import shutil
+import logging
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+import instock.core.tablestructure as tbs
+import instock.core.crawling.replay as rp
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 列式历史行情存储，替代每只股票一个 gzip pickle 的缓存方式。
+# 目录结构：
+#   <root>/<yyyymm>/<yyyymmdd>/codes.npy   当天有行情的股票代码，升序
+#   <root>/<yyyymm>/<yyyymmdd>/values.npy  字段×代码 的二维数组，每个字段一行，列式存放
+#   <root>/staging/<code>.npz             单只股票新抓取的数据，等待合并进交易日分区
+#   <root>/coverage.json                  每只股票已经抓取过的日期区间 [start, end]
+#   <root>/integrity.json                 每个交易日分区的行数和校验和
+#   <root>/quarantine/                    校验失败的分区和 staging 文件，对应股票会重新抓取
+#   <root>/store.lock                     存储锁，见 StoreLock
+# 读取时使用内存映射，按代码、日期区间切片，不需要解压整个市场的数据。
+
+HIST_COLUMNS = tuple(tbs.CN_STOCK_HIST_DATA['columns'])
+FIELDS = HIST_COLUMNS[1:]  # 除 date 以外的数值字段，顺序即 values.npy 的行顺序
+CODE_DTYPE = '<U6'
+
+ADJUST_DIRS = {'': 'bfq', 'qfq': 'qfq', 'hfq': 'hfq'}
+
+cpath_current = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+store_path = os.path.join(rp.cache_root(os.path.join(cpath_current, 'cache')), 'hist')
+
+
+# yyyymmdd 转 yyyy-mm-dd，和接口返回的日期格式保持一致。
+def day_to_date_str(day):
+    day = str(day)
+    return f"{day[0:4]}-{day[4:6]}-{day[6:8]}"
+
+
+# 行情 DataFrame 的 date 列转 int32 的 yyyymmdd。
+def frame_days(data):
+    return data['date'].astype(str).str.replace('-', '', regex=False).str[0:8].astype(np.int32).values
+
+
+# 行情 DataFrame 转成 (日期数组, 字段×行 的数组)。
+def frame_to_arrays(data):
+    days = frame_days(data)
+    values = np.ascontiguousarray(data[list(FIELDS)].to_numpy(dtype=np.float64).T)
+    return days, values
+
+
+# 日期数组和字段数组还原成与接口一致的 DataFrame。
+def arrays_to_frame(days, values):
+    data = pd.DataFrame(np.asarray(values).T, columns=FIELDS)
+    data.insert(0, 'date', [day_to_date_str(d) for d in days])
+    return data
+
+
+# 先写临时文件并落盘，再替换目标文件：进程崩溃或并发读取都不会看到写了一半的文件，
+# 已经被内存映射的旧文件也不会被截断。
+def atomic_write(path, write, mode='wb'):
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except Exception:
+        try:
+            os.remove(tmp_file)
+        except Exception:
+            pass
+        raise
+
+
+def _save_npy(path, array):
+    atomic_write(path, lambda f: np.save(f, array))
+
+
+# 文件的 inode、修改时间和大小，atomic_write 每次都会换成新文件，用来判断其他进程是否改写过。
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def checksum(*arrays):
+    crc = 0
+    for array in arrays:
+        crc = zlib.crc32(np.ascontiguousarray(array).tobytes(), crc)
+    return crc
+
+
+# 存储锁，同一个存储会被多个进程同时使用（每日任务、预热任务、缓存管理任务、web）。
+# 合并 staging、删除分区、写 coverage.json/integrity.json 时加排它锁，读取分区和元数据时加共享锁。
+# 进程内是读写锁：多个线程可以同时持有共享锁，排它锁只有一个线程持有；进程之间用 fcntl.flock，
+# 进程内有线程持有共享锁时持有 LOCK_SH，有线程持有排它锁时持有 LOCK_EX。
+# 内部的条件变量只保护层数和模式的记录，持锁期间的读写不在条件变量内，共享锁之间不会互相等待。
+# 同一个线程可以嵌套加锁；持有共享锁时要排它锁先放掉自己的共享锁再等待，升级不是原子的，
+# 拿到排它锁后调用方要重新检查状态。没有 fcntl 的系统（Windows）只在进程内加锁。
+class StoreLock:
+    def __init__(self, path):
+        self.path = path
+        self._cond = threading.Condition(threading.Lock())
+        self._file = None
+        self._readers = {}  # 线程 -> 共享锁层数
+        self._writer = None  # 持有排它锁的线程
+        self._writer_depth = 0
+        self._writer_readers = 0  # 持有排它锁的线程升级前的共享锁层数
+        self._waiting = 0  # 等待排它锁的线程数，有线程等待时新的共享锁排在后面
+
+    # mode 为 None 时关闭文件，即释放 flock。
+    def _flock(self, mode):
+        if mode is None:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            return
+        if fcntl is None:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a')
+        try:
+            fcntl.flock(self._file.fileno(), mode)
+        except Exception:
+            self._flock(None)
+            raise
+
+    def _acquire_shared(self, me):
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return True
+            if me in self._readers:
+                self._readers[me] += 1
+                return False
+            while self._writer is not None or self._waiting:
+                self._cond.wait()
+            if not self._readers:
+                self._flock(fcntl.LOCK_SH if fcntl is not None else 0)
+            self._readers[me] = 1
+            return False
+
+    def _release_shared(self, me):
+        with self._cond:
+            self._readers[me] -= 1
+            if self._readers[me] == 0:
+                del self._readers[me]
+                if not self._readers and self._writer is None:
+                    self._flock(None)
+                self._cond.notify_all()
+
+    def _acquire_exclusive(self, me):
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            # 升级：先放掉自己的共享锁，两个线程同时升级时不会互相等待。
+            readers = self._readers.pop(me, 0)
+            self._waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._flock(fcntl.LOCK_EX if fcntl is not None else 0)
+            except BaseException:
+                if readers:
+                    self._readers[me] = readers
+                self._cond.notify_all()
+                raise
+            finally:
+                self._waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+            self._writer_readers = readers
+
+    def _release_exclusive(self, me):
+        with self._cond:
+            self._writer_depth -= 1
+            if self._writer_depth > 0:
+                return
+            self._writer = None
+            readers, self._writer_readers = self._writer_readers, 0
+            if readers:
+                # 降回升级前的共享锁。
+                self._readers[me] = readers
+                self._flock(fcntl.LOCK_SH if fcntl is not None else 0)
+            else:
+                self._flock(None)
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def hold(self, exclusive=True):
+        me = threading.get_ident()
+        if exclusive:
+            self._acquire_exclusive(me)
+            try:
+                yield
+            finally:
+                self._release_exclusive(me)
+        elif self._acquire_shared(me):
+            # 已经持有排它锁，沿用。
+            try:
+                yield
+            finally:
+                self._release_exclusive(me)
+        else:
+            try:
+                yield
+            finally:
+                self._release_shared(me)
+
+
+class HistStore:
+    def __init__(self, root):
+        self.root = root
+        self.staging_path = os.path.join(root, 'staging')
+        self.coverage_file = os.path.join(root, 'coverage.json')
+        self.integrity_file = os.path.join(root, 'integrity.json')
+        self.quarantine_path = os.path.join(root, 'quarantine')
+        # 只保护内存中的状态，持有 self._lock 时不再加存储锁，加锁顺序总是 存储锁 -> self._lock。
+        self._lock = threading.RLock()
+        self._store_lock = StoreLock(os.path.join(root, 'store.lock'))
+        self._partitions = None
+        self._mapped = {}
+        self._coverage = None
+        self._integrity = None
+        self._coverage_signature = None
+        self._integrity_signature = None
+        self._quarantined = 0
+        self._access = {}
+        self.stats = {'hit': 0, 'miss': 0, 'append': 0}
+        try:
+            if not os.path.exists(self.staging_path):
+                os.makedirs(self.staging_path)
+        except Exception:
+            pass
+
+    def partition_dir(self, day):
+        return os.path.join(self.root, day[0:6], day)
+
+    # 加存储锁，exclusive=False 为共享锁。
+    def locked(self, exclusive=True):
+        return self._store_lock.hold(exclusive)
+
+    # 交易日分区列表，yyyymmdd 字符串升序，可按 [start, end] 截取。
+    def partitions(self, start=None, end=None):
+        with self.locked(False):
+            # 其他进程改写过 integrity.json 时重新扫描分区。
+            self._load_integrity()
+            with self._lock:
+                parts = self._partitions
+            if parts is None:
+                parts = []
+                if os.path.isdir(self.root):
+                    for month in os.listdir(self.root):
+                        if not (len(month) == 6 and month.isdigit()):
+                            continue
+                        month_dir = os.path.join(self.root, month)
+                        for day in os.listdir(month_dir):
+                            if len(day) == 8 and day.isdigit() and os.path.isfile(
+                                    os.path.join(month_dir, day, 'values.npy')):
+                                parts.append(day)
+                parts.sort()
+                with self._lock:
+                    self._partitions = parts
+        lo = 0 if start is None else bisect.bisect_left(parts, str(start))
+        hi = len(parts) if end is None else bisect.bisect_right(parts, str(end))
+        return parts[lo:hi]
+
+    # 内存映射读取一个交易日分区，返回 (codes, values)。
+    # 第一次读取时校验行数和校验和，校验失败的分区隔离后返回空数据。
+    def read_partition(self, day):
+        self._load_integrity()
+        with self._lock:
+            mapped = self._mapped.get(day)
+        if mapped is not None:
+            return mapped
+        with self.locked(False):
+            mapped, error = self._map_partition(day)
+            if error is None:
+                # 在共享锁内记录，不会记下已经被其他线程重写的分区。
+                self._remember(day, mapped)
+                return mapped
+        with self.locked():
+            # 共享锁升级为排它锁不是原子的，期间分区可能被其他线程、进程重写或删除：
+            # 按磁盘上最新的状态再检查一次，仍然失败才隔离。
+            with self._lock:
+                mapped = self._mapped.get(day)
+            if mapped is None:
+                mapped, retry_error = self._map_partition(day)
+            if mapped is None:
+                if day in self.partitions(day, day):
+                    logging.error(f"store.HistStore.read_partition处理异常：{day}分区{error}")
+                    self.quarantine_partition(day)
+                return np.empty(0, dtype=CODE_DTYPE), np.empty((len(FIELDS), 0))
+            self._remember(day, mapped)
+        return mapped
+
+    def _remember(self, day, mapped):
+        with self._lock:
+            self._mapped[day] = mapped
+            self._access[day] = time.time()
+
+    def _map_partition(self, day):
+        part_dir = self.partition_dir(day)
+        try:
+            codes = np.load(os.path.join(part_dir, 'codes.npy'), mmap_mode='r')
+            values = np.load(os.path.join(part_dir, 'values.npy'), mmap_mode='r')
+            error = self._check_partition(day, codes, values)
+        except Exception as e:
+            error = e
+        if error is not None:
+            return None, error
+        return (codes, values), None
+
+    def _check_partition(self, day, codes, values):
+        if values.ndim != 2 or values.shape[0] != len(FIELDS) or values.shape[1] != len(codes):
+            return f"行数不一致{codes.shape}{values.shape}"
+        entry = self._load_integrity().get(day)
+        if entry is None:
+            return None
+        if entry['rows'] != len(codes):
+            return f"行数{len(codes)}和记录{entry['rows']}不一致"
+        if entry['crc'] != checksum(codes, values):
+            return "校验和不一致"
+        return None
+
+    # 校验全部交易日分区，返回被隔离的分区。
+    def verify(self):
+        bad = []
+        for day in self.partitions():
+            with self._lock:
+                self._mapped.pop(day, None)
+            codes, values = self.read_partition(day)
+            if len(codes) == 0 and day not in self.partitions(day, day):
+                bad.append(day)
+        return bad
+
+    # 隔离校验失败的交易日分区，覆盖这一天的股票下次读取时重新抓取。
+    def quarantine_partition(self, day):
+        with self.locked():
+            self._quarantined += 1
+            self._mapped.pop(day, None)
+            try:
+                if not os.path.exists(self.quarantine_path):
+                    os.makedirs(self.quarantine_path)
+                os.replace(self.partition_dir(day),
+                           os.path.join(self.quarantine_path, f"{day}.{int(time.time())}"))
+            except Exception as e:
+                logging.error(f"store.HistStore.quarantine_partition处理异常：{day}分区{e}")
+                shutil.rmtree(self.partition_dir(day), ignore_errors=True)
+            self.remove_partitions([day])
+
+    # 删除写入中断留下的临时文件。
+    def cleanup_tmp(self, max_age=3600):
+        removed = 0
+        now = time.time()
+        for root, dirs, files in os.walk(self.root):
+            for f in files:
+                if not f.endswith('.tmp'):
+                    continue
+                file_path = os.path.join(root, f)
+                try:
+                    if now - os.path.getmtime(file_path) > max_age:
+                        os.remove(file_path)
+                        removed += 1
+                except Exception:
+                    pass
+        return removed
+
+    # 命中统计，由缓存管理汇总到 manifest。
+    def count(self, key, n=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    # 取出并清空本进程的访问时间和命中统计。
+    def drain_usage(self):
+        with self._lock:
+            access, stats = self._access, self.stats
+            self._access = {}
+            self.stats = {key: 0 for key in stats}
+        return access, stats
+
+    # 删除交易日分区，被删除日期之前的数据不再算作已覆盖。
+    def remove_partitions(self, days):
+        days = sorted(days)
+        if not days:
+            return 0
+        with self.locked():
+            for day in days:
+                self._mapped.pop(day, None)
+                shutil.rmtree(self.partition_dir(day), ignore_errors=True)
+                month_dir = os.path.join(self.root, day[0:6])
+                try:
+                    if not os.listdir(month_dir):
+                        os.rmdir(month_dir)
+                except Exception:
+                    pass
+            self._partitions = None
+            integrity = self._load_integrity()
+            for day in days:
+                integrity.pop(day, None)
+            self._save_integrity()
+            remain = self.partitions()
+            coverage = dict(self._load_coverage())
+            for code, span in list(coverage.items()):
+                # 区间内最后一个被删除的交易日之后的数据才是连续的。
+                idx = bisect.bisect_right(days, span[1]) - 1
+                if idx < 0 or days[idx] < span[0]:
+                    continue
+                nxt = bisect.bisect_right(remain, days[idx])
+                if nxt >= len(remain) or remain[nxt] > span[1]:
+                    del coverage[code]
+                else:
+                    coverage[code] = [remain[nxt], span[1]]
+            self._save_coverage(coverage)
+        return len(days)
+
+    # 写交易日分区，行数和校验和记录到 integrity.json，需要之后调用 _save_integrity() 落盘。
+    def write_partition(self, day, codes, values):
+        order = np.argsort(codes, kind='stable')
+        codes = np.asarray(codes, dtype=CODE_DTYPE)[order]
+        values = np.ascontiguousarray(values[:, order], dtype=np.float64)
+        part_dir = self.partition_dir(day)
+        with self.locked():
+            if not os.path.exists(part_dir):
+                os.makedirs(part_dir)
+            _save_npy(os.path.join(part_dir, 'values.npy'), values)
+            _save_npy(os.path.join(part_dir, 'codes.npy'), codes)
+            self._load_integrity()[day] = {'rows': len(codes), 'crc': checksum(codes, values)}
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            if os.path.isfile(path):
+                with open(path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"store.HistStore._read_json处理异常：{path}{e}")
+        return {}
+
+    # integrity.json 和 coverage.json 在进程内缓存，文件被其他进程改写后（_file_signature 变化）重新读取。
+    def _load_integrity(self):
+        signature = _file_signature(self.integrity_file)
+        with self._lock:
+            if self._integrity is not None and signature == self._integrity_signature:
+                return self._integrity
+        with self.locked(False), self._lock:
+            signature = _file_signature(self.integrity_file)
+            if self._integrity is None or signature != self._integrity_signature:
+                old = self._integrity
+                self._integrity = self._read_json(self.integrity_file)
+                self._integrity_signature = signature
+                if old is not None:
+                    # 其他进程合并或删除过分区：校验信息变化的分区重新映射，分区列表重新扫描。
+                    for day in set(old) | set(self._integrity):
+                        if old.get(day) != self._integrity.get(day):
+                            self._mapped.pop(day, None)
+                    self._partitions = None
+            return self._integrity
+
+    def _save_integrity(self):
+        with self.locked():
+            integrity = dict(self._load_integrity())
+            atomic_write(self.integrity_file, lambda f: json.dump(integrity, f), 'w')
+            self._integrity_signature = _file_signature(self.integrity_file)
+
+    def _load_coverage(self):
+        signature = _file_signature(self.coverage_file)
+        with self._lock:
+            if self._coverage is not None and signature == self._coverage_signature:
+                return self._coverage
+        with self.locked(False), self._lock:
+            signature = _file_signature(self.coverage_file)
+            if self._coverage is None or signature != self._coverage_signature:
+                self._coverage = self._read_json(self.coverage_file)
+                self._coverage_signature = signature
+            return self._coverage
+
+    def _save_coverage(self, coverage):
+        with self.locked():
+            atomic_write(self.coverage_file, lambda f: json.dump(coverage, f), 'w')
+            self._coverage = coverage
+            self._coverage_signature = _file_signature(self.coverage_file)
+
+    def _staging_file(self, code):
+        return os.path.join(self.staging_path, f"{code}.npz")
+
+    # 读取 staging 数据，文件损坏或校验和不一致时隔离文件并返回None，这只股票会重新抓取。
+    def _read_staging(self, code):
+        staging_file = self._staging_file(code)
+        if not os.path.isfile(staging_file):
+            return None
+        try:
+            with np.load(staging_file) as npz:
+                days, values = npz['date'], npz['values']
+                span = tuple(str(s) for s in npz['span'])
+                append = bool(npz['append'])
+                crc, rows = int(npz['crc']), int(npz['rows'])
+            if rows != len(days) or values.shape != (len(FIELDS), rows) or crc != checksum(days, values):
+                raise ValueError("行数或校验和不一致")
+            return days, values, span, append
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"store.HistStore._read_staging处理异常：{code}代码{e}")
+            try:
+                if not os.path.exists(self.quarantine_path):
+                    os.makedirs(self.quarantine_path)
+                os.replace(staging_file, os.path.join(self.quarantine_path, f"{code}.{int(time.time())}.npz"))
+            except Exception:
+                pass
+        return None
+
+    # 合并已合并区间和 staging 区间，追加的数据接在已有区间之后。
+    @staticmethod
+    def _merge_span(span, staged_span, append):
+        if append and span is not None and span[0] <= staged_span[0] <= span[1]:
+            return span[0], staged_span[1]
+        return staged_span
+
+    # 股票已抓取的日期区间。
+    def coverage(self, code):
+        span = self._load_coverage().get(code)
+        span = None if span is None else tuple(span)
+        staged = self._read_staging(code)
+        if staged is not None:
+            return self._merge_span(span, staged[2], staged[3])
+        return span
+
+    def covers(self, code, start, end):
+        span = self.coverage(code)
+        return span is not None and span[0] <= str(start) and span[1] >= str(end)
+
+    # 新抓取的单只股票数据先写到 staging，多线程下每只股票一个文件，互不影响。
+    # append=True 表示只是追加在已有数据之后的新K线，否则 [start, end] 区间以这次数据为准。
+    def stage(self, code, data, start, end, append=False):
+        days, values = frame_to_arrays(data)
+        # 只保存 [start, end] 区间内的K线，盘中抓取到的当天未收盘K线不写入存储。
+        keep = days <= int(end)
+        if not keep.all():
+            days, values = days[keep], values[:, keep]
+        # 加共享锁，合并 staging 的过程中不会读写 staging 文件。
+        with self.locked(False):
+            staged = self._read_staging(code) if append else None
+            if staged is not None:
+                # 上一次追加的数据还没合并，接在一起保存。
+                s_days, s_values, s_span, s_append = staged
+                keep = s_days < days[0] if len(days) > 0 else np.ones(len(s_days), dtype=bool)
+                days = np.concatenate([s_days[keep], days])
+                values = np.concatenate([s_values[:, keep], values], axis=1)
+                start, append = s_span[0], s_append
+            days = np.asarray(days, dtype=np.int32)
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            atomic_write(self._staging_file(code), lambda f: np.savez(
+                f, date=days, values=values, span=np.array([str(start), str(end)]), append=np.array(append),
+                rows=np.array(len(days)), crc=np.array(checksum(days, values))))
+
+    # 读取单只股票 [start, end] 区间的数据，没有覆盖 [start, covered_end] 时返回None。
+    def load_code(self, code, start, end=None, covered_end=None):
+        span = self._load_coverage().get(code)
+        span = None if span is None else tuple(span)
+        staged = self._read_staging(code)
+        if staged is not None:
+            span = self._merge_span(span, staged[2], staged[3])
+        if covered_end is not None and (span is None or span[0] > str(start) or span[1] < str(covered_end)):
+            return None
+        if staged is None:
+            quarantined = self._quarantined
+            data = self.load_codes([code], start, end).get(code)
+            if quarantined != self._quarantined and covered_end is not None \
+                    and not self.covers(code, start, covered_end):
+                return None
+            return data
+
+        days, values, s_span, append = staged
+        mask = days >= int(start)
+        if end is not None:
+            mask &= days <= int(end)
+        data = arrays_to_frame(days[mask], values[:, mask])
+        if append and s_span[0] > str(start):
+            # staging 之前的部分从交易日分区读取。
+            prev = self.load_codes([code], start, str(int(s_span[0]) - 1)).get(code)
+            if prev is not None:
+                data = pd.concat([prev, data], ignore_index=True)
+        if len(data.index) == 0:
+            return None
+        return data
+
+    # 股票最后一根已保存的K线，返回 (yyyymmdd, 收盘价)，没有数据返回None。
+    def last_bar(self, code, start=None):
+        data = self.load_code(code, start if start is not None else '0')
+        if data is None or len(data.index) == 0:
+            return None
+        return data['date'].values[-1].replace('-', ''), float(data['close'].values[-1])
+
+    # 从交易日分区批量读取多只股票，返回 交易日列表、字段×股票×交易日 的数组、有效数据掩码。
+    def load_block(self, codes, start=None, end=None):
+        codes = np.asarray(codes, dtype=CODE_DTYPE)
+        days = self.partitions(start, end)
+        values = np.full((len(FIELDS), len(codes), len(days)), np.nan)
+        mask = np.zeros((len(codes), len(days)), dtype=bool)
+        if len(codes) == 0:
+            return days, values, mask
+        for j, day in enumerate(days):
+            p_codes, p_values = self.read_partition(day)
+            if len(p_codes) == 0:
+                continue
+            idx = np.searchsorted(p_codes, codes)
+            idx[idx >= len(p_codes)] = 0
+            hit = p_codes[idx] == codes
+            if hit.any():
+                values[:, hit, j] = p_values[:, idx[hit]]
+                mask[hit, j] = True
+        return days, values, mask
+
+    # 批量读取多只股票，返回 {code: DataFrame}，只包含有数据的股票。
+    def load_codes(self, codes, start=None, end=None):
+        result = {}
+        codes = list(codes)
+        if not codes:
+            return result
+        days, values, mask = self.load_block(codes, start, end)
+        date_str = np.array([day_to_date_str(d) for d in days], dtype=object)
+        for i, code in enumerate(codes):
+            m = mask[i]
+            if not m.any():
+                continue
+            data = pd.DataFrame(values[:, i, m].T, columns=FIELDS)
+            data.insert(0, 'date', date_str[m])
+            result[code] = data
+        return result
+
+    # 批量读取：[start, covered_end] 被覆盖的股票从存储中读取，返回 {code: DataFrame}。
+    def load_covered(self, codes, start, covered_end, end=None):
+        result = {}
+        compacted = []
+        coverage = self._load_coverage()
+        for code in codes:
+            if os.path.isfile(self._staging_file(code)):
+                data = self.load_code(code, start, end, covered_end)
+                if data is not None:
+                    result[code] = data
+                continue
+            span = coverage.get(code)
+            if span is not None and span[0] <= str(start) and span[1] >= str(covered_end):
+                compacted.append(code)
+        quarantined = self._quarantined
+        frames = self.load_codes(compacted, start, end)
+        if quarantined != self._quarantined:
+            # 读取过程中有分区校验失败，受影响的股票不再算作命中。
+            frames = {code: data for code, data in frames.items() if self.covers(code, start, covered_end)}
+        result.update(frames)
+        return result
+
+    # 把 staging 中的数据合并进交易日分区，批量任务结束后调用一次。
+    def compact(self):
+        with self.locked():
+            try:
+                staging_files = [f for f in os.listdir(self.staging_path) if f.endswith('.npz')]
+            except Exception:
+                return 0
+            if not staging_files:
+                return 0
+
+            codes, spans, appends, all_codes, all_days, all_values, done = [], [], [], [], [], [], []
+            for staging_file in staging_files:
+                code = staging_file[:-4]
+                file_path = os.path.join(self.staging_path, staging_file)
+                try:
+                    mtime = os.path.getmtime(file_path)
+                    staged = self._read_staging(code)
+                except Exception as e:
+                    logging.error(f"store.HistStore.compact处理异常：{code}代码{e}")
+                    continue
+                if staged is None:
+                    continue
+                days, values, span, append = staged
+                codes.append(code)
+                appends.append(append)
+                spans.append((int(span[0]), int(span[1])))
+                all_codes.append(np.full(len(days), code, dtype=CODE_DTYPE))
+                all_days.append(days)
+                all_values.append(values)
+                done.append((file_path, mtime))
+            if not codes:
+                return 0
+
+            codes = np.asarray(codes, dtype=CODE_DTYPE)
+            spans = np.asarray(spans, dtype=np.int64)
+            all_codes = np.concatenate(all_codes)
+            all_days = np.concatenate(all_days)
+            all_values = np.concatenate(all_values, axis=1)
+
+            order = np.lexsort((all_codes, all_days))
+            all_codes, all_days, all_values = all_codes[order], all_days[order], all_values[:, order]
+            new_days, first = np.unique(all_days, return_index=True)
+            bounds = dict(zip((str(d) for d in new_days), zip(first, np.append(first[1:], len(all_days)))))
+
+            affected = set(bounds.keys())
+            affected.update(self.partitions(str(spans[:, 0].min()), str(spans[:, 1].max())))
+            for day in sorted(affected):
+                day_int = int(day)
+                replaced = codes[(spans[:, 0] <= day_int) & (spans[:, 1] >= day_int)]
+                if day in self.partitions(day, day):
+                    p_codes, p_values = self.read_partition(day)
+                    keep = ~np.isin(p_codes, replaced)
+                    if keep.all() and day not in bounds:
+                        continue
+                    p_codes, p_values = np.asarray(p_codes)[keep], np.asarray(p_values)[:, keep]
+                else:
+                    p_codes = np.empty(0, dtype=CODE_DTYPE)
+                    p_values = np.empty((len(FIELDS), 0))
+                if day in bounds:
+                    lo, hi = bounds[day]
+                    p_codes = np.concatenate([p_codes, all_codes[lo:hi]])
+                    p_values = np.concatenate([p_values, all_values[:, lo:hi]], axis=1)
+                self.write_partition(day, p_codes, p_values)
+                self._mapped.pop(day, None)
+            self._partitions = None
+            # 分区写完后再记录校验信息和覆盖区间，中途崩溃时 staging 文件还在，下次会重新合并。
+            self._save_integrity()
+
+            coverage = dict(self._load_coverage())
+            for code, (start, end), append in zip(codes, spans, appends):
+                old = coverage.get(str(code))
+                coverage[str(code)] = list(self._merge_span(old, (str(start), str(end)), append))
+            self._save_coverage(coverage)
+
+            for file_path, mtime in done:
+                try:
+                    if os.path.getmtime(file_path) == mtime:
+                        os.remove(file_path)
+                except Exception:
+                    pass
+            return len(codes)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# 每种复权方式一个存储实例，进程内共享。
+def get_store(adjust=''):
+    with _stores_lock:
+        store = _stores.get(adjust)
+        if store is None:
+            store = HistStore(os.path.join(store_path, ADJUST_DIRS[adjust]))
+            _stores[adjust] = store
+        return store
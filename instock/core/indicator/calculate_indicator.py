@@ -5,6 +5,7 @@ import logging
 import pandas as pd
 import numpy as np
 import talib as tl
+import instock.core.indicator.kernels as knl
 
 __author__ = 'myh '
 __date__ = '2023/3/10 '
@@ -227,51 +228,8 @@ def get_indicators(data, end_date=None, threshold=120, calc_threshold=None):
             data.loc[:, 'hl_avg'] = (data['high'].values + data['low'].values) / 2.0
             data.loc[:, 'b_ub'] = data['hl_avg'].values + data['m_atr'].values
             data.loc[:, 'b_lb'] = data['hl_avg'].values - data['m_atr'].values
-            size = len(data.index)
-            ub = np.empty(size, dtype=np.float64)
-            lb = np.empty(size, dtype=np.float64)
-            st = np.empty(size, dtype=np.float64)
-            for i in range(size):
-                if i == 0:
-                    ub[i] = data['b_ub'].iloc[i]
-                    lb[i] = data['b_lb'].iloc[i]
-                    if data['close'].iloc[i] <= ub[i]:
-                        st[i] = ub[i]
-                    else:
-                        st[i] = lb[i]
-                    continue
-
-                last_close = data['close'].iloc[i - 1]
-                curr_close = data['close'].iloc[i]
-                last_ub = ub[i - 1]
-                last_lb = lb[i - 1]
-                last_st = st[i - 1]
-                curr_b_ub = data['b_ub'].iloc[i]
-                curr_b_lb = data['b_lb'].iloc[i]
-
-                # calculate current upper band
-                if curr_b_ub < last_ub or last_close > last_ub:
-                    ub[i] = curr_b_ub
-                else:
-                    ub[i] = last_ub
-
-                # calculate current lower band
-                if curr_b_lb > last_lb or last_close < last_lb:
-                    lb[i] = curr_b_lb
-                else:
-                    lb[i] = last_lb
-
-                # calculate supertrend
-                if last_st == last_ub:
-                    if curr_close <= ub[i]:
-                        st[i] = ub[i]
-                    else:
-                        st[i] = lb[i]
-                elif last_st == last_lb:
-                    if curr_close > lb[i]:
-                        st[i] = lb[i]
-                    else:
-                        st[i] = ub[i]
+            # 递推计算在数组上进行，见 instock.core.indicator.kernels
+            ub, lb, st = knl.supertrend(data['close'].values, data['b_ub'].values, data['b_lb'].values)
 
             data.loc[:, 'supertrend_ub'] = ub
             data.loc[:, 'supertrend_lb'] = lb
@@ -422,8 +380,8 @@ def get_indicator(code_name, data, stock_column, date=None, calc_threshold=90):
         # 设置返回数组。
         stock_data_list = [end_date, code]
         columns_num = len(stock_column) - 2
-        # 增加空判断，如果是空返回 0 数据。
-        if len(data.index) <= 1:
+        # 增加空判断，如果是空或者计算日期之前没有数据返回 0 数据。
+        if len(data.index) <= 1 or str(data['date'].values[0])[0:10] > end_date:
             for i in range(columns_num):
                 stock_data_list.append(0)
             return pd.Series(stock_data_list, index=stock_column)
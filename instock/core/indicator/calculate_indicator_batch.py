@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import instock.core.tablestructure as tbs
+import instock.core.indicator.kernels as knl
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 全市场批量计算指标，结果和 calculate_indicator.get_indicators 一致（浮点误差以内）。
+# 输入是 股票×交易日 的二维数组（每行是一只股票连续的K线，没有空缺），一次计算所有股票：
+#   移动平均、滚动求和用累加和沿时间轴计算，滚动最大最小用滑动窗口视图计算；
+#   EMA、RSI、ATR、SAR、超级趋势等递推指标使用 instock.core.indicator.kernels，一次计算一批股票。
+# 递推的起点和 TA-Lib 保持一致，例如 MACD 的快线 EMA 从慢线的起点开始、以前12日均值为初值。
+# 输出列为 tbs.STOCK_STATS_DATA 的全部指标。
+
+INPUT_FIELDS = ('open', 'close', 'high', 'low', 'volume', 'amount', 'p_change')
+COLUMNS = tuple(tbs.STOCK_STATS_DATA['columns'])
+
+
+def _nan(x):
+    return np.where(np.isnan(x), 0.0, x)
+
+
+def _finite(x):
+    return np.where(np.isfinite(x), x, 0.0)
+
+
+def _is_zero(x):
+    return (x > -1e-8) & (x < 1e-8)
+
+
+def _shift(x, n=1, fill=0.0):
+    out = np.full(x.shape, fill, dtype=np.float64)
+    if n < x.shape[1]:
+        out[:, n:] = x[:, :x.shape[1] - n]
+    return out
+
+
+def _diff0(x):
+    out = np.zeros(x.shape, dtype=np.float64)
+    out[:, 1:] = np.diff(x, axis=1)
+    return out
+
+
+# 按时间顺序累加的和，和 TA-Lib 逐个累加的结果完全一致。
+def _seq_sum(x):
+    return np.cumsum(x, axis=1)[:, -1]
+
+
+# 滚动求和（TA-Lib SUM），前 n-1 列为 NaN。
+# TA-Lib 用一个累计值逐步加上新值、减去移出窗口的值，这里把 加、减 交错排成一个序列后沿时间轴累加，
+# 一次 cumsum 得到和 TA-Lib 完全相同的结果。subtract_first 为 True 时先减后加（MFI 的顺序）。
+def _sum(x, n, subtract_first=False):
+    n_codes, n_days = x.shape
+    out = np.full(x.shape, np.nan)
+    if n_days < n:
+        return out
+    head = n if subtract_first else n - 1
+    steps = n_days - head
+    seq = np.empty((n_codes, head + 2 * steps))
+    seq[:, :head] = x[:, :head]
+    if subtract_first:
+        seq[:, head::2] = -x[:, :steps]
+        seq[:, head + 1::2] = x[:, head:]
+    else:
+        seq[:, head::2] = x[:, head:]
+        seq[:, head + 1::2] = -x[:, :steps]
+    c = np.cumsum(seq, axis=1)
+    if subtract_first:
+        out[:, n - 1] = c[:, n - 1]
+        out[:, n:] = c[:, n + 1::2]
+    else:
+        out[:, n - 1:] = c[:, n - 1::2]
+    return out
+
+
+# 简单移动平均（TA-Lib MA/SMA）。
+def _ma(x, n):
+    return _sum(x, n) / n
+
+
+def _max(x, n):
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= n:
+        out[:, n - 1:] = sliding_window_view(x, n, axis=1).max(axis=-1)
+    return out
+
+
+def _min(x, n):
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= n:
+        out[:, n - 1:] = sliding_window_view(x, n, axis=1).min(axis=-1)
+    return out
+
+
+# 变动率（TA-Lib ROC），基期为0时为0。
+def _roc(x, n):
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] <= n:
+        return out
+    prev = x[:, :-n]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, n:] = np.where(prev != 0, (x[:, n:] / prev - 1.0) * 100, 0.0)
+    return out
+
+
+def _macd(close, fast=12, slow=26, signal=9):
+    start = slow - 1
+    macd = knl.ema(close, fast, start) - knl.ema(close, slow, start)
+    lookback = start + signal - 1
+    macds = knl.ema(macd, signal, lookback)
+    macd[:, :lookback] = np.nan
+    return macd, macds, macd - macds
+
+
+# KDJ（TA-Lib STOCH，slowk、slowd 为 EMA）。
+def _stoch(high, low, close, fastk=9, slowk=5, slowd=5):
+    hh, ll = _max(high, fastk), _min(low, fastk)
+    diff = (hh - ll) / 100.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = np.where(diff != 0, (close - ll) / diff, 0.0)
+    k[:, :fastk - 1] = np.nan
+    k = knl.ema(k, slowk, fastk + slowk - 2)
+    lookback = fastk + slowk + slowd - 3
+    d = knl.ema(k, slowd, lookback)
+    k[:, :lookback] = np.nan
+    return k, d
+
+
+def _bbands(close, n=20, nbdev=2.0):
+    mid = _ma(close, n)
+    var = _sum(close * close, n) / n - mid * mid
+    positive = var >= 1e-8
+    std = np.where(positive, np.sqrt(np.where(positive, var, 0.0)), 0.0) * nbdev
+    std[np.isnan(mid)] = np.nan
+    return mid + std, mid, mid - std
+
+
+def _trix(close, n):
+    e = knl.ema(knl.ema(knl.ema(close, n), n, 2 * (n - 1)), n, 3 * (n - 1))
+    return _roc(e, 1)
+
+
+def _tema(close, n):
+    e1 = knl.ema(close, n)
+    e2 = knl.ema(e1, n, 2 * (n - 1))
+    e3 = knl.ema(e2, n, 3 * (n - 1))
+    return 3 * e1 - 3 * e2 + e3
+
+
+# 相对强弱（TA-Lib RSI，Wilder 平滑）。
+def _rsi(close, n):
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] <= n:
+        return out
+    d = np.diff(close, axis=1)
+    ag = knl.wilder(np.where(d > 0, d, 0.0), n)
+    al = knl.wilder(np.where(d < 0, -d, 0.0), n)
+    total = ag + al
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, 1:] = np.where(_is_zero(total), 0.0, 100 * (ag / total))
+    out[:, :n] = np.nan
+    return out
+
+
+# 平均真实波幅（TA-Lib ATR，Wilder 平滑）。
+def _atr(high, low, close, n):
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] <= n:
+        return out
+    prev = close[:, :-1]
+    tr = np.maximum(np.maximum(high[:, 1:] - low[:, 1:], np.abs(high[:, 1:] - prev)), np.abs(low[:, 1:] - prev))
+    out[:, 1:] = knl.wilder(tr, n)
+    return out
+
+
+def _willr(high, low, close, n):
+    hh, ll = _max(high, n), _min(low, n)
+    diff = (hh - ll) / -100.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(diff != 0, (hh - close) / diff, 0.0)
+    out[np.isnan(hh)] = np.nan
+    return out
+
+
+def _cci(high, low, close, n):
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] < n:
+        return out
+    tp = (high + low + close) / 3
+    window = sliding_window_view(tp, n, axis=1)
+    avg = window.sum(axis=-1) / n
+    dev = np.abs(window - avg[..., np.newaxis]).sum(axis=-1)
+    last = tp[:, n - 1:] - avg
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, n - 1:] = np.where((last != 0) & (dev != 0), last / (0.015 * (dev / n)), 0.0)
+    return out
+
+
+def _mfi(high, low, close, volume, n):
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] <= n:
+        return out
+    tp = (high + low + close) / 3
+    flow = tp[:, 1:] * volume[:, 1:]
+    d = np.diff(tp, axis=1)
+    d[_is_zero(d)] = 0.0
+    pos = _sum(np.where(d > 0, flow, 0.0), n, subtract_first=True)
+    neg = _sum(np.where(d < 0, flow, 0.0), n, subtract_first=True)
+    total = pos + neg
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, 1:] = np.where(total < 1.0, 0.0, 100 * (pos / total))
+    out[:, :n] = np.nan
+    return out
+
+
+def _ppo(close, fast=12, slow=26):
+    start = slow - 1
+    f, s = knl.ema(close, fast), knl.ema(close, slow)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(_is_zero(s), 0.0, (f - s) / s * 100)
+    out[np.isnan(s)] = np.nan
+    return out
+
+
+def _obv(close, volume):
+    step = np.zeros(close.shape, dtype=np.float64)
+    d = np.diff(close, axis=1)
+    step[:, 1:] = np.where(d > 0, volume[:, 1:], np.where(d < 0, -volume[:, 1:], 0.0))
+    step[:, 0] = volume[:, 0]
+    return np.cumsum(step, axis=1)
+
+
+def compute(fields):
+    """
+    批量计算指标
+    :param fields: {字段: 股票×交易日 的数组}，字段为 INPUT_FIELDS，每行是一只股票连续的K线
+    :return: {指标: 股票×交易日 的数组}，指标为 tbs.STOCK_STATS_DATA 的全部列
+    """
+    f = {name: np.asarray(fields[name], dtype=np.float64) for name in INPUT_FIELDS}
+    o, c, h, l, v, a = f['open'], f['close'], f['high'], f['low'], f['volume'], f['amount']
+    r = {'close': c}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # macd
+        r['macd'], r['macds'], r['macdh'] = (_nan(x) for x in _macd(c))
+
+        # kdj
+        k, d = _stoch(h, l, c)
+        r['kdjk'], r['kdjd'] = _nan(k), _nan(d)
+        r['kdjj'] = 3 * r['kdjk'] - 2 * r['kdjd']
+
+        # boll
+        r['boll_ub'], r['boll'], r['boll_lb'] = (_nan(x) for x in _bbands(c))
+
+        # trix
+        r['trix'] = _nan(_trix(c, 12))
+        r['trix_20_sma'] = _nan(_ma(r['trix'], 20))
+
+        # cr
+        m_price = a / v
+        m_price_sf1 = _shift(m_price)
+        h_m = h - np.minimum(m_price_sf1, h)
+        m_l = m_price_sf1 - np.minimum(m_price_sf1, l)
+        r['cr'] = _finite(_sum(h_m, 26) / _sum(m_l, 26)) * 100
+        r['cr-ma1'] = _nan(_ma(r['cr'], 5))
+        r['cr-ma2'] = _nan(_ma(r['cr'], 10))
+        r['cr-ma3'] = _nan(_ma(r['cr'], 20))
+
+        # rsi
+        r['rsi'] = _nan(_rsi(c, 14))
+        r['rsi_6'] = _nan(_rsi(c, 6))
+        r['rsi_12'] = _nan(_rsi(c, 12))
+        r['rsi_24'] = _nan(_rsi(c, 24))
+
+        # vr
+        p_change = f['p_change']
+        avs = _sum(np.where(p_change > 0, v, 0.0), 26)
+        bvs = _sum(np.where(p_change < 0, v, 0.0), 26)
+        cvs = _sum(np.where(p_change == 0, v, 0.0), 26)
+        r['vr'] = _finite((avs + cvs / 2) / (bvs + cvs / 2)) * 100
+        r['vr_6_sma'] = _nan(_ma(r['vr'], 6))
+
+        # atr
+        prev_close = _shift(c)
+        h_l = h - l
+        h_cy = h - prev_close
+        cy_l = prev_close - l
+        r['tr'] = _nan(np.fmax(np.fmax(h_l, np.abs(h_cy)), np.abs(cy_l)))
+        r['atr'] = _nan(_atr(h, l, c, 14))
+
+        # dmi，stockstats计算公式
+        high_delta = _diff0(h)
+        high_m = (high_delta + np.abs(high_delta)) / 2
+        low_delta = -_diff0(l)
+        low_m = (low_delta + np.abs(low_delta)) / 2
+        pdm = _nan(knl.ema(np.where(high_m > low_m, high_m, 0.0), 14))
+        r['pdi'] = _finite(pdm / r['atr']) * 100
+        mdm = _nan(knl.ema(np.where(low_m > high_m, low_m, 0.0), 14))
+        r['mdi'] = _finite(mdm / r['atr']) * 100
+        r['dx'] = _finite(np.abs(r['pdi'] - r['mdi']) / (r['pdi'] + r['mdi'])) * 100
+        r['adx'] = _nan(knl.ema(r['dx'], 6))
+        r['adxr'] = _nan(knl.ema(r['adx'], 6))
+
+        # wr
+        r['wr_6'] = _nan(_willr(h, l, c, 6))
+        r['wr_10'] = _nan(_willr(h, l, c, 10))
+        r['wr_14'] = _nan(_willr(h, l, c, 14))
+
+        # cci
+        r['cci'] = _nan(_cci(h, l, c, 14))
+        r['cci_84'] = _nan(_cci(h, l, c, 84))
+
+        # dma
+        ma10 = _nan(_ma(c, 10))
+        ma50 = _nan(_ma(c, 50))
+        r['dma'] = ma10 - ma50
+        r['dma_10_sma'] = _nan(_ma(r['dma'], 10))
+
+        # tema
+        r['tema'] = _nan(_tema(c, 14))
+
+        # mfi
+        r['mfi'] = _nan(_mfi(h, l, c, v, 14))
+        r['mfisma'] = _ma(r['mfi'], 6)
+
+        # vwma
+        r['vwma'] = _finite(_sum(a, 14) / _sum(v, 14))
+        r['mvwma'] = _ma(r['vwma'], 6)
+
+        # ppo
+        r['ppo'] = _nan(_ppo(c))
+        r['ppos'] = _nan(knl.ema(r['ppo'], 9))
+        r['ppoh'] = r['ppo'] - r['ppos']
+
+        # stochrsi，stockstats计算公式
+        rsi_min, rsi_max = _min(r['rsi'], 14), _max(r['rsi'], 14)
+        r['stochrsi_k'] = _finite((r['rsi'] - rsi_min) / (rsi_max - rsi_min)) * 100
+        r['stochrsi_d'] = _ma(r['stochrsi_k'], 3)
+
+        # wt
+        esa = _nan(knl.ema(m_price, 10))
+        esa_d = knl.ema(np.abs(m_price - esa), 10)
+        esa_ci = _finite((m_price - esa) / (0.015 * esa_d))
+        r['wt1'] = _nan(knl.ema(esa_ci, 21))
+        r['wt2'] = _nan(_ma(r['wt1'], 4))
+
+        # supertrend
+        m_atr = r['atr'] * 3
+        hl_avg = (h + l) / 2.0
+        r['supertrend_ub'], r['supertrend_lb'], r['supertrend'] = knl.supertrend(c, hl_avg + m_atr, hl_avg - m_atr)
+
+        # roc
+        r['roc'] = _nan(_roc(c, 12))
+        r['rocma'] = _nan(_ma(r['roc'], 6))
+        r['rocema'] = _nan(knl.ema(r['roc'], 9))
+
+        # obv
+        r['obv'] = _nan(_obv(c, v))
+
+        # sar
+        r['sar'] = _nan(knl.sar(h, l))
+
+        # psy
+        r['psy'] = _nan(_sum(np.where(c > prev_close, 1.0, 0.0), 12) / 12.0) * 100
+        r['psyma'] = _ma(r['psy'], 6)
+
+        # brar
+        r['ar'] = _finite(_sum(h - o, 26) / _sum(o - l, 26)) * 100
+        r['br'] = _finite(_sum(h_cy, 26) / _sum(cy_l, 26)) * 100
+
+        # emv
+        prev_high, prev_low = _shift(h), _shift(l)
+        emva_em = (hl_avg - (prev_high + prev_low) / 2.0) * h_l / a
+        r['emv'] = _nan(_sum(emva_em, 14))
+        r['emva'] = _nan(_ma(r['emv'], 9))
+
+        # bias
+        ma6 = _nan(_ma(c, 6))
+        ma12 = _nan(_ma(c, 12))
+        ma24 = _nan(_ma(c, 24))
+        r['bias'] = _finite((c - ma6) / ma6) * 100
+        r['bias_12'] = _finite((c - ma12) / ma12) * 100
+        r['bias_24'] = _finite((c - ma24) / ma24) * 100
+
+        # dpo
+        r['dpo'] = _nan(c - _shift(_ma(c, 11)))
+        r['madpo'] = _nan(_ma(r['dpo'], 6))
+
+        # vhf
+        hcp_lcp = _nan(_max(c, 28) - _min(c, 28))
+        r['vhf'] = _nan(hcp_lcp / _sum(np.abs(c - prev_close), 28))
+
+        # rvi
+        prev_open = _shift(o)
+        rvi_x = ((c - o) + 2 * (prev_close - prev_open) + 2 * (_shift(c, 2) - _shift(o, 2)) +
+                 (_shift(c, 3) - _shift(o, 3))) / 6
+        rvi_y = ((h - l) + 2 * (prev_high - prev_low) + 2 * (_shift(h, 2) - _shift(l, 2)) +
+                 (_shift(h, 3) - _shift(l, 3))) / 6
+        rvi = _finite(_ma(rvi_x, 10) / _ma(rvi_y, 10))
+        r['rvi'] = rvi
+        r['rvis'] = (rvi + 2 * _shift(rvi, 1) + 2 * _shift(rvi, 2) + _shift(rvi, 3)) / 6
+
+        # fi
+        r['fi'] = _diff0(c) * v
+        r['force_2'] = _nan(knl.ema(r['fi'], 2))
+        r['force_13'] = _nan(knl.ema(r['fi'], 13))
+
+        # ene
+        r['ene_ue'] = (1 + 11 / 100) * ma10
+        r['ene_le'] = (1 - 9 / 100) * ma10
+        r['ene'] = (r['ene_ue'] + r['ene_le']) / 2
+
+        # vol
+        r['vol_5'] = _nan(_ma(v, 5))
+        r['vol_10'] = _nan(_ma(v, 10))
+
+        # ma
+        r['ma20'] = _nan(_ma(c, 20))
+        r['ma200'] = _nan(_ma(c, 200))
+    return {name: r[name] for name in COLUMNS}
+
+
+# 从面板数据中取出每只股票截止 end 列的最后 length 根K线（跳过停牌），按K线数量分组，
+# 返回 [(行号数组, {字段: 行数×K线数 的数组}), ...]。
+def panel_windows(panel, ends, length):
+    n_days = panel.mask.shape[1]
+    mask = panel.mask & (np.arange(n_days)[np.newaxis, :] <= np.asarray(ends)[:, np.newaxis])
+    rank = np.cumsum(mask, axis=1)
+    count = rank[:, -1] if n_days > 0 else np.zeros(len(mask), dtype=np.int64)
+    size = np.minimum(count, length)
+    selected = mask & (rank > (count - size)[:, np.newaxis])
+    groups = []
+    for n in np.unique(size):
+        if n == 0:
+            continue
+        rows = np.flatnonzero(size == n)
+        sel = selected[rows]
+        groups.append((rows, {name: panel[name][rows][sel].reshape(len(rows), n) for name in INPUT_FIELDS}))
+    return groups
+
+
+def get_indicators_panel(panel, date=None, calc_threshold=90):
+    """
+    全市场批量计算指标，对应逐只股票调用 calculate_indicator.get_indicator
+    :param panel: 面板数据 StockPanel
+    :param date: 计算日期，为None时使用每只股票的日期
+    :param calc_threshold: 每只股票使用最后多少根K线计算
+    :return: 每只股票计算日期的指标，列为 date、code 和 tbs.STOCK_STATS_DATA 的全部列，索引为面板的行号
+    :rtype: pandas.DataFrame
+    """
+    try:
+        if date is None:
+            end_dates = [key[0] for key in panel.keys]
+        else:
+            end_dates = [date.strftime("%Y-%m-%d")] * len(panel.keys)
+        ends = np.searchsorted(panel.calendar, np.asarray(end_dates, dtype='datetime64[D]'), side='right') - 1
+        values = np.zeros((len(panel.keys), len(COLUMNS)))
+        for rows, fields in panel_windows(panel, ends, calc_threshold):
+            result = compute(fields)
+            values[rows] = np.column_stack([result[name][:, -1] for name in COLUMNS])
+        # 只有一根K线、计算日期之前没有K线的股票指标全部为0，和 get_indicator 一致
+        values[panel.mask.sum(axis=1) <= 1] = 0.0
+        data = pd.DataFrame(_finite(values), columns=COLUMNS)
+        data.insert(0, 'code', panel.codes)
+        data.insert(0, 'date', end_dates)
+        return data
+    except Exception as e:
+        logging.error(f"calculate_indicator_batch.get_indicators_panel处理异常：{e}")
+    return None
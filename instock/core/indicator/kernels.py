@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import numpy as np
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 依赖前一根K线结果的递推指标（超级趋势、SAR、EMA、Wilder 平滑），直接在数组上计算，不经过 pandas。
+# 输入为 (股票数, 交易日数) 的二维数组（一维数组按一只股票处理），一次计算一批股票。
+# 安装了 numba 时逐元素的循环用 JIT 编译执行；没有安装时用 numpy 实现，按时间逐列递推，每一步对所有股票做向量运算。
+# 两种实现的运算顺序相同，结果一致（不开启 fastmath）。
+
+# 使用环境变量配置,docker -e 传递
+_jit = os.environ.get('indicator_jit', '1') != '0'
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+use_jit = numba is not None and _jit
+
+
+def _as_2d(*arrays):
+    return tuple(np.atleast_2d(np.asarray(x, dtype=np.float64)) for x in arrays)
+
+
+# ---------- 逐元素循环实现，numba 编译 ----------
+
+def _supertrend_loop(close, b_ub, b_lb, ub, lb, st):
+    n_codes, n_days = close.shape
+    for s in range(n_codes):
+        if n_days == 0:
+            continue
+        ub[s, 0] = b_ub[s, 0]
+        lb[s, 0] = b_lb[s, 0]
+        st[s, 0] = ub[s, 0] if close[s, 0] <= ub[s, 0] else lb[s, 0]
+        for i in range(1, n_days):
+            last_close = close[s, i - 1]
+            last_ub = ub[s, i - 1]
+            last_lb = lb[s, i - 1]
+            last_st = st[s, i - 1]
+            ub[s, i] = b_ub[s, i] if b_ub[s, i] < last_ub or last_close > last_ub else last_ub
+            lb[s, i] = b_lb[s, i] if b_lb[s, i] > last_lb or last_close < last_lb else last_lb
+            if last_st == last_ub:
+                st[s, i] = ub[s, i] if close[s, i] <= ub[s, i] else lb[s, i]
+            elif last_st == last_lb:
+                st[s, i] = lb[s, i] if close[s, i] > lb[s, i] else ub[s, i]
+            else:
+                st[s, i] = np.nan
+
+
+def _sar_loop(high, low, acceleration, maximum, out):
+    n_codes, n_days = high.shape
+    for s in range(n_codes):
+        if n_days < 2:
+            continue
+        diff_p = high[s, 1] - high[s, 0]
+        diff_m = low[s, 0] - low[s, 1]
+        is_long = not (diff_m > 0 and diff_p < diff_m)
+        af = acceleration
+        if is_long:
+            ep = high[s, 1]
+            sar = low[s, 0]
+        else:
+            ep = low[s, 1]
+            sar = high[s, 0]
+        new_low = low[s, 1]
+        new_high = high[s, 1]
+        for t in range(1, n_days):
+            prev_low = new_low
+            prev_high = new_high
+            new_low = low[s, t]
+            new_high = high[s, t]
+            if is_long:
+                if new_low <= sar:
+                    is_long = False
+                    sar = max(ep, prev_high, new_high)
+                    out[s, t] = sar
+                    af = acceleration
+                    ep = new_low
+                    sar = sar + af * (ep - sar)
+                    sar = max(sar, prev_high, new_high)
+                else:
+                    out[s, t] = sar
+                    if new_high > ep:
+                        ep = new_high
+                        af = min(af + acceleration, maximum)
+                    sar = sar + af * (ep - sar)
+                    sar = min(sar, prev_low, new_low)
+            else:
+                if new_high >= sar:
+                    is_long = True
+                    sar = min(ep, prev_low, new_low)
+                    out[s, t] = sar
+                    af = acceleration
+                    ep = new_high
+                    sar = sar + af * (ep - sar)
+                    sar = min(sar, prev_low, new_low)
+                else:
+                    out[s, t] = sar
+                    if new_low < ep:
+                        ep = new_low
+                        af = min(af + acceleration, maximum)
+                    sar = sar + af * (ep - sar)
+                    sar = max(sar, prev_high, new_high)
+
+
+def _ema_loop(x, n, start, out):
+    n_codes, n_days = x.shape
+    k = 2.0 / (n + 1)
+    for s in range(n_codes):
+        e = 0.0
+        for t in range(start - n + 1, start + 1):
+            e += x[s, t]
+        e /= n
+        out[s, start] = e
+        for t in range(start + 1, n_days):
+            e = (x[s, t] - e) * k + e
+            out[s, t] = e
+
+
+def _wilder_loop(x, n, start, out):
+    n_codes, n_days = x.shape
+    for s in range(n_codes):
+        a = 0.0
+        for t in range(start - n + 1, start + 1):
+            a += x[s, t]
+        a /= n
+        out[s, start] = a
+        for t in range(start + 1, n_days):
+            a = (a * (n - 1) + x[s, t]) / n
+            out[s, t] = a
+
+
+# ---------- numpy 实现，按时间逐列递推 ----------
+
+def _supertrend_numpy(close, b_ub, b_lb, ub, lb, st):
+    if close.shape[1] == 0:
+        return
+    ub[:, 0], lb[:, 0] = b_ub[:, 0], b_lb[:, 0]
+    st[:, 0] = np.where(close[:, 0] <= ub[:, 0], ub[:, 0], lb[:, 0])
+    for i in range(1, close.shape[1]):
+        last_close, last_ub, last_lb, last_st = close[:, i - 1], ub[:, i - 1], lb[:, i - 1], st[:, i - 1]
+        ub[:, i] = np.where((b_ub[:, i] < last_ub) | (last_close > last_ub), b_ub[:, i], last_ub)
+        lb[:, i] = np.where((b_lb[:, i] > last_lb) | (last_close < last_lb), b_lb[:, i], last_lb)
+        curr_close = close[:, i]
+        st[:, i] = np.where(last_st == last_ub,
+                            np.where(curr_close <= ub[:, i], ub[:, i], lb[:, i]),
+                            np.where(last_st == last_lb,
+                                     np.where(curr_close > lb[:, i], lb[:, i], ub[:, i]), np.nan))
+
+
+def _sar_numpy(high, low, acceleration, maximum, out):
+    n_codes, n_days = high.shape
+    if n_days < 2:
+        return
+    diff_p = high[:, 1] - high[:, 0]
+    diff_m = low[:, 0] - low[:, 1]
+    is_long = ~((diff_m > 0) & (diff_p < diff_m))
+    af = np.full(n_codes, acceleration)
+    ep = np.where(is_long, high[:, 1], low[:, 1])
+    sar = np.where(is_long, low[:, 0], high[:, 0])
+    new_low, new_high = low[:, 1], high[:, 1]
+    for t in range(1, n_days):
+        prev_low, prev_high = new_low, new_high
+        new_low, new_high = low[:, t], high[:, t]
+        # 多头中跌破、空头中涨破时反转
+        to_short = is_long & (new_low <= sar)
+        to_long = ~is_long & (new_high >= sar)
+        stay_long = is_long & ~to_short
+        stay_short = ~is_long & ~to_long
+
+        rev_short = np.maximum(np.maximum(ep, prev_high), new_high)
+        rev_long = np.minimum(np.minimum(ep, prev_low), new_low)
+        base = np.where(to_short, rev_short, np.where(to_long, rev_long, sar))
+        out[:, t] = base
+
+        up = stay_long & (new_high > ep)
+        down = stay_short & (new_low < ep)
+        af = np.where(up | down, np.minimum(af + acceleration, maximum), af)
+        af = np.where(to_short | to_long, acceleration, af)
+        ep = np.where(up | to_long, new_high, np.where(down | to_short, new_low, ep))
+        sar = base + af * (ep - base)
+        is_long = stay_long | to_long
+        sar = np.where(is_long, np.minimum(np.minimum(sar, prev_low), new_low),
+                       np.maximum(np.maximum(sar, prev_high), new_high))
+
+
+def _ema_numpy(x, n, start, out):
+    k = 2.0 / (n + 1)
+    e = np.cumsum(x[:, start - n + 1:start + 1], axis=1)[:, -1] / n
+    out[:, start] = e
+    for t in range(start + 1, x.shape[1]):
+        e = (x[:, t] - e) * k + e
+        out[:, t] = e
+
+
+def _wilder_numpy(x, n, start, out):
+    a = np.cumsum(x[:, start - n + 1:start + 1], axis=1)[:, -1] / n
+    out[:, start] = a
+    for t in range(start + 1, x.shape[1]):
+        a = (a * (n - 1) + x[:, t]) / n
+        out[:, t] = a
+
+
+# 没有 numba 时，股票数少于 loop_codes 的直接用 Python 循环（单只股票时比逐列的 numpy 向量运算快），否则用 numpy 实现。
+loop_codes = 4
+
+
+def _dispatch(loop, vectorized):
+    def impl(x, *args):
+        return loop(x, *args) if x.shape[0] < loop_codes else vectorized(x, *args)
+    return impl
+
+
+if use_jit:
+    try:
+        _supertrend_impl = numba.njit(cache=True)(_supertrend_loop)
+        _sar_impl = numba.njit(cache=True)(_sar_loop)
+        _ema_impl = numba.njit(cache=True)(_ema_loop)
+        _wilder_impl = numba.njit(cache=True)(_wilder_loop)
+    except Exception as e:
+        logging.error(f"kernels处理异常：numba编译失败，使用numpy实现{e}")
+        use_jit = False
+if not use_jit:
+    _supertrend_impl = _dispatch(_supertrend_loop, _supertrend_numpy)
+    _sar_impl = _dispatch(_sar_loop, _sar_numpy)
+    _ema_impl = _dispatch(_ema_loop, _ema_numpy)
+    _wilder_impl = _dispatch(_wilder_loop, _wilder_numpy)
+
+
+def supertrend(close, b_ub, b_lb):
+    """
+    超级趋势
+    :param close: 收盘价
+    :param b_ub: 基础上轨 (最高+最低)/2 + 3*ATR
+    :param b_lb: 基础下轨 (最高+最低)/2 - 3*ATR
+    :return: (上轨, 下轨, 超级趋势)，和输入的形状相同
+    """
+    shape = np.shape(close)
+    close, b_ub, b_lb = _as_2d(close, b_ub, b_lb)
+    ub, lb, st = (np.full(close.shape, np.nan) for _ in range(3))
+    _supertrend_impl(close, b_ub, b_lb, ub, lb, st)
+    return ub.reshape(shape), lb.reshape(shape), st.reshape(shape)
+
+
+def sar(high, low, acceleration=0.02, maximum=0.2):
+    """
+    抛物线转向，和 TA-Lib SAR 一致，第一根K线为 NaN
+    """
+    shape = np.shape(high)
+    high, low = _as_2d(high, low)
+    out = np.full(high.shape, np.nan)
+    _sar_impl(high, low, float(acceleration), float(maximum), out)
+    return out.reshape(shape)
+
+
+def ema(x, n, start=None):
+    """
+    指数移动平均，和 TA-Lib EMA 一致：start 位置（默认 n-1）为 [start-n+1, start] 的均值，之后逐个递推，之前为 NaN
+    """
+    shape = np.shape(x)
+    x, = _as_2d(x)
+    start = n - 1 if start is None else start
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] > start:
+        _ema_impl(x, n, start, out)
+    return out.reshape(shape)
+
+
+def wilder(x, n, start=None):
+    """
+    Wilder 平滑（RSI、ATR 使用）：start 位置（默认 n-1）为 [start-n+1, start] 的均值，之后 a = (a*(n-1)+x)/n
+    """
+    shape = np.shape(x)
+    x, = _as_2d(x)
+    start = n - 1 if start is None else start
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] > start:
+        _wilder_impl(x, n, start, out)
+    return out.reshape(shape)
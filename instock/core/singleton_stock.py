@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import concurrent.futures
 import logging
+import threading
 
 import instock.core.stockfetch as stf
 import instock.core.tablestructure as tbs
 import instock.lib.trade_time as trd
+import instock.core.history.schema as hsc
 from instock.lib.singleton_type import singleton_type
+from instock.core.history.panel import StockPanel
 
 __author__ = 'myh '
 __date__ = '2023/3/10 '
@@ -24,36 +26,89 @@ class stock_data(metaclass=singleton_type):
         return self.data
 
 
+# 读取当天ETF数据
+class etf_data(metaclass=singleton_type):
+    def __init__(self, date):
+        try:
+            self.data = stf.fetch_etfs(date)
+        except Exception as e:
+            logging.error(f"singleton.etf_data处理异常：{e}")
+
+    def get_data(self):
+        return self.data
+
+
 # 读取股票历史数据
+# 抓取失败的股票在 stockfetch.stocks_hist_raw_fetch 中重新排队抓取（有轮数限制），仍然失败的记录在 missing 中。
 class stock_hist_data(metaclass=singleton_type):
-    def __init__(self, date=None, stocks=None, workers=16):
+    spot_data = stock_data  # 当天行情（股票列表、盘中临时K线）的来源
+    price_decimals = 2  # 价格的小数位数
+
+    def __init__(self, date=None, stocks=None, workers=16, intraday_spot=True, compact=None):
+        self.missing = []
+        self.panel = None
+        self._panel_lock = threading.Lock()
         if stocks is None:
-            _subset = stock_data(date).get_data()[list(tbs.TABLE_CN_STOCK_FOREIGN_KEY['columns'])]
+            _subset = self.spot_data(date).get_data()[list(tbs.TABLE_CN_STOCK_FOREIGN_KEY['columns'])]
             stocks = [tuple(x) for x in _subset.values]
         if stocks is None:
             self.data = None
             return
         date_start, is_cache = trd.get_trade_hist_interval(stocks[0][0])  # 提高运行效率，只运行一次
         _data = {}
-        try:
-            # max_workers是None还是没有给出，将默认为机器cup个数*5
-            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-                future_to_stock = {executor.submit(stf.fetch_stock_hist, stock, date_start, is_cache): stock for stock
-                                   in stocks}
-                for future in concurrent.futures.as_completed(future_to_stock):
-                    stock = future_to_stock[future]
-                    try:
-                        __data = future.result()
-                        if __data is not None:
-                            _data[stock] = __data
-                    except Exception as e:
-                        logging.error(f"singleton.stock_hist_data处理异常：{stock[1]}代码{e}")
-        except Exception as e:
-            logging.error(f"singleton.stock_hist_data处理异常：{e}")
-        if not _data:
-            self.data = None
-        else:
-            self.data = _data
+        # 已经在历史行情存储中的股票一次性批量读取，剩下的再多线程抓取。
+        if is_cache:
+            _data.update(stf.fetch_stocks_hist_cached(stocks, date_start))
+        elif intraday_spot:
+            # 盘中：已收盘的历史数据读存储，当天的临时K线用实时行情快照生成，只需要一次请求。
+            spot = self.spot_data(date).get_data()
+            if spot is not None:
+                _data.update(stf.fetch_stocks_hist_cached(stocks, date_start, spot=spot))
+        _stocks = [stock for stock in stocks if stock not in _data]
+        if _stocks:
+            # 剩下的股票用批量抓取引擎并发抓取，workers 为并发数。
+            _data.update(stf.fetch_stocks_hist(_stocks, date_start, is_cache, workers=workers, failed=self.missing))
+        if is_cache:
+            stf.compact_stock_hist_cache()
+        self.data = None
+        if _data:
+            # 紧凑格式在加载时一次性转换，get_data() 返回标准格式的视图，见 instock.core.history.schema
+            if compact if compact is not None else hsc.compact:
+                self.data = hsc.StandardFrames(hsc.compact_dict(_data), self.price_decimals)
+            else:
+                self.data = _data
 
     def get_data(self):
         return self.data
+
+    # 子进程使用主进程发布到共享内存的面板数据（history.shared.attach_panel）作为单例，不再重新加载。
+    # data 是面板的只读视图，使用时才生成每只股票的 DataFrame，不在子进程中复制整个市场的数据。
+    @classmethod
+    def attach(cls, panel):
+        with singleton_type.single_lock:
+            instance = cls.__new__(cls)
+            data = panel.frames()
+            instance.data = data if len(data) > 0 else None
+            instance.panel = panel
+            instance.missing = []
+            instance._panel_lock = threading.Lock()
+            cls._instance = instance
+        return instance
+
+    # 股票×交易日 的面板数据，第一次使用时从 data 转换。
+    def get_panel(self):
+        if self.data is None:
+            return None
+        with self._panel_lock:
+            if self.panel is None:
+                try:
+                    self.panel = StockPanel.from_dict(self.data)
+                except Exception as e:
+                    logging.error(f"singleton.stock_hist_data.get_panel处理异常：{e}")
+        return self.panel
+
+
+# 读取ETF历史数据，和股票历史数据共用历史行情存储、批量加载、失败重试。
+class etf_hist_data(stock_hist_data):
+    spot_data = etf_data
+    price_decimals = 3
@@ -1,21 +1,56 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import time
 import logging
+import threading
 import instock.core.stockfetch as stf
 from instock.lib.singleton_type import singleton_type
+from instock.lib.trade_calendar import TradeCalendar
 
 __author__ = 'myh '
 __date__ = '2023/3/10 '
 
+refresh_interval = 3600  # 日历没有更新时再次刷新的间隔秒数
+
 
 # 读取股票交易日历数据
+# 新浪的交易日历由 response_cache 缓存在本地，有效期内不再请求和解密，这里只转换成 TradeCalendar。
+# 请求的日期超出日历最后一天时重新请求一次交易日历。
 class stock_trade_date(metaclass=singleton_type):
     def __init__(self):
+        self.data = None
+        self._lock = threading.Lock()
+        self._refresh_end = None  # 上次刷新后日历的最后一天
+        self._refresh_time = 0.0  # 上次刷新的时间
+        self._load(False)
+
+    def _load(self, refresh):
         try:
-            self.data = stf.fetch_stocks_trade_date()
+            data = stf.fetch_stocks_trade_date(refresh)
+            if data:
+                self.data = TradeCalendar.from_dates(data)
         except Exception as e:
             logging.error(f"singleton.stock_trade_date处理异常：{e}")
 
-    def get_data(self):
+    # 刷新后日历没有变化（新浪还没有发布新的交易日历）时，refresh_interval 秒内不再刷新。
+    def _refresh(self, days):
+        with self._lock:
+            end = self.data.days[-1]
+            if days.max() <= end:
+                return
+            if self._refresh_end == end and time.time() - self._refresh_time < refresh_interval:
+                return
+            self._load(True)
+            self._refresh_end = self.data.days[-1]
+            self._refresh_time = time.time()
+
+    def get_data(self, date=None):
+        if date is not None and self.data is not None:
+            try:
+                days = TradeCalendar.to_days(date)
+                if days.max() > self.data.days[-1]:
+                    self._refresh(days)
+            except Exception as e:
+                logging.error(f"singleton.stock_trade_date.get_data处理异常：{e}")
         return self.data
@@ -3,6 +3,7 @@
 
 import logging
 import os.path
+import time
 import datetime
 import numpy as np
 import pandas as pd
@@ -18,16 +19,33 @@ import instock.core.crawling.stock_dzjy_em as sde
 import instock.core.crawling.stock_hist_em as she
 import instock.core.crawling.stock_fund_em as sff
 import instock.core.crawling.stock_fhps_em as sfe
+import instock.core.crawling.batch_fetch as bfe
+import instock.core.crawling.http_client as hc
+import instock.core.history.store as hst
+import instock.core.history.adjust as had
+import instock.core.history.manager as hcm
+import instock.core.history.period as hpd
 
 __author__ = 'myh '
 __date__ = '2023/3/10 '
 
 # 设置基础目录，每次加载使用。
 cpath_current = os.path.dirname(os.path.dirname(__file__))
-stock_hist_cache_path = os.path.join(cpath_current, 'cache', 'hist')
+stock_hist_cache_path = hst.store_path
 if not os.path.exists(stock_hist_cache_path):
     os.makedirs(stock_hist_cache_path)  # 创建多个文件夹结构。
 
+fetch_concurrency = 16  # 批量抓取历史数据的并发数
+fetch_requeue = 2  # 批量抓取失败的股票最多重新排队几轮，停牌、退市等一直失败的股票不会无限重试
+
+# 使用环境变量配置,docker -e 传递
+_fetch_concurrency = os.environ.get('hist_fetch_concurrency')
+if _fetch_concurrency is not None:
+    fetch_concurrency = int(_fetch_concurrency)
+_fetch_requeue = os.environ.get('hist_fetch_requeue')
+if _fetch_requeue is not None:
+    fetch_requeue = int(_fetch_requeue)
+
 
 # 600 601 603 605开头的股票是上证A股
 # 600开头的股票是上证A股，属于大盘股，其中6006开头的股票是最早上市的股票，
@@ -38,9 +56,12 @@ if not os.path.exists(stock_hist_cache_path):
 # 200开头的股票是深证B股；
 # 300、301开头的股票是创业板股票；400开头的股票是三板市场股票。
 # 430、83、87开头的股票是北证A股
+_A_STOCK_PREFIXES = ('600', '601', '603', '605', '000', '001', '002', '003', '300', '301')
+
+
 def is_a_stock(code):
     # 上证A股  # 深证A股
-    return code.startswith(('600', '601', '603', '605', '000', '001', '002', '003', '300', '301'))
+    return code.startswith(_A_STOCK_PREFIXES)
 
 
 # 过滤掉 st 股票。
@@ -57,10 +78,51 @@ def is_open_with_line(price):
     return price != '-'
 
 
+# 以上过滤的向量化版本，参数为 Series，返回布尔 Series，用于整表过滤。
+def a_stock_mask(codes):
+    return codes.astype(str).str.startswith(_A_STOCK_PREFIXES)
+
+
+def not_st_mask(names):
+    return ~names.astype(str).str.startswith(('*ST', 'ST'))
+
+
+def open_mask(prices):
+    return prices.notna()
+
+
+# 场内ETF代码以1、5开头，和A股代码不重叠，ETF的历史行情和股票共用历史行情存储。
+def is_etf(code):
+    return code.startswith(('1', '5'))
+
+
+# 报价精度：ETF 0.001 元，股票 0.01 元。
+def price_decimals(code):
+    return 3 if is_etf(code) else 2
+
+
+# 不复权K线在本地复权。股票用分红配送数据，ETF没有分红配送数据，除息事件从K线的除息参考价得到。
+def adjust_hist(code, data, adjust, factors=None):
+    if is_etf(code):
+        decimals = price_decimals(code)
+        return had.adjust_frame(data, adjust, had.cash_events(data, decimals), decimals, code)
+    if factors is None:
+        factors = had.get_factors()
+    return had.adjust_frame(data, adjust, factors.get(code), code=code)
+
+
+# 按代码选择日K线接口 (抓取函数, 请求函数)，两个接口返回的格式相同，都用 stock_zh_a_hist_parse 解析。
+def _hist_api(code):
+    if is_etf(code):
+        return fee.fund_etf_hist_em, fee.fund_etf_hist_request
+    return she.stock_zh_a_hist, she.stock_zh_a_hist_request
+
+
 # 读取股票交易日历数据
-def fetch_stocks_trade_date():
+# refresh：忽略本地缓存的有效期重新请求。
+def fetch_stocks_trade_date(refresh=False):
     try:
-        data = tdh.tool_trade_date_hist_sina()
+        data = tdh.tool_trade_date_hist_sina.refresh() if refresh else tdh.tool_trade_date_hist_sina()
         if data is None or len(data.index) == 0:
             return None
         data_date = set(data['trade_date'].values.tolist())
@@ -70,18 +132,22 @@ def fetch_stocks_trade_date():
     return None
 
 
+# 实时行情接口字段到表字段的映射，由 tablestructure 中的 map 生成，解析时直接得到表的列名和类型。
+_stock_spot_fields = tbs.get_field_maps(tbs.TABLE_CN_STOCK_SPOT['columns'])
+_etf_spot_fields = tbs.get_field_maps(tbs.TABLE_CN_ETF_SPOT['columns'])
+
+
 # 读取当天股票数据
 def fetch_etfs(date):
     try:
-        data = fee.fund_etf_spot_em()
+        data = fee.fund_etf_spot_em(fields=_etf_spot_fields)
         if data is None or len(data.index) == 0:
             return None
         if date is None:
             data.insert(0, 'date', datetime.datetime.now().strftime("%Y-%m-%d"))
         else:
             data.insert(0, 'date', date.strftime("%Y-%m-%d"))
-        data.columns = list(tbs.TABLE_CN_ETF_SPOT['columns'])
-        data = data.loc[data['new_price'].apply(is_open)]
+        data = data.loc[open_mask(data['new_price'])]
         return data
     except Exception as e:
         logging.error(f"stockfetch.fetch_etfs处理异常：{e}")
@@ -89,17 +155,20 @@ def fetch_etfs(date):
 
 
 # 读取当天股票数据
-def fetch_stocks(date):
+# exclude_st：同时过滤掉 st 股票。
+def fetch_stocks(date, exclude_st=False):
     try:
-        data = she.stock_zh_a_spot_em()
+        data = she.stock_zh_a_spot_em(fields=_stock_spot_fields)
         if data is None or len(data.index) == 0:
             return None
         if date is None:
             data.insert(0, 'date', datetime.datetime.now().strftime("%Y-%m-%d"))
         else:
             data.insert(0, 'date', date.strftime("%Y-%m-%d"))
-        data.columns = list(tbs.TABLE_CN_STOCK_SPOT['columns'])
-        data = data.loc[data['code'].apply(is_a_stock)].loc[data['new_price'].apply(is_open)]
+        mask = a_stock_mask(data['code']) & open_mask(data['new_price'])
+        if exclude_st:
+            mask &= not_st_mask(data['name'])
+        data = data.loc[mask]
         return data
     except Exception as e:
         logging.error(f"stockfetch.fetch_stocks处理异常：{e}")
@@ -127,7 +196,7 @@ def fetch_stocks_fund_flow(index):
         if data is None or len(data.index) == 0:
             return None
         data.columns = list(cn_flow['columns'])
-        data = data.loc[data['code'].apply(is_a_stock)].loc[data['new_price'].apply(is_open_with_line)]
+        data = data.loc[a_stock_mask(data['code']) & (data['new_price'] != '-')]
         return data
     except Exception as e:
         logging.error(f"stockfetch.fetch_stocks_fund_flow处理异常：{e}")
@@ -149,9 +218,10 @@ def fetch_stocks_sector_fund_flow(index_sector, index_indicator):
 
 
 # 读取股票分红配送
-def fetch_stocks_bonus(date):
+# report_date 为报告期，默认最近的报告期。
+def fetch_stocks_bonus(date, report_date=None):
     try:
-        data = sfe.stock_fhps_em(date=trd.get_bonus_report_date())
+        data = sfe.stock_fhps_em(date=report_date if report_date is not None else trd.get_bonus_report_date())
         if data is None or len(data.index) == 0:
             return None
         if date is None:
@@ -159,7 +229,7 @@ def fetch_stocks_bonus(date):
         else:
             data.insert(0, 'date', date.strftime("%Y-%m-%d"))
         data.columns = list(tbs.TABLE_CN_STOCK_BONUS['columns'])
-        data = data.loc[data['code'].apply(is_a_stock)]
+        data = data.loc[a_stock_mask(data['code'])]
         return data
     except Exception as e:
         logging.error(f"stockfetch.fetch_stocks_bonus处理异常：{e}")
@@ -207,7 +277,7 @@ def fetch_stock_top_data(date):
         _columns = list(tbs.TABLE_CN_STOCK_TOP['columns'])
         _columns.pop(0)
         data.columns = _columns
-        data = data.loc[data['code'].apply(is_a_stock)]
+        data = data.loc[a_stock_mask(data['code'])]
         data.drop_duplicates('code', keep='last', inplace=True)
         if date is None:
             data.insert(0, 'date', datetime.datetime.now().strftime("%Y-%m-%d"))
@@ -230,7 +300,7 @@ def fetch_stock_blocktrade_data(date):
         columns = list(tbs.TABLE_CN_STOCK_BLOCKTRADE['columns'])
         columns.insert(0, 'index')
         data.columns = columns
-        data = data.loc[data['code'].apply(is_a_stock)]
+        data = data.loc[a_stock_mask(data['code'])]
         data.drop('index', axis=1, inplace=True)
         return data
     except TypeError:
@@ -241,28 +311,18 @@ def fetch_stock_blocktrade_data(date):
     return None
 
 
-# 读取股票历史数据
+# 读取ETF历史数据，和股票一样经过历史行情存储，增量更新，本地复权。
 def fetch_etf_hist(data_base, date_start=None, date_end=None, adjust='qfq'):
     date = data_base[0]
     code = data_base[1]
 
+    is_cache = True
     if date_start is None:
         date_start, is_cache = trd.get_trade_hist_interval(date)  # 提高运行效率，只运行一次
     try:
-        if date_end is not None:
-            data = fee.fund_etf_hist_em(symbol=code, period="daily", start_date=date_start, end_date=date_end,
-                                        adjust=adjust)
-        else:
-            data = fee.fund_etf_hist_em(symbol=code, period="daily", start_date=date_start, adjust=adjust)
-
-        if data is None or len(data.index) == 0:
-            return None
-        data.columns = tuple(tbs.CN_STOCK_HIST_DATA['columns'])
-        data = data.sort_index()  # 将数据按照日期排序下。
+        data = stock_hist_cache(code, date_start, date_end, is_cache, adjust)
         if data is not None:
-            data.loc[:, 'p_change'] = tl.ROC(data['close'].values, 1)
-            data['p_change'].values[np.isnan(data['p_change'].values)] = 0.0
-            data["volume"] = data['volume'].values.astype('double') * 100  # 成交量单位从手变成股。
+            _fill_hist_data(data)
         return data
     except Exception as e:
         logging.error(f"stockfetch.fetch_etf_hist处理异常：{e}")
@@ -280,47 +340,329 @@ def fetch_stock_hist(data_base, date_start=None, is_cache=True):
     try:
         data = stock_hist_cache(code, date_start, None, is_cache, 'qfq')
         if data is not None:
-            data.loc[:, 'p_change'] = tl.ROC(data['close'].values, 1)
-            data['p_change'].values[np.isnan(data['p_change'].values)] = 0.0
-            data["volume"] = data['volume'].values.astype('double') * 100  # 成交量单位从手变成股。
+            _fill_hist_data(data)
         return data
     except Exception as e:
         logging.error(f"stockfetch.fetch_stock_hist处理异常：{e}")
     return None
 
 
+# 批量读取已经在历史行情存储中的股票，返回 {stock: DataFrame}，没有覆盖的股票需要再单独抓取。
+# 盘中传入当天的实时行情快照 spot（fetch_stocks 的结果），用快照生成当天的临时K线接在已收盘的历史数据后面，
+# 不需要为了当天的K线逐个股票重新抓取一年的数据。临时K线不写入历史行情存储。
+def fetch_stocks_hist_cached(stocks, date_start, adjust='qfq', spot=None):
+    _data = {}
+    try:
+        store = hst.get_store('')
+        factors = had.get_factors()
+        code_stock = {stock[1]: stock for stock in stocks}
+        frames = store.load_covered(code_stock.keys(), date_start, get_hist_covered_end())
+        store.count('hit', len(frames))
+        bars = spot_to_hist_bars(spot) if spot is not None else None
+        for code, data in frames.items():
+            if bars is not None:
+                data = _append_spot_bar(data, bars, code)
+            data = adjust_hist(code, data, adjust, factors)
+            _fill_hist_data(data)
+            _data[code_stock[code]] = data
+        logging.info(f"stockfetch.fetch_stocks_hist_cached：复权统计{had.fallback_stats()}")
+    except Exception as e:
+        logging.error(f"stockfetch.fetch_stocks_hist_cached处理异常：{e}")
+    return _data
+
+
+# 读取股票周K线、月K线（period 为 weekly/monthly），由历史行情存储中的日K线在本地聚合，不重新下载。
+# 起始日期对齐到所在周期的第一天，第一根K线是完整的周期。
+def fetch_stock_hist_period(data_base, period='weekly', date_start=None, adjust='qfq'):
+    date = data_base[0]
+    code = data_base[1]
+
+    is_cache = True
+    if date_start is None:
+        date_start, is_cache = trd.get_trade_hist_interval(date)
+    try:
+        data = stock_hist_cache(code, hpd.period_start(date_start, period), None, is_cache, adjust)
+        data = hpd.resample_frame(data, period)
+        if data is not None:
+            _fill_hist_data(data)
+        return data
+    except Exception as e:
+        logging.error(f"stockfetch.fetch_stock_hist_period处理异常：{e}")
+    return None
+
+
+# 批量读取已经在历史行情存储中的股票的周K线、月K线，返回 {stock: DataFrame}。
+# 不复权的周期K线直接读取周期K线缓存（见 instock.core.history.period），复权的由复权后的日K线聚合。
+def fetch_stocks_hist_period_cached(stocks, date_start, period='weekly', adjust='qfq'):
+    _data = {}
+    try:
+        code_stock = {stock[1]: stock for stock in stocks}
+        date_start = hpd.period_start(date_start, period)
+        if adjust == '':
+            frames = hpd.get_period_cache(period).load_codes(code_stock.keys(), date_start)
+        else:
+            factors = had.get_factors()
+            frames = hst.get_store('').load_covered(code_stock.keys(), date_start, get_hist_covered_end())
+            frames = {code: hpd.resample_frame(adjust_hist(code, data, adjust, factors), period)
+                      for code, data in frames.items()}
+        for code, data in frames.items():
+            _fill_hist_data(data)
+            _data[code_stock[code]] = data
+    except Exception as e:
+        logging.error(f"stockfetch.fetch_stocks_hist_period_cached处理异常：{e}")
+    return _data
+
+
+# 实时行情字段和历史K线字段的对应关系。成交量单位都是手。
+_SPOT_BAR_COLUMNS = {'open': 'open_price', 'close': 'new_price', 'high': 'high_price', 'low': 'low_price',
+                     'volume': 'volume', 'amount': 'deal_amount', 'amplitude': 'amplitude',
+                     'quote_change': 'change_rate', 'ups_downs': 'ups_downs', 'turnover': 'turnoverrate'}
+
+
+# 实时行情快照转成当天的临时K线，列和 CN_STOCK_HIST_DATA 一致，按股票代码索引。
+def spot_to_hist_bars(spot):
+    bars = pd.DataFrame({'date': spot['date'].astype(str).values}, index=spot['code'].values)
+    for field, column in _SPOT_BAR_COLUMNS.items():
+        # ETF 实时行情没有振幅等列，缺少的列为 NaN
+        bars[field] = pd.to_numeric(spot[column], errors='coerce').values if column in spot.columns else np.nan
+    bars = bars.loc[bars['open'].values > 0]
+    return bars[list(hst.HIST_COLUMNS)]
+
+
+def _append_spot_bar(data, bars, code):
+    if code not in bars.index:
+        return data
+    bar = bars.loc[[code]]
+    if len(data.index) > 0 and data['date'].values[-1] >= bar['date'].values[0]:
+        return data
+    return pd.concat([data, bar], ignore_index=True)
+
+
+# 把抓取过程中暂存的股票历史数据合并进历史行情存储，并记录缓存使用情况。
+def compact_stock_hist_cache():
+    try:
+        count = hst.get_store('').compact()
+        hcm.get_manager('').flush()
+        return count
+    except Exception as e:
+        logging.error(f"stockfetch.compact_stock_hist_cache处理异常：{e}")
+    return 0
+
+
+def _fill_hist_data(data):
+    p_change = tl.ROC(data['close'].to_numpy(dtype=np.float64), 1)
+    p_change[np.isnan(p_change)] = 0.0
+    data['p_change'] = p_change
+    data["volume"] = data['volume'].values.astype('double') * 100  # 成交量单位从手变成股。
+
+
+# 历史行情需要覆盖到的日期：最近一个已收盘的交易日。
+def get_hist_covered_end():
+    run_date, run_date_nph = trd.get_trade_date_last()
+    return run_date.strftime("%Y%m%d")
+
+
 # 增加读取股票缓存方法。加快处理速度。多线程解决效率
+# 数据保存在按交易日分区的列式存储中，见 instock.core.history.store
+# 存储中只保存不复权数据，复权在本地计算，见 instock.core.history.adjust
 def stock_hist_cache(code, date_start, date_end=None, is_cache=True, adjust=''):
-    cache_dir = os.path.join(stock_hist_cache_path, date_start[0:6], date_start)
-    # 如果没有文件夹创建一个。月文件夹和日文件夹。方便删除。
-    try:
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
-    except Exception:
-        pass
-    cache_file = os.path.join(cache_dir, "%s%s.gzip.pickle" % (code, adjust))
-    # 如果缓存存在就直接返回缓存数据。压缩方式。
+    stock = stock_hist_raw_cache(code, date_start, date_end, is_cache)
+    return adjust_hist(code, stock, adjust)
+
+
+# 读取不复权的股票历史数据。
+def stock_hist_raw_cache(code, date_start, date_end=None, is_cache=True):
+    store = hst.get_store('')
+    covered_end = date_end if date_end is not None else get_hist_covered_end()
+    # 如果存储覆盖了需要的日期区间就直接返回。
     try:
-        if os.path.isfile(cache_file):
-            return pd.read_pickle(cache_file, compression="gzip")
+        if is_cache:
+            stock = store.load_code(code, date_start, date_end, covered_end)
+            if stock is not None:
+                store.count('hit')
+                return stock
+            if date_end is None:
+                stock = stock_hist_append(store, code, date_start, covered_end)
+                if stock is not None:
+                    store.count('append')
+                    return stock
+            store.count('miss')
+        hist = _hist_api(code)[0]
+        if date_end is not None:
+            stock = hist(symbol=code, period="daily", start_date=date_start, end_date=date_end)
         else:
-            if date_end is not None:
-                stock = she.stock_zh_a_hist(symbol=code, period="daily", start_date=date_start, end_date=date_end,
-                                            adjust=adjust)
-            else:
-                stock = she.stock_zh_a_hist(symbol=code, period="daily", start_date=date_start, adjust=adjust)
+            stock = hist(symbol=code, period="daily", start_date=date_start)
 
+        if stock is None or len(stock.index) == 0:
+            return None
+        stock.columns = tuple(tbs.CN_STOCK_HIST_DATA['columns'])
+        stock = stock.sort_index()  # 将数据按照日期排序下。
+        try:
+            if is_cache:
+                store.stage(code, stock, date_start, covered_end)
+        except Exception:
+            pass
+        # time.sleep(1)
+        return stock
+    except Exception as e:
+        logging.error(f"stockfetch.stock_hist_raw_cache处理异常：{code}代码{e}")
+    return None
+
+
+# 增量更新：只抓取最后一根K线之后的数据，并多抓最后一根K线用于校验。
+# 最后一根K线的收盘价对不上，说明数据源修正过历史数据，返回None由调用方重新全量抓取。
+def stock_hist_append(store, code, date_start, covered_end):
+    point = _hist_append_point(store, code, date_start)
+    if point is None:
+        return None
+    stock = _hist_api(code)[0](symbol=code, period="daily", start_date=point[0])
+    if stock is None or len(stock.index) == 0:
+        return None
+    return _stage_hist_append(store, code, stock, date_start, covered_end, point)
+
+
+# 增量更新的起点 (抓取开始日期, 最后一根K线日期, 最后一根K线收盘价)，不能增量更新时返回None。
+def _hist_append_point(store, code, date_start):
+    span = store.coverage(code)
+    if span is None or span[0] > date_start:
+        return None
+    last_bar = store.last_bar(code, date_start)
+    if last_bar is None:
+        return None
+    last_day, last_close = last_bar
+    return min(last_day, span[1]), last_day, last_close
+
+
+def _stage_hist_append(store, code, stock, date_start, covered_end, point):
+    append_start, last_day, last_close = point
+    stock.columns = tuple(tbs.CN_STOCK_HIST_DATA['columns'])
+    stock = stock.sort_index()
+    days = hst.frame_days(stock)
+    overlap = stock.loc[days == int(last_day)]
+    tolerance = 0.5 / 10 ** price_decimals(code)
+    if len(overlap.index) == 0 or abs(float(overlap['close'].values[0]) - last_close) > tolerance:
+        logging.info(f"stockfetch.stock_hist_append：{code}代码历史数据变化，重新抓取")
+        return None
+    stock = stock.loc[days >= int(append_start)].reset_index(drop=True)
+    store.stage(code, stock, append_start, covered_end, append=True)
+    return store.load_code(code, date_start)
+
+
+# 批量抓取股票（或ETF）历史数据（不复权），is_cache为True时写入历史行情存储，返回 {code: DataFrame}。
+# 使用批量抓取引擎（线程池）并发请求，能增量更新的只抓取最后一根K线之后的数据，校验失败的再全量抓取一次。
+# 请求失败的股票在其他股票完成后重新排队抓取，最多 fetch_requeue 轮，仍然失败的放入 failed（传入列表时）。
+# 每只股票抓取完成就写入历史行情存储的 staging，进程中断后重新运行时这些股票直接从存储读取，不会重复抓取。
+def stocks_hist_raw_fetch(codes, date_start, is_cache=True, fetcher=None, failed=None):
+    store = hst.get_store('')
+    covered_end = get_hist_covered_end()
+    if fetcher is None:
+        fetcher = bfe.BatchFetcher(fetch_concurrency)
+    result = {}
+
+    def _fetch(_codes, append):
+        points, jobs = {}, {}
+        for code in _codes:
+            try:
+                point = _hist_append_point(store, code, date_start) if append else None
+                if point is not None:
+                    points[code] = point
+                jobs[code] = _hist_api(code)[1](symbol=code, period="daily",
+                                                start_date=date_start if point is None else point[0])
+            except Exception as e:
+                logging.error(f"stockfetch.stocks_hist_raw_fetch处理异常：{code}代码{e}")
+        retry, errors = [], []
+        for code, stock in fetcher.fetch(jobs, she.stock_zh_a_hist_parse).items():
+            if isinstance(stock, Exception):
+                logging.error(f"stockfetch.stocks_hist_raw_fetch处理异常：{code}代码{stock}")
+                errors.append(code)
+                continue
             if stock is None or len(stock.index) == 0:
-                return None
-            stock.columns = tuple(tbs.CN_STOCK_HIST_DATA['columns'])
-            stock = stock.sort_index()  # 将数据按照日期排序下。
+                continue
             try:
-                if is_cache:
-                    stock.to_pickle(cache_file, compression="gzip")
-            except Exception:
-                pass
-            # time.sleep(1)
-            return stock
+                if code in points:
+                    data = _stage_hist_append(store, code, stock, date_start, covered_end, points[code])
+                    if data is None:
+                        retry.append(code)
+                        continue
+                    store.count('append')
+                else:
+                    stock.columns = tuple(tbs.CN_STOCK_HIST_DATA['columns'])
+                    data = stock.sort_index()
+                    if is_cache:
+                        store.stage(code, data, date_start, covered_end)
+                        store.count('miss')
+                result[code] = data
+            except Exception as e:
+                logging.error(f"stockfetch.stocks_hist_raw_fetch处理异常：{code}代码{e}")
+                errors.append(code)
+        return retry, errors
+
+    retry, errors = _fetch(codes, is_cache)
+    if retry:
+        errors.extend(_fetch(retry, False)[1])
+    for attempt in range(fetch_requeue):
+        if not errors:
+            break
+        # 失败的股票最后重新排队抓取，每一轮之前等待的时间递增。
+        logging.info(f"stockfetch.stocks_hist_raw_fetch：{len(errors)}只股票抓取失败，第{attempt + 1}次重新排队抓取")
+        time.sleep(hc.backoff_delay(hc.retries + attempt))
+        errors = _fetch(errors, is_cache)[1]
+    if errors:
+        logging.error(f"stockfetch.stocks_hist_raw_fetch：{len(errors)}只股票重试后仍然失败：{errors[:20]}")
+        if failed is not None:
+            failed.extend(errors)
+    return result
+
+
+# 批量抓取股票历史数据并复权，返回 {stock: DataFrame}，记录抓取速度。
+# 重试后仍然抓取失败的股票放入 failed（传入列表时）。
+def fetch_stocks_hist(stocks, date_start, is_cache=True, adjust='qfq', workers=None, failed=None):
+    _data = {}
+    code_stock = {stock[1]: stock for stock in stocks}
+    try:
+        fetcher = bfe.BatchFetcher(workers if workers is not None else fetch_concurrency)
+        _failed = []
+        frames = stocks_hist_raw_fetch(list(code_stock.keys()), date_start, is_cache, fetcher, _failed)
+        if failed is not None:
+            failed.extend(code_stock[code] for code in _failed)
+        factors = had.get_factors()
+        for code, data in frames.items():
+            data = adjust_hist(code, data, adjust, factors)
+            _fill_hist_data(data)
+            _data[code_stock[code]] = data
+        logging.info(f"stockfetch.fetch_stocks_hist：抓取统计{fetcher.report()}，复权统计{had.fallback_stats()}")
     except Exception as e:
-        logging.error(f"stockfetch.stock_hist_cache处理异常：{code}代码{e}")
-    return None
+        logging.error(f"stockfetch.fetch_stocks_hist处理异常：{e}")
+        if failed is not None:
+            failed[:] = [stock for stock in stocks if stock not in _data]
+    return _data
+
+
+# 分时接口字段和分钟K线存储字段的对应关系。
+_MINUTE_COLUMNS = {'时间': 'time', '开盘': 'open', '收盘': 'close', '最高': 'high', '最低': 'low',
+                   '成交量': 'volume', '成交额': 'amount'}
+
+
+# 批量抓取1分钟K线（不复权），返回 {code: DataFrame}，列为 time、open、close、high、low、volume、amount。
+# ndays 为最近几个交易日，最多5。
+def fetch_stocks_minute(codes, ndays=1, workers=None):
+    _data = {}
+    try:
+        fetcher = bfe.BatchFetcher(workers if workers is not None else fetch_concurrency)
+        jobs = {}
+        for code in codes:
+            try:
+                jobs[code] = she.stock_zh_a_hist_min_request(symbol=code, period="1", ndays=ndays)
+            except Exception as e:
+                logging.error(f"stockfetch.fetch_stocks_minute处理异常：{code}代码{e}")
+        for code, data in fetcher.fetch(jobs, she.stock_zh_a_hist_min_parse).items():
+            if isinstance(data, Exception):
+                logging.error(f"stockfetch.fetch_stocks_minute处理异常：{code}代码{data}")
+                continue
+            if data is None or len(data.index) == 0:
+                continue
+            _data[code] = data[list(_MINUTE_COLUMNS)].rename(columns=_MINUTE_COLUMNS)
+        logging.info(f"stockfetch.fetch_stocks_minute：抓取统计{fetcher.report()}")
+    except Exception as e:
+        logging.error(f"stockfetch.fetch_stocks_minute处理异常：{e}")
+    return _data
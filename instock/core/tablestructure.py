@@ -27,63 +27,63 @@ TABLE_CN_STOCK_ATTENTION = {'name': 'cn_stock_attention', 'cn': '我的关注',
 
 TABLE_CN_ETF_SPOT = {'name': 'cn_etf_spot', 'cn': '每日ETF数据',
                      'columns': {'date': {'type': DATE, 'cn': '日期', 'size': 0},
-                                 'code': {'type': VARCHAR(6, _COLLATE), 'cn': '代码', 'size': 60},
-                                 'name': {'type': VARCHAR(20, _COLLATE), 'cn': '名称', 'size': 120},
-                                 'new_price': {'type': FLOAT, 'cn': '最新价', 'size': 70},
-                                 'change_rate': {'type': FLOAT, 'cn': '涨跌幅', 'size': 70},
-                                 'ups_downs': {'type': FLOAT, 'cn': '涨跌额', 'size': 70},
-                                 'volume': {'type': BIGINT, 'cn': '成交量', 'size': 90},
-                                 'deal_amount': {'type': BIGINT, 'cn': '成交额', 'size': 100},
-                                 'open_price': {'type': FLOAT, 'cn': '开盘价', 'size': 70},
-                                 'high_price': {'type': FLOAT, 'cn': '最高价', 'size': 70},
-                                 'low_price': {'type': FLOAT, 'cn': '最低价', 'size': 70},
-                                 'pre_close_price': {'type': FLOAT, 'cn': '昨收', 'size': 70},
-                                 'turnoverrate': {'type': FLOAT, 'cn': '换手率', 'size': 70},
-                                 'total_market_cap': {'type': BIGINT, 'cn': '总市值', 'size': 120},
-                                 'free_cap': {'type': BIGINT, 'cn': '流通市值', 'size': 120}}}
+                                 'code': {'type': VARCHAR(6, _COLLATE), 'cn': '代码', 'size': 60, 'map': 'f12'},
+                                 'name': {'type': VARCHAR(20, _COLLATE), 'cn': '名称', 'size': 120, 'map': 'f14'},
+                                 'new_price': {'type': FLOAT, 'cn': '最新价', 'size': 70, 'map': 'f2'},
+                                 'change_rate': {'type': FLOAT, 'cn': '涨跌幅', 'size': 70, 'map': 'f3'},
+                                 'ups_downs': {'type': FLOAT, 'cn': '涨跌额', 'size': 70, 'map': 'f4'},
+                                 'volume': {'type': BIGINT, 'cn': '成交量', 'size': 90, 'map': 'f5'},
+                                 'deal_amount': {'type': BIGINT, 'cn': '成交额', 'size': 100, 'map': 'f6'},
+                                 'open_price': {'type': FLOAT, 'cn': '开盘价', 'size': 70, 'map': 'f17'},
+                                 'high_price': {'type': FLOAT, 'cn': '最高价', 'size': 70, 'map': 'f15'},
+                                 'low_price': {'type': FLOAT, 'cn': '最低价', 'size': 70, 'map': 'f16'},
+                                 'pre_close_price': {'type': FLOAT, 'cn': '昨收', 'size': 70, 'map': 'f18'},
+                                 'turnoverrate': {'type': FLOAT, 'cn': '换手率', 'size': 70, 'map': 'f8'},
+                                 'total_market_cap': {'type': BIGINT, 'cn': '总市值', 'size': 120, 'map': 'f20'},
+                                 'free_cap': {'type': BIGINT, 'cn': '流通市值', 'size': 120, 'map': 'f21'}}}
 
 TABLE_CN_STOCK_SPOT = {'name': 'cn_stock_spot', 'cn': '每日股票数据',
                        'columns': {'date': {'type': DATE, 'cn': '日期', 'size': 0},
-                                   'code': {'type': VARCHAR(6, _COLLATE), 'cn': '代码', 'size': 60},
-                                   'name': {'type': VARCHAR(20, _COLLATE), 'cn': '名称', 'size': 70},
-                                   'new_price': {'type': FLOAT, 'cn': '最新价', 'size': 70},
-                                   'change_rate': {'type': FLOAT, 'cn': '涨跌幅', 'size': 70},
-                                   'ups_downs': {'type': FLOAT, 'cn': '涨跌额', 'size': 70},
-                                   'volume': {'type': BIGINT, 'cn': '成交量', 'size': 90},
-                                   'deal_amount': {'type': BIGINT, 'cn': '成交额', 'size': 100},
-                                   'amplitude': {'type': FLOAT, 'cn': '振幅', 'size': 70},
-                                   'turnoverrate': {'type': FLOAT, 'cn': '换手率', 'size': 70},
-                                   'volume_ratio': {'type': FLOAT, 'cn': '量比', 'size': 70},
-                                   'open_price': {'type': FLOAT, 'cn': '今开', 'size': 70},
-                                   'high_price': {'type': FLOAT, 'cn': '最高', 'size': 70},
-                                   'low_price': {'type': FLOAT, 'cn': '最低', 'size': 70},
-                                   'pre_close_price': {'type': FLOAT, 'cn': '昨收', 'size': 70},
-                                   'speed_increase': {'type': FLOAT, 'cn': '涨速', 'size': 70},
-                                   'speed_increase_5': {'type': FLOAT, 'cn': '5分钟涨跌', 'size': 70},
-                                   'speed_increase_60': {'type': FLOAT, 'cn': '60日涨跌幅', 'size': 70},
-                                   'speed_increase_all': {'type': FLOAT, 'cn': '年初至今涨跌幅', 'size': 70},
-                                   'dtsyl': {'type': FLOAT, 'cn': '市盈率动', 'size': 70},
-                                   'pe9': {'type': FLOAT, 'cn': '市盈率TTM', 'size': 70},
-                                   'pe': {'type': FLOAT, 'cn': '市盈率静', 'size': 70},
-                                   'pbnewmrq': {'type': FLOAT, 'cn': '市净率', 'size': 70},
-                                   'basic_eps': {'type': FLOAT, 'cn': '每股收益', 'size': 70},
-                                   'bvps': {'type': FLOAT, 'cn': '每股净资产', 'size': 70},
-                                   'per_capital_reserve': {'type': FLOAT, 'cn': '每股公积金', 'size': 70},
-                                   'per_unassign_profit': {'type': FLOAT, 'cn': '每股未分配利润', 'size': 70},
-                                   'roe_weight': {'type': FLOAT, 'cn': '加权净资产收益率', 'size': 70},
-                                   'sale_gpr': {'type': FLOAT, 'cn': '毛利率', 'size': 70},
-                                   'debt_asset_ratio': {'type': FLOAT, 'cn': '资产负债率', 'size': 70},
-                                   'total_operate_income': {'type': BIGINT, 'cn': '营业收入', 'size': 120},
-                                   'toi_yoy_ratio': {'type': FLOAT, 'cn': '营业收入同比增长', 'size': 70},
-                                   'parent_netprofit': {'type': BIGINT, 'cn': '归属净利润', 'size': 110},
-                                   'netprofit_yoy_ratio': {'type': FLOAT, 'cn': '归属净利润同比增长', 'size': 70},
-                                   'report_date': {'type': DATE, 'cn': '报告期', 'size': 110},
-                                   'total_shares': {'type': BIGINT, 'cn': '总股本', 'size': 120},
-                                   'free_shares': {'type': BIGINT, 'cn': '已流通股份', 'size': 120},
-                                   'total_market_cap': {'type': BIGINT, 'cn': '总市值', 'size': 120},
-                                   'free_cap': {'type': BIGINT, 'cn': '流通市值', 'size': 120},
-                                   'industry': {'type': VARCHAR(20, _COLLATE), 'cn': '所处行业', 'size': 100},
-                                   'listing_date': {'type': DATE, 'cn': '上市时间', 'size': 110}}}
+                                   'code': {'type': VARCHAR(6, _COLLATE), 'cn': '代码', 'size': 60, 'map': 'f12'},
+                                   'name': {'type': VARCHAR(20, _COLLATE), 'cn': '名称', 'size': 70, 'map': 'f14'},
+                                   'new_price': {'type': FLOAT, 'cn': '最新价', 'size': 70, 'map': 'f2'},
+                                   'change_rate': {'type': FLOAT, 'cn': '涨跌幅', 'size': 70, 'map': 'f3'},
+                                   'ups_downs': {'type': FLOAT, 'cn': '涨跌额', 'size': 70, 'map': 'f4'},
+                                   'volume': {'type': BIGINT, 'cn': '成交量', 'size': 90, 'map': 'f5'},
+                                   'deal_amount': {'type': BIGINT, 'cn': '成交额', 'size': 100, 'map': 'f6'},
+                                   'amplitude': {'type': FLOAT, 'cn': '振幅', 'size': 70, 'map': 'f7'},
+                                   'turnoverrate': {'type': FLOAT, 'cn': '换手率', 'size': 70, 'map': 'f8'},
+                                   'volume_ratio': {'type': FLOAT, 'cn': '量比', 'size': 70, 'map': 'f10'},
+                                   'open_price': {'type': FLOAT, 'cn': '今开', 'size': 70, 'map': 'f17'},
+                                   'high_price': {'type': FLOAT, 'cn': '最高', 'size': 70, 'map': 'f15'},
+                                   'low_price': {'type': FLOAT, 'cn': '最低', 'size': 70, 'map': 'f16'},
+                                   'pre_close_price': {'type': FLOAT, 'cn': '昨收', 'size': 70, 'map': 'f18'},
+                                   'speed_increase': {'type': FLOAT, 'cn': '涨速', 'size': 70, 'map': 'f22'},
+                                   'speed_increase_5': {'type': FLOAT, 'cn': '5分钟涨跌', 'size': 70, 'map': 'f11'},
+                                   'speed_increase_60': {'type': FLOAT, 'cn': '60日涨跌幅', 'size': 70, 'map': 'f24'},
+                                   'speed_increase_all': {'type': FLOAT, 'cn': '年初至今涨跌幅', 'size': 70, 'map': 'f25'},
+                                   'dtsyl': {'type': FLOAT, 'cn': '市盈率动', 'size': 70, 'map': 'f9'},
+                                   'pe9': {'type': FLOAT, 'cn': '市盈率TTM', 'size': 70, 'map': 'f115'},
+                                   'pe': {'type': FLOAT, 'cn': '市盈率静', 'size': 70, 'map': 'f114'},
+                                   'pbnewmrq': {'type': FLOAT, 'cn': '市净率', 'size': 70, 'map': 'f23'},
+                                   'basic_eps': {'type': FLOAT, 'cn': '每股收益', 'size': 70, 'map': 'f112'},
+                                   'bvps': {'type': FLOAT, 'cn': '每股净资产', 'size': 70, 'map': 'f113'},
+                                   'per_capital_reserve': {'type': FLOAT, 'cn': '每股公积金', 'size': 70, 'map': 'f61'},
+                                   'per_unassign_profit': {'type': FLOAT, 'cn': '每股未分配利润', 'size': 70, 'map': 'f48'},
+                                   'roe_weight': {'type': FLOAT, 'cn': '加权净资产收益率', 'size': 70, 'map': 'f37'},
+                                   'sale_gpr': {'type': FLOAT, 'cn': '毛利率', 'size': 70, 'map': 'f49'},
+                                   'debt_asset_ratio': {'type': FLOAT, 'cn': '资产负债率', 'size': 70, 'map': 'f57'},
+                                   'total_operate_income': {'type': BIGINT, 'cn': '营业收入', 'size': 120, 'map': 'f40'},
+                                   'toi_yoy_ratio': {'type': FLOAT, 'cn': '营业收入同比增长', 'size': 70, 'map': 'f41'},
+                                   'parent_netprofit': {'type': BIGINT, 'cn': '归属净利润', 'size': 110, 'map': 'f45'},
+                                   'netprofit_yoy_ratio': {'type': FLOAT, 'cn': '归属净利润同比增长', 'size': 70, 'map': 'f46'},
+                                   'report_date': {'type': DATE, 'cn': '报告期', 'size': 110, 'map': 'f221'},
+                                   'total_shares': {'type': BIGINT, 'cn': '总股本', 'size': 120, 'map': 'f38'},
+                                   'free_shares': {'type': BIGINT, 'cn': '已流通股份', 'size': 120, 'map': 'f39'},
+                                   'total_market_cap': {'type': BIGINT, 'cn': '总市值', 'size': 120, 'map': 'f20'},
+                                   'free_cap': {'type': BIGINT, 'cn': '流通市值', 'size': 120, 'map': 'f21'},
+                                   'industry': {'type': VARCHAR(20, _COLLATE), 'cn': '所处行业', 'size': 100, 'map': 'f100'},
+                                   'listing_date': {'type': DATE, 'cn': '上市时间', 'size': 110, 'map': 'f26'}}}
 
 TABLE_CN_STOCK_SPOT_BUY = {'name': 'cn_stock_spot_buy', 'cn': '基本面选股',
                            'columns': TABLE_CN_STOCK_SPOT['columns'].copy()}
@@ -1107,6 +1107,16 @@ def get_field_types(cols):
     return data
 
 
+# 数据源字段到列的映射：{接口字段: (列名, 类型名)}，按列的顺序，没有 map 的列跳过。
+def get_field_maps(cols):
+    data = {}
+    for k in cols:
+        _map = cols[k].get('map')
+        if _map is not None:
+            data[_map] = (k, get_field_type_name(cols[k]['type']))
+    return data
+
+
 def get_field_type_name(col_type):
     if col_type == DATE:
         return "datetime"
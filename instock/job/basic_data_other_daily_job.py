@@ -11,9 +11,11 @@ cpath_current = os.path.dirname(os.path.dirname(__file__))
 cpath = os.path.abspath(os.path.join(cpath_current, os.pardir))
 sys.path.append(cpath)
 import instock.lib.run_template as runt
+import instock.lib.trade_time as trd
 import instock.core.tablestructure as tbs
 import instock.lib.database as mdb
 import instock.core.stockfetch as stf
+import instock.core.history.adjust as had
 
 __author__ = 'myh '
 __date__ = '2023/3/10 '
@@ -185,10 +187,13 @@ def save_nph_stock_bonus(date, before=True):
     if before:
         return
 
+    backfill_stock_bonus(date)
     try:
         data = stf.fetch_stocks_bonus(date)
         if data is None or len(data.index) == 0:
             return
+        # 更新本地复权用的除权除息数据。
+        had.get_factors().update(data)
 
         table_name = tbs.TABLE_CN_STOCK_BONUS['name']
         # 删除老数据。
@@ -203,6 +208,21 @@ def save_nph_stock_bonus(date, before=True):
         logging.error(f"basic_data_other_daily_job.save_nph_stock_bonus处理异常：{e}")
 
 
+# 回补历史报告期的分红配送数据，本地复权需要历史行情存储中所有除权除息日的派现和送转。
+# 上一个报告期的除权除息可能还没有实施，每天更新；更早的报告期回补一次后记录下来，不再重复抓取。
+def backfill_stock_bonus(date):
+    factors = had.get_factors()
+    periods = factors.periods()
+    for i, report_date in enumerate(trd.get_bonus_report_dates(had.report_periods)[1:]):
+        if i > 0 and report_date in periods:
+            continue
+        try:
+            data = stf.fetch_stocks_bonus(date, report_date)
+            factors.update(data, report_date if i > 0 else None)
+        except Exception as e:
+            logging.error(f"basic_data_other_daily_job.backfill_stock_bonus处理异常：{report_date}报告期{e}")
+
+
 # 基本面选股
 def stock_spot_buy(date):
     try:
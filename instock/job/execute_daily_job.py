@@ -5,6 +5,7 @@
 import time
 import datetime
 import concurrent.futures
+import multiprocessing
 import logging
 import os.path
 import sys
@@ -28,11 +29,40 @@ import backtest_data_daily_job as bdj
 import klinepattern_data_daily_job as kdj
 import selection_data_daily_job as sddj
 import strategy_position_daily_job as spdj
+import hist_cache_manage_job as hcmj
+import instock.lib.trade_time as trd
+import instock.core.history.shared as shd
+import instock.core.crawling.http_client as hc
+import instock.core.crawling.replay as rp
+from instock.core.singleton_stock import stock_hist_data
 
 __author__ = 'myh '
 __date__ = '2023/3/10 '
 
 
+# 子进程初始化：挂载主进程发布的历史行情，作为 stock_hist_data 单例。
+def _attach_hist_data(name):
+    try:
+        stock_hist_data.attach(shd.attach_panel(name))
+    except Exception as e:
+        logging.error(f"execute_daily_job._attach_hist_data处理异常：{e}")
+
+
+# 主进程加载一次历史行情并发布到共享内存，返回 None 表示不能发布。
+def _publish_hist_data():
+    if len(sys.argv) > 1:
+        return None
+    try:
+        run_date, run_date_nph = trd.get_trade_date_last()
+        panel = stock_hist_data(date=run_date_nph).get_panel()
+        if panel is None:
+            return None
+        return shd.SharedPanel(panel)
+    except Exception as e:
+        logging.error(f"execute_daily_job._publish_hist_data处理异常：{e}")
+    return None
+
+
 def main():
     start = time.time()
     _start = datetime.datetime.now()
@@ -43,15 +73,35 @@ def main():
     hdj.main()
     # 第2.2步创建综合股票数据表
     sddj.main()
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # # 第3.1步创建股票其它基础数据表
-        executor.submit(hdtj.main)
-        # # 第3.2步创建股票指标数据表
-        executor.submit(gdj.main)
-        # # # # 第4步创建股票k线形态表
-        executor.submit(kdj.main)
-        # # # # 第5步创建股票策略数据表
-        executor.submit(sdj.main)
+    # 指标、k线形态、策略使用同一份历史行情，主进程加载后发布到共享内存，
+    # 多进程并行计算时子进程直接挂载，不再各自加载。
+    shared = _publish_hist_data()
+    if shared is None:
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            # # 第3.1步创建股票其它基础数据表
+            executor.submit(hdtj.main)
+            # # 第3.2步创建股票指标数据表
+            executor.submit(gdj.main)
+            # # # # 第4步创建股票k线形态表
+            executor.submit(kdj.main)
+            # # # # 第5步创建股票策略数据表
+            executor.submit(sdj.main)
+    else:
+        with shared, concurrent.futures.ThreadPoolExecutor() as executor, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context('spawn'),
+                                                       initializer=_attach_hist_data,
+                                                       initargs=(shared.name,)) as process_executor:
+            # # 第3.1步创建股票其它基础数据表
+            executor.submit(hdtj.main)
+            # # 第3.2步创建股票指标数据表
+            # # # # 第4步创建股票k线形态表
+            # # # # 第5步创建股票策略数据表
+            futures = [process_executor.submit(job) for job in (gdj.main, kdj.main, sdj.main)]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"execute_daily_job.main处理异常：{e}")
 
     # # # # 第6步创建股票回测
     bdj.main()
@@ -62,6 +112,11 @@ def main():
     # # # # 第8步持仓股票数据分析
     spdj.main()
 
+    # # # # 第9步整理历史行情缓存
+    hcmj.main()
+
+    if hc.record_path or hc.replay_path:
+        logging.info(f"######## 录制/回放请求统计(主进程): {rp.stats.snapshot()} #######")
     logging.info("######## 完成任务, 使用时间: %s 秒 #######" % (time.time() - start))
 
 
@@ -0,0 +1,42 @@
+#!/usr/local/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os.path
+import sys
+
+cpath_current = os.path.dirname(os.path.dirname(__file__))
+cpath = os.path.abspath(os.path.join(cpath_current, os.pardir))
+sys.path.append(cpath)
+import instock.core.history.manager as hcm
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+
+# 整理历史行情缓存：按保存天数和大小预算删除交易日分区，不再整体清空。
+def manage_hist_cache():
+    try:
+        removed = hcm.purge_legacy()
+        if removed:
+            logging.info(f"hist_cache_manage_job：删除旧版本缓存{removed}")
+        manager = hcm.get_manager('')
+        manager.store.cleanup_tmp()
+        bad = manager.store.verify()
+        if bad:
+            logging.error(f"hist_cache_manage_job：交易日分区校验失败已隔离{bad}")
+        evicted = manager.evict()
+        if evicted:
+            logging.info(f"hist_cache_manage_job：删除交易日分区{evicted[0]}~{evicted[-1]}共{len(evicted)}个")
+        logging.info(f"hist_cache_manage_job：缓存统计{manager.report()}")
+    except Exception as e:
+        logging.error(f"hist_cache_manage_job.manage_hist_cache处理异常：{e}")
+
+
+def main():
+    manage_hist_cache()
+
+
+# main函数入口
+if __name__ == '__main__':
+    main()
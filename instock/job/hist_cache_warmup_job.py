@@ -0,0 +1,98 @@
+#!/usr/local/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os.path
+import sys
+import time
+import threading
+import concurrent.futures
+
+cpath_current = os.path.dirname(os.path.dirname(__file__))
+cpath = os.path.abspath(os.path.join(cpath_current, os.pardir))
+sys.path.append(cpath)
+import instock.lib.run_template as runt
+import instock.lib.trade_time as trd
+import instock.core.stockfetch as stf
+import instock.core.history.store as hst
+import instock.core.history.manager as hcm
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 历史行情缓存预热：交易时段每小时（cron.hourly）把一部分股票的历史行情补到最近一个已收盘的交易日，
+# 收盘后的每日任务只需要增量抓取当天的一根K线。
+# 预热只把抓取的数据写入 staging，不合并交易日分区，合并由收盘后的每日任务完成，
+# 不会和每日任务、缓存管理任务同时改写交易日分区。没有补完的股票由下一次预热继续。
+rate = 4.0  # 每秒最多抓取几只股票
+workers = 4
+budget = 10 * 60  # 每次最多运行的秒数，远小于一小时的运行间隔，不影响同一批的其他任务和下一次预热
+
+# 使用环境变量配置,docker -e 传递
+_rate = os.environ.get('hist_warmup_rate')
+if _rate is not None:
+    rate = float(_rate)
+_budget = os.environ.get('hist_warmup_budget')
+if _budget is not None:
+    budget = int(_budget)
+
+
+class _RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def warmup(date):
+    try:
+        data = stf.fetch_stocks(date)
+        if data is None:
+            return
+        codes = data['code'].values.tolist()
+        date_start = trd.get_trade_hist_interval(date.strftime("%Y-%m-%d"))[0]
+        covered_end = stf.get_hist_covered_end()
+        store = hst.get_store('')
+        codes = [code for code in codes if not store.covers(code, date_start, covered_end)]
+        if not codes:
+            logging.info(f"hist_cache_warmup_job：历史行情缓存已覆盖到{covered_end}")
+            return
+
+        limiter = _RateLimiter(rate)
+        deadline = time.monotonic() + budget
+
+        def _fetch(code):
+            if time.monotonic() > deadline:
+                return False
+            limiter.wait()
+            return stf.stock_hist_raw_cache(code, date_start) is not None
+
+        done = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in concurrent.futures.as_completed([executor.submit(_fetch, code) for code in codes]):
+                try:
+                    if future.result():
+                        done += 1
+                except Exception as e:
+                    logging.error(f"hist_cache_warmup_job.warmup处理异常：{e}")
+        hcm.get_manager('').flush()
+        logging.info(f"hist_cache_warmup_job：预热{done}/{len(codes)}只股票到{covered_end}")
+    except Exception as e:
+        logging.error(f"hist_cache_warmup_job.warmup处理异常：{e}")
+
+
+def main():
+    runt.run_with_args(warmup)
+
+
+# main函数入口
+if __name__ == '__main__':
+    main()
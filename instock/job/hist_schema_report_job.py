@@ -0,0 +1,37 @@
+#!/usr/local/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os.path
+import sys
+
+cpath_current = os.path.dirname(os.path.dirname(__file__))
+cpath = os.path.abspath(os.path.join(cpath_current, os.pardir))
+sys.path.append(cpath)
+import instock.lib.run_template as runt
+import instock.core.history.schema as hsc
+from instock.core.singleton_stock import stock_hist_data
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+
+# 全部股票的历史行情用标准格式加载，和紧凑格式比较内存和速度。
+def prepare(date):
+    try:
+        stocks_data = stock_hist_data(date=date, compact=False).get_data()
+        if stocks_data is None:
+            return
+        result = hsc.report(stocks_data)
+        logging.info(f"hist_schema_report_job：历史行情紧凑格式对比{result}")
+    except Exception as e:
+        logging.error(f"hist_schema_report_job.prepare处理异常：{e}")
+
+
+def main():
+    runt.run_with_args(prepare)
+
+
+# main函数入口
+if __name__ == '__main__':
+    main()
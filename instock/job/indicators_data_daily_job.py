@@ -14,6 +14,7 @@ import instock.lib.run_template as runt
 import instock.core.tablestructure as tbs
 import instock.lib.database as mdb
 import instock.core.indicator.calculate_indicator as idr
+import instock.core.indicator.calculate_indicator_batch as idb
 from instock.core.singleton_stock import stock_hist_data
 
 __author__ = 'myh '
@@ -22,10 +23,14 @@ __date__ = '2023/3/10 '
 
 def prepare(date):
     try:
-        stocks_data = stock_hist_data(date=date).get_data()
-        if stocks_data is None:
+        stocks = stock_hist_data(date=date)
+        panel = stocks.get_panel()
+        if panel is None:
             return
-        results = run_check(stocks_data, date=date)
+        # 全市场一次批量计算，失败时再逐只股票计算。
+        results = run_batch(panel, date=date)
+        if results is None:
+            results = run_check(stocks.get_data(), date=date)
         if results is None:
             return
 
@@ -82,6 +87,18 @@ def run_check(stocks, date=None, workers=40):
         return data
 
 
+# 在 股票×交易日 的面板数据上批量计算全市场的指标，返回格式和 run_check 相同。
+def run_batch(panel, date=None):
+    try:
+        data = idb.get_indicators_panel(panel, date=date)
+        if data is None or len(data.index) == 0:
+            return None
+        return {panel.keys[i]: row for i, row in data.iterrows()}
+    except Exception as e:
+        logging.error(f"indicators_data_daily_job.run_batch处理异常：{e}")
+    return None
+
+
 # 对每日指标数据，进行筛选。将符合条件的。二次筛选出来。
 # 只是做简单筛选
 def guess_buy(date):
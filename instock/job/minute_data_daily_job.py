@@ -0,0 +1,60 @@
+#!/usr/local/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os.path
+import sys
+import datetime
+
+cpath_current = os.path.dirname(os.path.dirname(__file__))
+cpath = os.path.abspath(os.path.join(cpath_current, os.pardir))
+sys.path.append(cpath)
+import instock.lib.run_template as runt
+import instock.lib.trade_time as trd
+import instock.core.stockfetch as stf
+import instock.core.history.minute as hmn
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 分钟K线：抓取全市场的1分钟K线写入分钟K线存储（见 instock.core.history.minute），
+# 同时在本地生成 5/15/30/60 分钟K线。盘中每小时运行一次增量写入，收盘后的一次得到完整的一天。
+# 数据源只提供最近5个交易日的1分钟K线，更早的日期不能补抓。
+max_days = 5
+periods = hmn.PERIODS
+
+# 使用环境变量配置,docker -e 传递
+_periods = os.environ.get('minute_periods')
+if _periods is not None:
+    periods = tuple(int(p) for p in _periods.split(',') if p)
+    if 1 not in periods:
+        periods = (1,) + periods
+
+
+def save_minute_data(date):
+    try:
+        ndays = trd.get_trade_date_count(date, datetime.date.today())
+        if ndays > max_days:
+            logging.info(f"minute_data_daily_job：{date}超过最近{max_days}个交易日，不能抓取分钟K线")
+            return
+        data = stf.fetch_stocks(date)
+        if data is None or len(data.index) == 0:
+            return
+        codes = data['code'].values.tolist()
+        frames = stf.fetch_stocks_minute(codes, ndays=max(ndays, 1))
+        # 只写入 date 当天的K线
+        day = date.strftime("%Y-%m-%d")
+        frames = {code: frame.loc[frame['time'].str.startswith(day)] for code, frame in frames.items()}
+        rows = hmn.get_minute_store().ingest(frames, periods)
+        logging.info(f"minute_data_daily_job：{day}写入{len(frames)}只股票{rows}根1分钟K线")
+    except Exception as e:
+        logging.error(f"minute_data_daily_job.save_minute_data处理异常：{e}")
+
+
+def main():
+    runt.run_with_args(save_minute_data)
+
+
+# main函数入口
+if __name__ == '__main__':
+    main()
@@ -14,7 +14,7 @@ class singleton_type(type):
 
     def __call__(cls, *args, **kwargs):  # 创建cls的对象时候调用
         with singleton_type.single_lock:
-            if not hasattr(cls, "_instance"):
+            if "_instance" not in cls.__dict__:  # 子类有自己的单例，不使用父类的
                 cls._instance = super(singleton_type, cls).__call__(*args, **kwargs)  # 创建cls的对象
 
         return cls._instance
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import numpy as np
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+
+# 交易日历：升序的 datetime64[D] 数组，查找、前后第N个交易日、区间交易日数都用二分查找。
+# 日期参数支持 datetime.date、datetime.datetime、'YYYY-MM-DD' 字符串和 numpy datetime64，
+# 以及它们的数组（批量计算）。
+class TradeCalendar:
+    def __init__(self, days):
+        self.days = np.unique(np.asarray(days, dtype='datetime64[D]'))
+
+    @classmethod
+    def from_dates(cls, dates):
+        return cls(np.array([np.datetime64(d, 'D') for d in dates], dtype='datetime64[D]'))
+
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, date):
+        return bool(self.is_trade_date(date))
+
+    @staticmethod
+    def to_days(date):
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        if isinstance(date, (list, tuple)):
+            return np.array([TradeCalendar.to_days(d) for d in date], dtype='datetime64[D]')
+        return np.asarray(date, dtype='datetime64[D]') if not isinstance(date, datetime.date) \
+            else np.datetime64(date, 'D')
+
+    @property
+    def first(self):
+        return self.days[0].astype(datetime.date)
+
+    @property
+    def last(self):
+        return self.days[-1].astype(datetime.date)
+
+    def is_trade_date(self, date):
+        days = self.to_days(date)
+        i = np.searchsorted(self.days, days, side='left')
+        found = i < len(self.days)
+        found &= self.days[np.minimum(i, len(self.days) - 1)] == days
+        return found
+
+    # 第 n 个交易日之后（n 为负数时之前）的交易日，date 不是交易日时从它所在位置开始数。
+    # 超出日历范围返回 NaT（数组）或 None。
+    def shift(self, date, n):
+        days = self.to_days(date)
+        if n > 0:
+            i = np.searchsorted(self.days, days, side='right') + (n - 1)
+        elif n < 0:
+            i = np.searchsorted(self.days, days, side='left') + n
+        else:
+            i = np.searchsorted(self.days, days, side='left')
+        valid = (i >= 0) & (i < len(self.days))
+        result = np.where(valid, self.days[np.clip(i, 0, len(self.days) - 1)], np.datetime64('NaT'))
+        if np.ndim(result) == 0:
+            return None if not valid else result.item()
+        return result
+
+    # 之前第 n 个交易日，不包括 date。
+    def previous(self, date, n=1):
+        return self.shift(date, -n)
+
+    # 之后第 n 个交易日，不包括 date。
+    def next(self, date, n=1):
+        return self.shift(date, n)
+
+    # date 当天或之前最近的交易日。
+    def floor(self, date):
+        days = self.to_days(date)
+        i = np.searchsorted(self.days, days, side='right') - 1
+        valid = i >= 0
+        result = np.where(valid, self.days[np.maximum(i, 0)], np.datetime64('NaT'))
+        if np.ndim(result) == 0:
+            return None if not valid else result.item()
+        return result
+
+    # [start, end] 之间的交易日数。
+    def count(self, start, end):
+        return np.searchsorted(self.days, self.to_days(end), side='right') - \
+            np.searchsorted(self.days, self.to_days(start), side='left')
+
+    # [start, end] 之间的交易日，返回 datetime64[D] 数组。
+    def between(self, start, end):
+        i = np.searchsorted(self.days, self.to_days(start), side='left')
+        j = np.searchsorted(self.days, self.to_days(end), side='right')
+        return self.days[i:j]
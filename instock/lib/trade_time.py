@@ -9,7 +9,7 @@ __date__ = '2023/4/10 '
 
 
 def is_trade_date(date=None):
-    trade_date = stock_trade_date().get_data()
+    trade_date = stock_trade_date().get_data(date)
     if trade_date is None:
         return False
     if date in trade_date:
@@ -18,28 +18,36 @@ def is_trade_date(date=None):
         return False
 
 
-def get_previous_trade_date(date):
-    trade_date = stock_trade_date().get_data()
+def get_previous_trade_date(date, n=1):
+    trade_date = stock_trade_date().get_data(date)
     if trade_date is None:
         return date
-    tmp_date = date
-    while True:
-        tmp_date += datetime.timedelta(days=-1)
-        if tmp_date in trade_date:
-            break
-    return tmp_date
+    tmp_date = trade_date.previous(date, n)
+    return date if tmp_date is None else tmp_date
 
 
-def get_next_trade_date(date):
-    trade_date = stock_trade_date().get_data()
+def get_next_trade_date(date, n=1):
+    trade_date = stock_trade_date().get_data(date)
     if trade_date is None:
         return date
-    tmp_date = date
-    while True:
-        tmp_date += datetime.timedelta(days=1)
-        if tmp_date in trade_date:
-            break
-    return tmp_date
+    tmp_date = trade_date.next(date, n)
+    return date if tmp_date is None else tmp_date
+
+
+# [start_date, end_date] 之间的交易日，返回 datetime.date 列表。
+def get_trade_dates(start_date, end_date):
+    trade_date = stock_trade_date().get_data(end_date)
+    if trade_date is None:
+        return []
+    return trade_date.between(start_date, end_date).astype(datetime.date).tolist()
+
+
+# [start_date, end_date] 之间的交易日数。
+def get_trade_date_count(start_date, end_date):
+    trade_date = stock_trade_date().get_data(end_date)
+    if trade_date is None:
+        return 0
+    return int(trade_date.count(start_date, end_date))
 
 
 OPEN_TIME = (
@@ -156,6 +164,21 @@ def get_quarterly_report_date():
     return f"{year}{month_day}"
 
 
+# 最近 count 个分红送配报告期，从新到旧，第一个是 get_bonus_report_date()。
+def get_bonus_report_dates(count):
+    report_date = get_bonus_report_date()
+    year, month_day = int(report_date[:4]), report_date[4:]
+    dates = []
+    for _ in range(count):
+        dates.append(f"{year}{month_day}")
+        if month_day == '1231':
+            month_day = '0630'
+        else:
+            year -= 1
+            month_day = '1231'
+    return dates
+
+
 def get_bonus_report_date():
     now_time = datetime.datetime.now()
     year = now_time.year
@@ -44,7 +44,7 @@ class Strategy(StrategyTemplate):
 
     def get_stocks_to_buy(self) -> List[Tuple[str, float, int]]:
 
-        date_str = trd.get_trade_date_last()
+        date_str = trd.get_trade_date_last()[0]
 
         fetch = mdb.executeSqlFetch(
             f"SELECT * FROM `{tbs.TABLE_CN_STOCK_BUY_DATA['name']}` WHERE `date`='{date_str}'")
@@ -76,7 +76,7 @@ class Strategy(StrategyTemplate):
                 pass
 
     def get_stocks_to_sell(self) -> List[Tuple[str, float, int]]:
-        date_str = trd.get_trade_date_last()
+        date_str = trd.get_trade_date_last()[0]
         tb = tbs.TABLE_CN_STOCK_SELL_DATA['name']
         if not mdb.checkTableIsExist(tb):
             return []
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import instock.core.history.adjust as had
+import instock.lib.trade_time as trd
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 本地复权：有分红配送数据的除权除息日按派现和送转复权，没有的按参考价估算并计数；历史报告期只回补一次。
+
+
+def _frame():
+    close = np.array([10.0, 10.2, 9.5, 9.6, 4.9, 5.0])
+    ups_downs = np.array([0.1, 0.2, -0.2, 0.1, 0.1, 0.1])
+    # 第3根K线派现0.5元，第5根K线10送10
+    return pd.DataFrame({'date': pd.bdate_range('2026-01-05', periods=6).strftime('%Y-%m-%d'),
+                         'open': close, 'close': close, 'high': close, 'low': close,
+                         'volume': np.full(6, 100.0), 'amount': np.full(6, 1000.0),
+                         'amplitude': np.zeros(6), 'quote_change': np.zeros(6),
+                         'ups_downs': ups_downs, 'turnover': np.zeros(6)})
+
+
+def test_fallback_counted():
+    data = _frame()
+    before = had.fallback_stats()
+    qfq = had.adjust_frame(data, 'qfq', {20260107: (0.5, 0.0)}, code='600000')
+    after = had.fallback_stats()
+    assert after['ex_dates'] - before['ex_dates'] == 2
+    assert after['estimated'] - before['estimated'] == 1
+    # 派现按分红配送数据，送转按参考价估算
+    assert qfq['close'].tolist() == [4.75, 4.85, 4.75, 4.8, 4.9, 5.0]
+
+
+def test_bonus_periods(tmp_path):
+    factors = had.BonusFactors(str(tmp_path / 'factors.json'))
+    data = pd.DataFrame({'code': ['600000'], 'ex_dividend_date': ['2026-01-07'],
+                         'bonusaward_rate': [5.0], 'convertible_total_rate': [0.0]})
+    assert factors.update(data, '20250630') == {'600000'}
+    assert factors.update(data) == set()
+    reloaded = had.BonusFactors(str(tmp_path / 'factors.json'))
+    assert reloaded.periods() == {'20250630'}
+    assert reloaded.get('600000') == {20260107: (0.5, 0.0)}
+
+
+def test_bonus_report_dates():
+    dates = trd.get_bonus_report_dates(4)
+    assert dates[0] == trd.get_bonus_report_date()
+    assert len(set(dates)) == 4 and dates == sorted(dates, reverse=True)
+    assert all(d[4:] in ('0630', '1231') for d in dates)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import instock.core.history.schema as hsc
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 紧凑格式转回标准格式：价格按报价精度取整（股票2位、ETF 3位），每只股票只转换一次。
+
+
+def _frame(prices):
+    n = len(prices)
+    return pd.DataFrame({'date': pd.bdate_range('2026-01-05', periods=n).strftime('%Y-%m-%d'),
+                         'open': prices, 'close': prices, 'high': prices, 'low': prices,
+                         'volume': np.full(n, 1000.0), 'amount': np.full(n, 12345.67),
+                         'amplitude': np.full(n, 1.23), 'quote_change': np.full(n, -0.45),
+                         'ups_downs': np.full(n, -0.004), 'turnover': np.full(n, 0.12)})
+
+
+def test_round_trip_precision():
+    etf = _frame([1.234, 0.987, 3.001])
+    standard = hsc.to_standard(hsc.to_compact(etf), 3)
+    for name in ('open', 'close', 'high', 'low', 'ups_downs', 'amplitude', 'quote_change', 'turnover'):
+        np.testing.assert_array_equal(standard[name].values, etf[name].values)
+    assert list(standard['date']) == list(etf['date'])
+
+    stock = _frame([12.34, 9.87, 30.01])
+    standard = hsc.to_standard(hsc.to_compact(stock))
+    np.testing.assert_array_equal(standard['close'].values, stock['close'].values)
+
+
+def test_standard_frames_convert_once():
+    key = ('2026-01-07', '510300', 'x')
+    frames = hsc.StandardFrames(hsc.compact_dict({key: _frame([1.234, 0.987, 3.001])}), 3)
+    first = frames[key]
+    assert first is frames[key]
+    assert first['close'].tolist() == [1.234, 0.987, 3.001]
+    assert key in frames and len(frames) == 1 and list(frames) == [key]
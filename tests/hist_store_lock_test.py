@@ -0,0 +1,73 @@
+import threading
+import time
+from instock.core.history.store import StoreLock
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 存储锁在进程内是读写锁：共享锁可以同时持有，排它锁独占，持有共享锁的线程可以升级。
+
+
+def _run(targets, timeout=10):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout)
+    assert not any(thread.is_alive() for thread in threads), "死锁"
+
+
+def test_shared_holders_run_together(tmp_path):
+    lock = StoreLock(str(tmp_path / 'store.lock'))
+    inside = []
+    barrier = threading.Barrier(4, timeout=5)
+
+    def reader():
+        with lock.hold(False):
+            inside.append(1)
+            # 4个线程都拿到共享锁后才能通过
+            barrier.wait()
+
+    _run([reader] * 4)
+    assert len(inside) == 4
+
+
+def test_exclusive_excludes_readers(tmp_path):
+    lock = StoreLock(str(tmp_path / 'store.lock'))
+    events = []
+
+    def writer():
+        with lock.hold():
+            events.append('w+')
+            time.sleep(0.2)
+            events.append('w-')
+
+    def reader():
+        time.sleep(0.05)
+        with lock.hold(False):
+            events.append('r')
+
+    _run([writer, reader, reader])
+    assert events[:2] == ['w+', 'w-']
+
+
+def test_upgrade_and_nesting(tmp_path):
+    lock = StoreLock(str(tmp_path / 'store.lock'))
+    barrier = threading.Barrier(2, timeout=5)
+    done = []
+
+    def upgrader():
+        with lock.hold(False):
+            barrier.wait()
+            # 两个线程同时升级不会互相等待
+            with lock.hold():
+                with lock.hold(False):
+                    done.append(1)
+            with lock.hold(False):
+                pass
+
+    _run([upgrader, upgrader])
+    assert len(done) == 2
+    # 全部释放后可以再加排它锁
+    with lock.hold():
+        pass
@@ -0,0 +1,76 @@
+import datetime
+import numpy as np
+import pandas as pd
+import instock.core.tablestructure as tbs
+import instock.core.indicator.calculate_indicator as idr
+import instock.core.indicator.calculate_indicator_batch as idb
+from instock.core.history.panel import StockPanel
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 全市场批量计算的指标和逐只股票计算（indicators_data_daily_job.run_check 使用的 get_indicator）一致。
+# 合成的面板包含停牌、上市不久、只有一根K线、计算日期之后才上市的股票。
+
+COLUMNS = ['date', 'code'] + list(tbs.STOCK_STATS_DATA['columns'])
+DATE = datetime.date(2024, 5, 20)
+
+
+def _make(n, seed, start='2024-01-01'):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    pre = np.r_[close[0] * 0.99, close[:-1]]
+    open_ = pre * (1 + rng.normal(0, 0.01, n))
+    high = np.maximum(open_, close) * (1 + rng.random(n) * 0.02)
+    low = np.minimum(open_, close) * (1 - rng.random(n) * 0.02)
+    volume = rng.integers(1, 100000, n).astype(float) * 100
+    data = pd.DataFrame({'date': pd.bdate_range(start, periods=n).strftime('%Y-%m-%d'),
+                         'open': open_.round(2), 'close': close.round(2), 'high': high.round(2),
+                         'low': low.round(2), 'volume': volume,
+                         'amount': volume * close * (1 + rng.normal(0, 0.001, n))})
+    data['p_change'] = np.nan_to_num(data['close'].pct_change().to_numpy() * 100)
+    return data
+
+
+def _stocks():
+    stocks = {}
+    for i in range(60):
+        n = (150, 150, 40, 90, 30, 2, 1, 100)[i % 8]
+        data = _make(n, seed=i)
+        if i % 7 == 0 and n > 40:
+            # 停牌
+            data = data.drop(index=data.index[[5, 17, 33]]).reset_index(drop=True)
+        stocks[(data['date'].iloc[-1], f"{600000 + i:06d}", 'x')] = data
+    # 计算日期之后才上市
+    data = _make(20, seed=100, start='2024-06-03')
+    stocks[(data['date'].iloc[-1], '600100', 'x')] = data
+    # 计算日期之前只有一根K线
+    data = _make(20, seed=101, start='2024-05-20')
+    stocks[(data['date'].iloc[-1], '600101', 'x')] = data
+    return stocks
+
+
+def test_get_indicators_panel():
+    stocks = _stocks()
+    panel = StockPanel.from_dict(stocks)
+    result = idb.get_indicators_panel(panel, date=DATE)
+    assert result is not None
+    assert len(result.index) == len(stocks)
+
+    for i, key in enumerate(panel.keys):
+        expected = idr.get_indicator(key, stocks[key], COLUMNS, date=DATE)
+        assert expected is not None, key
+        actual = result.loc[i]
+        assert actual['date'] == expected['date'] and actual['code'] == expected['code']
+        for name in COLUMNS[2:]:
+            x, y = float(expected[name]), float(actual[name])
+            assert abs(x - y) <= 1e-6 * max(1.0, abs(x)), (key[1], name, x, y)
+
+
+def test_get_indicators_panel_empty_stocks():
+    stocks = _stocks()
+    panel = StockPanel.from_dict(stocks)
+    result = idb.get_indicators_panel(panel, date=DATE)
+    row = result.loc[panel.row('600100')]
+    assert (row[COLUMNS[2:]] == 0).all()
+    assert row['date'] == DATE.strftime("%Y-%m-%d")
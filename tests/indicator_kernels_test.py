@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+import talib as tl
+import instock.core.indicator.kernels as knl
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 递推指标的数组实现：超级趋势和原来逐行 .iloc 的循环一致，SAR、EMA 和 TA-Lib 一致。
+# numpy 实现、Python 循环、numba 编译（安装了 numba 时）分别验证。
+
+N_CODES = 12
+N_DAYS = 250
+
+
+def _bars(seed=0):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, (N_CODES, N_DAYS)), axis=1))
+    high = close * (1 + rng.random((N_CODES, N_DAYS)) * 0.03)
+    low = close * (1 - rng.random((N_CODES, N_DAYS)) * 0.03)
+    return close.round(2), high.round(2), low.round(2)
+
+
+def _bands(close, high, low):
+    atr = np.array([tl.ATR(high[s], low[s], close[s], timeperiod=14) for s in range(len(close))])
+    hl_avg = (high + low) / 2.0
+    return hl_avg + 3 * atr, hl_avg - 3 * atr
+
+
+# 原来 get_indicators 中逐行计算超级趋势的循环
+def _supertrend_reference(close, b_ub, b_lb):
+    size = len(close)
+    ub = np.full(size, np.nan)
+    lb = np.full(size, np.nan)
+    st = np.full(size, np.nan)
+    for i in range(size):
+        if i == 0:
+            ub[i] = b_ub[i]
+            lb[i] = b_lb[i]
+            st[i] = ub[i] if close[i] <= ub[i] else lb[i]
+            continue
+        last_close, curr_close = close[i - 1], close[i]
+        last_ub, last_lb, last_st = ub[i - 1], lb[i - 1], st[i - 1]
+        ub[i] = b_ub[i] if b_ub[i] < last_ub or last_close > last_ub else last_ub
+        lb[i] = b_lb[i] if b_lb[i] > last_lb or last_close < last_lb else last_lb
+        if last_st == last_ub:
+            st[i] = ub[i] if curr_close <= ub[i] else lb[i]
+        elif last_st == last_lb:
+            st[i] = lb[i] if curr_close > lb[i] else ub[i]
+    return ub, lb, st
+
+
+# (超级趋势, SAR, EMA) 的实现
+IMPLEMENTATIONS = {
+    'loop': (knl._supertrend_loop, knl._sar_loop, knl._ema_loop),
+    'numpy': (knl._supertrend_numpy, knl._sar_numpy, knl._ema_numpy),
+    'dispatch': (knl._dispatch(knl._supertrend_loop, knl._supertrend_numpy),
+                 knl._dispatch(knl._sar_loop, knl._sar_numpy),
+                 knl._dispatch(knl._ema_loop, knl._ema_numpy)),
+}
+
+
+def _check_supertrend(supertrend_impl, close, b_ub, b_lb):
+    ub, lb, st = (np.full(close.shape, np.nan) for _ in range(3))
+    supertrend_impl(close, b_ub, b_lb, ub, lb, st)
+    for s in range(len(close)):
+        for expected, actual in zip(_supertrend_reference(close[s], b_ub[s], b_lb[s]), (ub[s], lb[s], st[s])):
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def _check_sar(sar_impl, high, low):
+    out = np.full(high.shape, np.nan)
+    sar_impl(high, low, 0.02, 0.2, out)
+    for s in range(len(high)):
+        np.testing.assert_allclose(out[s], tl.SAR(high[s], low[s], acceleration=0.02, maximum=0.2),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def _check_ema(ema_impl, close):
+    out = np.full(close.shape, np.nan)
+    ema_impl(close, 12, 11, out)
+    for s in range(len(close)):
+        np.testing.assert_allclose(out[s], tl.EMA(close[s], timeperiod=12), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize('name', list(IMPLEMENTATIONS))
+def test_kernels(name):
+    close, high, low = _bars()
+    b_ub, b_lb = _bands(close, high, low)
+    supertrend_impl, sar_impl, ema_impl = IMPLEMENTATIONS[name]
+    _check_supertrend(supertrend_impl, close, b_ub, b_lb)
+    _check_sar(sar_impl, high, low)
+    _check_ema(ema_impl, close)
+    # 单只股票（没有 numba 时走 Python 循环）
+    _check_supertrend(supertrend_impl, close[:1], b_ub[:1], b_lb[:1])
+    _check_sar(sar_impl, high[:1], low[:1])
+
+
+def test_kernels_numba():
+    numba = pytest.importorskip('numba')
+    close, high, low = _bars(1)
+    b_ub, b_lb = _bands(close, high, low)
+    _check_supertrend(numba.njit(knl._supertrend_loop), close, b_ub, b_lb)
+    _check_sar(numba.njit(knl._sar_loop), high, low)
+    _check_ema(numba.njit(knl._ema_loop), close)
+
+
+def test_public_api():
+    close, high, low = _bars(2)
+    b_ub, b_lb = _bands(close, high, low)
+    ub, lb, st = knl.supertrend(close[0], b_ub[0], b_lb[0])
+    for expected, actual in zip(_supertrend_reference(close[0], b_ub[0], b_lb[0]), (ub, lb, st)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(knl.sar(high, low), np.array([tl.SAR(high[s], low[s]) for s in range(N_CODES)]),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(knl.ema(close[0], 26), tl.EMA(close[0], timeperiod=26),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
@@ -0,0 +1,79 @@
+import datetime
+import numpy as np
+import pytest
+import instock.core.stockfetch as stf
+import instock.lib.trade_time as trd
+from instock.core.singleton_trade_date import stock_trade_date
+from instock.lib.trade_calendar import TradeCalendar
+
+__author__ = 'myh '
+__date__ = '2026/10/18 '
+
+# 交易日历的查找：单个日期返回 datetime.date（超出范围返回 None），日期数组返回 datetime64[D] 数组。
+
+DAYS = ['2026-10-12', '2026-10-13', '2026-10-14', '2026-10-15', '2026-10-16', '2026-10-19', '2026-10-20']
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    dates = {datetime.date.fromisoformat(d) for d in DAYS}
+    calls = []
+
+    def fetch(refresh=False):
+        calls.append(refresh)
+        return dates
+
+    monkeypatch.setattr(stf, 'fetch_stocks_trade_date', fetch)
+    if '_instance' in stock_trade_date.__dict__:
+        monkeypatch.delattr(stock_trade_date, '_instance')
+    calls.clear()
+    yield calls
+    if '_instance' in stock_trade_date.__dict__:
+        del stock_trade_date._instance
+
+
+def test_scalar_types():
+    c = TradeCalendar.from_dates(DAYS)
+    saturday = datetime.date(2026, 10, 17)
+    for value, expected in ((c.shift(saturday, -1), datetime.date(2026, 10, 16)),
+                            (c.shift('2026-10-19', 0), datetime.date(2026, 10, 19)),
+                            (c.previous(datetime.datetime(2026, 10, 19, 10, 0)), datetime.date(2026, 10, 16)),
+                            (c.next(saturday), datetime.date(2026, 10, 19)),
+                            (c.next(np.datetime64('2026-10-12'), 2), datetime.date(2026, 10, 14)),
+                            (c.floor(saturday), datetime.date(2026, 10, 16)),
+                            (c.floor('2026-10-20'), datetime.date(2026, 10, 20))):
+        assert type(value) is datetime.date
+        assert value == expected
+    assert c.previous('2026-10-12') is None
+    assert c.next('2026-10-20') is None
+    assert c.floor('2026-10-01') is None
+
+
+def test_array_types():
+    c = TradeCalendar.from_dates(DAYS)
+    result = c.previous(['2026-10-17', '2026-10-12'])
+    assert result.dtype == np.dtype('datetime64[D]')
+    assert result[0] == np.datetime64('2026-10-16') and np.isnat(result[1])
+    assert c.floor(np.array(['2026-10-18'], dtype='datetime64[D]'))[0] == np.datetime64('2026-10-16')
+
+
+def test_trade_time(calendar):
+    saturday = datetime.date(2026, 10, 17)
+    previous = trd.get_previous_trade_date(datetime.date(2026, 10, 19))
+    assert type(previous) is datetime.date and previous == datetime.date(2026, 10, 16)
+    assert previous.strftime("%Y-%m-%d") == '2026-10-16'
+    following = trd.get_next_trade_date(saturday)
+    assert type(following) is datetime.date and following == datetime.date(2026, 10, 19)
+    assert trd.is_trade_date(datetime.date(2026, 10, 16)) and not trd.is_trade_date(saturday)
+    assert trd.get_trade_dates(datetime.date(2026, 10, 15), datetime.date(2026, 10, 19)) == \
+        [datetime.date(2026, 10, 15), datetime.date(2026, 10, 16), datetime.date(2026, 10, 19)]
+    assert trd.get_trade_date_count(datetime.date(2026, 10, 15), datetime.date(2026, 10, 19)) == 3
+
+
+def test_refresh_past_end(calendar):
+    late = datetime.date(2026, 12, 31)
+    trd.is_trade_date(late)
+    trd.is_trade_date(late)
+    trd.get_previous_trade_date(late)
+    # 日历没有更新时只刷新一次
+    assert calendar == [False, True]